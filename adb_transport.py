@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+ADB transport modülü - adb sunucusuyla süreç içinden (pure-python-adb) konuşur
+"""
+
+import itertools
+import os
+import socket
+import subprocess
+import threading
+import time
+
+from ppadb.client import Client
+from ppadb.device import Device
+
+
+# Varsayılan shell komutu zaman aşımı (saniye)
+DEFAULT_SHELL_TIMEOUT = 5
+
+# Açık tutulan shell oturumu: pty'siz etkileşimli shell (adbd, Android 7+)
+PERSISTENT_SHELL_SERVICE = "shell,raw:"
+
+
+class UnsupportedShell(Exception):
+    """Cihazın adbd'si açık tutulan shell oturumunu desteklemiyor"""
+
+
+class StaleSession(ConnectionError):
+    """Oturum komut gönderilmeden önce kapanmıştı (komut çalışmadı)"""
+
+
+class ShellSession:
+    """Cihazda açık tutulan tek bir shell oturumu.
+
+    `shell:<komut>` servisi komut bitince soketi kapatır; bu yüzden her
+    komut için adb sunucusuna yeni bağlantı ve transport seçimi gerekir.
+    Oturum ise `shell,raw:` ile tek bir soket açar ve komutları bu sokete
+    yazar. Her komutun çıktısı, arkasından yazdırılan tekil bir işaretle
+    ayrılır; çıktı tek seferlik shell'deki gibi (stderr dahil) döner.
+    """
+
+    def __init__(self, device, timeout=DEFAULT_SHELL_TIMEOUT):
+        # Transport hatası (cihaz yok) RuntimeError olarak çağırana iletilir
+        self._conn = device.create_connection(timeout=timeout)
+        try:
+            self._conn.send(PERSISTENT_SHELL_SERVICE)
+        except RuntimeError as e:
+            self._conn.close()
+            raise UnsupportedShell(str(e))
+        self._socket = self._conn.socket
+        self._buffer = b""
+        self._markers = itertools.count()
+        self.closed = False
+
+    def run(self, cmd, timeout=DEFAULT_SHELL_TIMEOUT):
+        """Komutu çalıştırır ve çıktısını döndürür; zaman aşımında oturum kapatılır"""
+        marker = f"__shb_{os.getpid()}_{next(self._markers)}__".encode()
+        # Komut alt shell'de çalışır: exit/cd oturumu etkilemez, stdin'den okuyamaz
+        line = f"( {cmd}\n) </dev/null 2>&1; printf '\\n%s\\n' {marker.decode()}\n"
+        end = b"\n" + marker + b"\n"
+        deadline = time.monotonic() + timeout
+        received = False
+        try:
+            try:
+                self._socket.sendall(line.encode())
+            except OSError as e:
+                raise StaleSession(str(e))
+            while end not in self._buffer:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise socket.timeout(f"shell komutu {timeout} sn içinde bitmedi: {cmd}")
+                self._socket.settimeout(remaining)
+                try:
+                    data = self._socket.recv(65536)
+                except ConnectionResetError:
+                    data = b""
+                if not data:
+                    if received:
+                        raise ConnectionError("shell oturumu komut çalışırken kapandı")
+                    raise StaleSession("shell oturumu kapanmış")
+                received = True
+                self._buffer += data
+        except BaseException:
+            self.close()
+            raise
+        output, self._buffer = self._buffer.split(end, 1)
+        return output.decode('utf-8', errors='replace')
+
+    def close(self):
+        self.closed = True
+        self._conn.close()
+
+
+class AdbTransport:
+    """adb sunucusuna bağlı tek bir istemci.
+
+    Her komut için yeni bir `adb` süreci başlatmak yerine adb sunucusunun
+    soketine doğrudan bağlanılır. İstemci ve cihaz nesneleri süreç boyunca
+    tekrar kullanılır; shell komutları cihaz başına açık tutulan tek bir
+    ShellSession soketinden gönderilir (ADB_PERSISTENT_SHELL=0 ile her komut
+    kendi bağlantısını açar). Oturumu desteklemeyen cihazlarda tek seferlik
+    `shell:` kullanılır.
+    """
+
+    def __init__(self, host=None, port=None, persistent_shell=None):
+        self.host = host or os.getenv('ADB_SERVER_HOST', '127.0.0.1')
+        self.port = int(port or os.getenv('ADB_SERVER_PORT', '5037'))
+        if persistent_shell is None:
+            persistent_shell = os.getenv('ADB_PERSISTENT_SHELL', '1') != '0'
+        self.persistent_shell = persistent_shell
+        self.client = Client(host=self.host, port=self.port)
+        self._devices = {}  # serial -> ppadb Device
+        self._sessions = {}  # serial -> ShellSession (desteklemeyen cihazlar için None)
+        self._session_locks = {}  # serial -> Lock (bir oturumda aynı anda tek komut)
+        self._server_checked = False
+        self._lock = threading.Lock()
+
+    def ensure_server(self):
+        """adb sunucusuna ulaşılamıyorsa bir kez `adb start-server` ile başlatır"""
+        if self._server_checked:
+            return
+        with self._lock:
+            if self._server_checked:
+                return
+            try:
+                self.client.version()
+            except RuntimeError:
+                # adb kurulu değilse veya sunucu uzaktaysa başlatılamaz; hata asıl çağrıda görünür
+                try:
+                    subprocess.run(['adb', '-P', str(self.port), 'start-server'],
+                                   capture_output=True, timeout=10)
+                except (OSError, subprocess.SubprocessError):
+                    pass
+            self._server_checked = True
+
+    def version(self):
+        """adb sunucusunun protokol sürümünü döndürür"""
+        self.ensure_server()
+        return self.client.version()
+
+    def devices(self):
+        """Kullanılabilir ('device' durumundaki) cihazların seri numaralarını döndürür"""
+        self.ensure_server()
+        return [device.serial for device in self.client.devices(state=Client.DEVICE)]
+
+    def device(self, serial=None):
+        """Seri numarasına ait cihaz nesnesini döndürür (serial yoksa ilk cihaz)"""
+        if not serial:
+            serials = self.devices()
+            if not serials:
+                raise RuntimeError("Bağlı cihaz bulunamadı")
+            serial = serials[0]
+        device = self._devices.get(serial)
+        if device is None:
+            # client.device() her seferinde cihaz listesini sorar; nesne doğrudan oluşturulur
+            device = Device(self.client, serial)
+            self._devices[serial] = device
+        return device
+
+    def shell(self, serial, cmd, timeout=DEFAULT_SHELL_TIMEOUT):
+        """Cihazda shell komutu çalıştırır ve çıktısını döndürür.
+
+        Zaman aşımında socket.timeout, cihaz bulunamazsa RuntimeError yükselir.
+        """
+        self.ensure_server()
+        device = self.device(serial)
+        if not self.persistent_shell:
+            return device.shell(cmd, timeout=timeout)
+
+        with self._lock:
+            lock = self._session_locks.setdefault(device.serial, threading.Lock())
+        with lock:
+            session = self._sessions.get(device.serial, False)
+            if session is None:
+                return device.shell(cmd, timeout=timeout)
+            if session is not False and not session.closed:
+                try:
+                    return session.run(cmd, timeout=timeout)
+                except StaleSession:
+                    # Oturum boştayken kapanmış (cihaz yeniden bağlandı, adb sunucusu yeniden başladı);
+                    # komut çalışmadığı için yeni oturumda tekrar denenir
+                    pass
+            try:
+                session = ShellSession(device, timeout=timeout)
+            except UnsupportedShell:
+                print(f"  ⚠️  {device.serial}: açık shell oturumu desteklenmiyor, tek seferlik shell kullanılacak")
+                self._sessions[device.serial] = None
+                return device.shell(cmd, timeout=timeout)
+            self._sessions[device.serial] = session
+            return session.run(cmd, timeout=timeout)
+
+    def close(self):
+        """Açık shell oturumlarını kapatır"""
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            if session:
+                session.close()
+
+
+_transport = None
+_transport_pid = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """Süreç genelinde paylaşılan transport'u döndürür"""
+    global _transport, _transport_pid
+    # Fork edilen worker'lar kendi transport'unu oluşturur
+    if _transport is None or _transport_pid != os.getpid():
+        with _transport_lock:
+            if _transport is None or _transport_pid != os.getpid():
+                _transport = AdbTransport()
+                _transport_pid = os.getpid()
+    return _transport
+
+
+def shell(serial, cmd, timeout=DEFAULT_SHELL_TIMEOUT):
+    """Paylaşılan transport üzerinden shell komutu çalıştırır"""
+    return get_transport().shell(serial, cmd, timeout=timeout)
@@ -3,34 +3,34 @@
 Uygulama yönetimi modülü
 """
 
-import subprocess
-import time
+from adb_transport import shell
+from instrumentation import record_launch
+from timing import get_timing_policy
 
 
 # Sahibinden uygulamasının paket adı
 SAHIBINDEN_PACKAGE = "com.sahibinden"
 
+# Oturum boyunca cihaz başına önbellekler
+_installed_cache = {}       # device_id -> kurulu mu
+_launch_activity_cache = {}  # device_id -> "paket/aktivite" (çözülemezse None)
 
-def is_app_installed(device_id):
+
+def is_app_installed(device_id, use_cache=False):
     """Sahibinden uygulamasının kurulu olup olmadığını kontrol eder"""
+    if use_cache and _installed_cache.get(device_id):
+        return True
     try:
-        cmd = ['adb']
-        if device_id:
-            cmd.extend(['-s', device_id])
-        cmd.extend(['shell', 'pm', 'list', 'packages', SAHIBINDEN_PACKAGE])
-
-        result = subprocess.run(cmd, 
-                              capture_output=True, 
-                              text=True, 
-                              timeout=5)
+        output = shell(device_id, f"pm list packages {SAHIBINDEN_PACKAGE}", timeout=5)
         
-        is_installed = SAHIBINDEN_PACKAGE in result.stdout
+        is_installed = SAHIBINDEN_PACKAGE in output
         
         if is_installed:
             print(f"✓ Sahibinden uygulaması kurulu")
         else:
             print(f"✗ Sahibinden uygulaması bulunamadı (paket: {SAHIBINDEN_PACKAGE})")
             
+        _installed_cache[device_id] = is_installed
         return is_installed
     except Exception as e:
         print(f"✗ Uygulama kontrolü sırasında hata: {e}")
@@ -40,27 +40,21 @@ def is_app_installed(device_id):
 def is_app_running(device_id):
     """Sahibinden uygulamasının çalışıp çalışmadığını kontrol eder"""
     try:
-        cmd = ['adb']
-        if device_id:
-            cmd.extend(['-s', device_id])
-        cmd.extend(['shell', 'pidof', SAHIBINDEN_PACKAGE])
-        
-        result = subprocess.run(cmd, 
-                              capture_output=True, 
-                              text=True, 
-                              timeout=5)
+        output = shell(device_id, f"pidof {SAHIBINDEN_PACKAGE}", timeout=5)
         
         # Eğer pidof bir PID döndürürse, uygulama çalışıyor demektir
-        is_running = result.stdout.strip() != ''
+        is_running = output.strip() != ''
         return is_running
     except Exception as e:
         # Hata durumunda False döndür (güvenli taraf)
         return False
 
 
-def launch_app(device_id):
+def launch_app(device_id, timing=None):
     """Sahibinden uygulamasını açar (eğer çalışıyorsa önce kapatır)"""
     print("\n--- Uygulama Başlatılıyor ---")
+    timing = timing or get_timing_policy(device_id=device_id)
+    start = timing.now()
     
     if not is_app_installed(device_id):
         print("✗ Uygulama kurulu olmadığı için başlatılamıyor")
@@ -70,52 +64,172 @@ def launch_app(device_id):
         # Önce uygulamanın çalışıp çalışmadığını kontrol et
         if is_app_running(device_id):
             print("  → Uygulama çalışıyor, kapatılıyor...")
-            cmd_stop = ['adb']
-            if device_id:
-                cmd_stop.extend(['-s', device_id])
-            cmd_stop.extend(['shell', 'am', 'force-stop', SAHIBINDEN_PACKAGE])
-            subprocess.run(cmd_stop, capture_output=True, timeout=5)
-            time.sleep(1)  # Kapanma için kısa bekleme
+            shell(device_id, f"am force-stop {SAHIBINDEN_PACKAGE}", timeout=5)
+            timing.sleep('app_stop')  # Kapanma için kısa bekleme
             print("  ✓ Uygulama kapatıldı")
         else:
             print("  → Uygulama çalışmıyor, direkt başlatılıyor...")
         
         # Uygulamayı durdur (eğer hala çalışıyorsa)
-        cmd_stop = ['adb']
-        if device_id:
-            cmd_stop.extend(['-s', device_id])
-        cmd_stop.extend(['shell', 'am', 'force-stop', SAHIBINDEN_PACKAGE])
-        subprocess.run(cmd_stop, capture_output=True, timeout=5)
-        time.sleep(0.5)  # Kapanma için kısa bekleme
+        shell(device_id, f"am force-stop {SAHIBINDEN_PACKAGE}", timeout=5)
+        timing.sleep('app_stop_confirm')  # Kapanma için kısa bekleme
         
         # Monkey komutu ile uygulamayı başlat (en güvenli yöntem)
         # Bu yöntem, exported olmayan aktiviteleri de başlatabilir
-        cmd_start = ['adb']
-        if device_id:
-            cmd_start.extend(['-s', device_id])
-        cmd_start.extend([
-            'shell', 'monkey', 
-            '-p', SAHIBINDEN_PACKAGE,
-            '-c', 'android.intent.category.LAUNCHER',
-            '1'
-        ])
+        output = shell(
+            device_id,
+            f"monkey -p {SAHIBINDEN_PACKAGE} -c android.intent.category.LAUNCHER 1",
+            timeout=10
+        )
         
-        result = subprocess.run(cmd_start, 
-                              capture_output=True, 
-                              text=True, 
-                              timeout=10)
-        
-        if result.returncode == 0 and 'Events injected' in result.stdout:
+        if 'Events injected' in output:
             print(f"✓ Sahibinden uygulaması başlatıldı")
             print(f"  Paket: {SAHIBINDEN_PACKAGE}")
-            time.sleep(2)  # Uygulamanın açılması için bekle
+            timing.sleep('app_start')  # Uygulamanın açılması için bekle
+            record_launch('cold', ready_time_ms=int((timing.now() - start) * 1000))
             return True
         else:
             print(f"✗ Uygulama başlatılırken hata:")
-            print(result.stderr)
+            print(output)
             return False
             
     except Exception as e:
         print(f"✗ Uygulama başlatma sırasında hata: {e}")
         return False
 
+
+def resolve_launch_activity(device_id):
+    """Uygulamanın launcher aktivitesini ("paket/aktivite") döndürür (çözülemezse None)"""
+    if device_id in _launch_activity_cache:
+        return _launch_activity_cache[device_id]
+    component = None
+    try:
+        output = shell(
+            device_id,
+            f"cmd package resolve-activity --brief -c android.intent.category.LAUNCHER {SAHIBINDEN_PACKAGE}",
+            timeout=5
+        )
+        # Son satır "com.sahibinden/.SomeActivity" formatındadır
+        lines = [line.strip() for line in output.splitlines() if line.strip()]
+        if lines and lines[-1].startswith(f"{SAHIBINDEN_PACKAGE}/"):
+            component = lines[-1]
+    except Exception:
+        pass
+    _launch_activity_cache[device_id] = component
+    return component
+
+
+def parse_am_start_output(output):
+    """`am start -W` çıktısını sözlüğe çevirir (Status, LaunchState, TotalTime, WaitTime)"""
+    result = {}
+    for line in output.splitlines():
+        key, sep, value = line.partition(':')
+        if sep and key.strip() in ('Status', 'LaunchState', 'TotalTime', 'WaitTime', 'Error'):
+            result[key.strip()] = value.strip()
+    return result
+
+
+def start_app_activity(device_id):
+    """Uygulamayı `am start -W` ile başlatır/öne getirir ve aktivite görüntülenene kadar bekler.
+
+    Aktivite çözülemezse monkey ile başlatılır. Açılış bilgisi sözlüğü
+    döndürür ('total_time_ms' ve 'launch_state' bilinmiyorsa None); başarısızsa None.
+    """
+    component = resolve_launch_activity(device_id)
+    if not component:
+        output = shell(
+            device_id,
+            f"monkey -p {SAHIBINDEN_PACKAGE} -c android.intent.category.LAUNCHER 1",
+            timeout=10
+        )
+        if 'Events injected' not in output:
+            print(output)
+            return None
+        return {'launch_state': None, 'total_time_ms': None}
+
+    output = shell(
+        device_id,
+        f"am start -W -a android.intent.action.MAIN -c android.intent.category.LAUNCHER -n {component}",
+        timeout=30
+    )
+    info = parse_am_start_output(output)
+    if info.get('Status') != 'ok' or 'Error' in info:
+        print(output)
+        return None
+    total_time = info.get('TotalTime', '')
+    return {
+        'launch_state': info.get('LaunchState'),
+        'total_time_ms': int(total_time) if total_time.isdigit() else None,
+    }
+
+
+def force_stop_app(device_id):
+    """Uygulamayı kapatır"""
+    shell(device_id, f"am force-stop {SAHIBINDEN_PACKAGE}", timeout=5)
+
+
+def warm_launch_app(device_id, d, ready_timeout=None, timing=None):
+    """Uygulamayı hızlı modda açar; tanınan ekranı döndürür (başarısızsa None).
+
+    Uygulama zaten tanınan bir ekrandaysa hiçbir şey yapılmaz. Değilse
+    uygulama `am start -W` ile öne getirilir ve hazır olduğu sabit bekleme
+    yerine ekran tanınarak anlaşılır. Sadece ekran tanınamazsa uygulama
+    kapatılıp yeniden açılır. ready_timeout verilmezse zamanlama
+    politikasının app_ready değeri kullanılır.
+    """
+    from ui_actions import detect_screen, wait_for_screen
+    from screen_snapshot import ScreenSnapshot
+
+    print("\n--- Uygulama Başlatılıyor (hızlı mod) ---")
+    timing = timing or get_timing_policy(d)
+    if ready_timeout is None:
+        ready_timeout = timing.seconds('app_ready')
+    start = timing.now()
+    metrics = {'mode': 'warm', 'launch_state': None, 'total_time_ms': None,
+               'ready_time_ms': None, 'screen': None}
+
+    if not is_app_installed(device_id, use_cache=True):
+        print("✗ Uygulama kurulu olmadığı için başlatılamıyor")
+        return None
+
+    try:
+        # Uygulama zaten tanınan bir ekrandaysa açılışa gerek yok
+        screen = detect_screen(ScreenSnapshot(d, timing=timing), package=SAHIBINDEN_PACKAGE)
+        if screen:
+            metrics['mode'] = 'resumed'
+        else:
+            # Çalışıyorsa öne getirilir, çalışmıyorsa açılır
+            launch = start_app_activity(device_id)
+            if launch:
+                metrics.update(launch)
+                screen = wait_for_screen(d, package=SAHIBINDEN_PACKAGE, timeout=ready_timeout, timing=timing)
+
+            if not screen:
+                # Ekran tanınamadı - soğuk yeniden başlatma
+                print("  → Ekran tanınamadı, uygulama yeniden başlatılıyor...")
+                metrics['mode'] = 'cold'
+                force_stop_app(device_id)
+                launch = start_app_activity(device_id)
+                if not launch:
+                    print("✗ Uygulama başlatılırken hata")
+                    return None
+                metrics.update(launch)
+                screen = wait_for_screen(d, package=SAHIBINDEN_PACKAGE, timeout=ready_timeout, timing=timing)
+    except Exception as e:
+        print(f"✗ Uygulama başlatma sırasında hata: {e}")
+        return None
+
+    metrics['ready_time_ms'] = int((timing.now() - start) * 1000)
+    metrics['screen'] = screen
+    # Açılış ölçümleri çalışma kaydına (runs.jsonl ve .prom) yazılır
+    record_launch(**metrics)
+    if not screen:
+        print(f"✗ Uygulama {ready_timeout:.0f} saniyede hazır olmadı")
+        return None
+
+    print(f"✓ Sahibinden uygulaması hazır (ekran: {screen})")
+    launch_state = metrics['launch_state'] or '-'
+    total_time = f"{metrics['total_time_ms']} ms" if metrics['total_time_ms'] is not None else '-'
+    print(f"  Açılış: {metrics['mode']} (LaunchState: {launch_state}, TotalTime: {total_time}), "
+          f"hazır olma süresi: {metrics['ready_time_ms']} ms")
+    return screen
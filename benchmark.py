@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Benchmark - UI sıcak yollarını (kategori okuma, kategori ve 'Tüm ... İlanları' tıklama)
+telefon olmadan FakeDevice üzerinde çalıştırır ve maliyetlerini raporlar; kategori sınıflandırıcısını
+eski filtrelerle karşılaştırır
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+
+# Karşılaştırmada kullanılan (deterministik) metrikler; duvar saati gürültülü olduğu için sadece raporlanır
+GATED_METRICS = ['rpc', 'dumps', 'bytes_parsed', 'swipes', 'sleep']
+
+
+class Meter:
+    """Snapshot'ların parse ettiği hierarchy byte'larını sayar"""
+
+    def __init__(self):
+        self.bytes_parsed = 0
+
+    @contextlib.contextmanager
+    def installed(self):
+        import screen_snapshot
+
+        original_parse = screen_snapshot.parse_nodes
+
+        def parse_nodes(xml_content):
+            self.bytes_parsed += len(xml_content.encode('utf-8'))
+            return original_parse(xml_content)
+
+        screen_snapshot.parse_nodes = parse_nodes
+        try:
+            yield self
+        finally:
+            screen_snapshot.parse_nodes = original_parse
+
+
+# Sınıflandırıcıdan önceki filtreler (category_reader), karşılaştırma için aynen korunur
+_LEGACY_EXCLUDE_KEYWORDS = [
+    'vasıta', 'kategori', 'ara', 'filtre', 'sırala', 'menü', 'geri', 'ileri',
+    'aç', 'kapat', 'tamam', 'iptal', 'giriş', 'kayıt', 'profil', 'ayarlar',
+    'yardım', 'back', 'home', 'overview', 'seçimi', 'tüm'
+]
+_LEGACY_SYSTEM_MESSAGES = [
+    'wifi', 'signal', 'battery', 'charging', 'percent', 'phone', 'full',
+    'pm', 'am', ':', 'overview'
+]
+
+
+def legacy_is_navigation_header(text):
+    """Eski is_navigation_device_header"""
+    text_lower = text.lower().strip()
+    navigation_keywords = [
+        'navigasyon cihazı',
+        'navigasyon cihazları',
+        'navigasyon cihazi',
+        'navigasyon cihazlari',
+        'navigation device',
+        'navigation devices'
+    ]
+    return any(keyword in text_lower for keyword in navigation_keywords)
+
+
+def legacy_categories_from_nodes(nodes):
+    """Eski categories_from_nodes: ekrandaki kategori metinleri (küme)"""
+    categories = set()
+    for node in nodes:
+        text = node.text
+        content_desc = node.content_desc
+        if text:
+            text_lower = text.lower()
+            if len(text) <= 2:
+                continue
+            if text.startswith('(') and text.endswith(')'):
+                continue
+            if all(c.isdigit() or c in '.,()' for c in text):
+                continue
+            if ':' in text and any(c.isdigit() for c in text):
+                if 'pm' in text_lower or 'am' in text_lower or len(text) <= 6:
+                    continue
+            if any(msg in text_lower for msg in _LEGACY_SYSTEM_MESSAGES):
+                continue
+            if any(exclude in text_lower for exclude in _LEGACY_EXCLUDE_KEYWORDS):
+                continue
+            if legacy_is_navigation_header(text):
+                continue
+            if text.replace(' ', '').replace('&', '').replace('-', '').replace("'", '').isdigit():
+                continue
+            if not any(c.isalpha() for c in text):
+                continue
+            categories.add(text)
+        if content_desc and len(content_desc) > 2:
+            content_desc_lower = content_desc.lower()
+            if (not content_desc.startswith('(') and
+                    not all(c.isdigit() or c in '.,()' for c in content_desc) and
+                    ':' not in content_desc and
+                    not any(msg in content_desc_lower for msg in _LEGACY_SYSTEM_MESSAGES) and
+                    not any(exclude in content_desc_lower for exclude in _LEGACY_EXCLUDE_KEYWORDS) and
+                    any(c.isalpha() for c in content_desc)):
+                categories.add(content_desc)
+    return categories
+
+
+def legacy_keeps_candidate(category):
+    """Eski read_categories_from_page okuma sonrası filtresi: aday kategori olarak kalıyor mu"""
+    category = category.strip()
+    if not category or len(category) <= 2:
+        return False
+    category_lower = category.lower()
+    if 'tüm' in category_lower and 'ilan' in category_lower:
+        return False
+    if legacy_is_navigation_header(category):
+        return False
+    if any(keyword.lower() in category_lower for keyword in ['Vasıta', 'Kategori seçimi', 'Tüm', 'İlanları']):
+        return False
+    return not category.replace(' ', '').isdigit()
+
+
+def expected_categories(screen):
+    """Listeyi okumanın döndürmesi gereken kategoriler (öncelik sırasıyla).
+
+    Sahte listede satırlar, kayıtta her karenin liste içindeki metinleri
+    sırayla alınır; 'Navigasyon Cihazı' başlığında durulur. Eski filtrelerin
+    kategori saymadığı metinler ('Tüm ... İlanları', sayılar, 'am' içeren
+    Lamborghini gibi) çıkarılır.
+    """
+    from category_reader import list_nodes, sort_categories_by_priority
+    from fake_device import ListScreen
+    from hierarchy_parser import Node, parse_nodes
+
+    if isinstance(screen, ListScreen):
+        texts = list(screen.rows)
+    else:
+        texts = [node.text for xml in _list_frames(screen) for node in list_nodes(parse_nodes(xml)) if node.text]
+    categories = []
+    for text in texts:
+        if legacy_is_navigation_header(text):
+            break
+        node = Node(text, '', '', False, '', '', '', False)
+        if text in legacy_categories_from_nodes([node]) and legacy_keeps_candidate(text) and text not in categories:
+            categories.append(text)
+    return sort_categories_by_priority(categories)
+
+
+def _list_frames(screen):
+    """Listeyi baştan sona yarım ekran kaydırarak her karenin XML'ini döndürür"""
+    screen.to_top()
+    frames = [screen.xml()]
+    while screen.scroll(max(1, screen.viewport // 2)):
+        frames.append(screen.xml())
+    screen.to_top()
+    return frames
+
+
+def run_classifier_benchmark(make_device, passes=50):
+    """Sınıflandırıcıyı eski filtrelerle listenin tüm karelerinde karşılaştırır.
+
+    Her kare bir kez parse edilir; iki taraf da aynı Node'lar üzerinde
+    passes kez çalıştırılır (sınıflandırıcı önbelleği boş başlar).
+    'ok' kare kare aynı kategorilerin, aynı okuma sonrası filtre
+    sonucunun ve aynı başlık kontrolünün çıkmasıdır.
+    """
+    import category_classifier
+    from hierarchy_parser import parse_nodes
+    from timing import VirtualClock
+
+    screens = [parse_nodes(xml) for xml in _list_frames(make_device(VirtualClock()).screen)]
+    texts = {value for nodes in screens for node in nodes for value in (node.text, node.content_desc) if value}
+
+    for function in (category_classifier.classify_text, category_classifier.classify_content_desc,
+                     category_classifier.classify_candidate, category_classifier.is_navigation_header):
+        function.cache_clear()
+    ok = all(legacy_categories_from_nodes(nodes) == set(category_classifier.classify_nodes(nodes))
+             for nodes in screens)
+    ok = ok and all(
+        legacy_keeps_candidate(text) == (category_classifier.classify_candidate(text) == category_classifier.LABEL_CATEGORY)
+        and legacy_is_navigation_header(text) == category_classifier.is_navigation_header(text)
+        for text in texts
+    )
+
+    def timed(function):
+        started = time.perf_counter()
+        for _ in range(passes):
+            for nodes in screens:
+                function(nodes)
+        return (time.perf_counter() - started) / passes
+
+    legacy = timed(legacy_categories_from_nodes)
+    category_classifier.classify_text.cache_clear()
+    category_classifier.classify_content_desc.cache_clear()
+    wall = timed(category_classifier.classify_nodes)
+    return {
+        'name': 'classify_nodes',
+        'ok': ok,
+        'screens': len(screens),
+        'texts': len(texts),
+        'wall': wall,
+        'legacy_wall': legacy,
+    }
+
+
+def _scenarios(target, missing, categories):
+    """(isim, hazırlık, çalıştırma, beklenen sonuç, arama stratejisi) listesi.
+
+    hazırlık ölçülmez (ör. konum haritasını doldurmak için liste okunur);
+    çalıştırma yeni bir sahte cihazla ölçülür. Okuma tam olarak categories
+    listesini döndürmeli, tıklamalar sadece hedef satıra basmalıdır.
+    """
+    from category_reader import read_categories_from_page
+    from ui_actions import click_category, click_tum_button
+
+    def read(d, timing):
+        return read_categories_from_page(d, timing=timing) == categories
+
+    def click_target(d, timing):
+        return click_category(d, target, timing=timing) and d.clicked == [target]
+
+    def click_missing(d, timing):
+        # Bulunamayan marka için hiçbir satıra basılmamalı
+        return click_category(d, missing, timing=timing) or bool(d.clicked)
+
+    def click_tum(d, timing):
+        return click_tum_button(d, target, timing=timing) and d.clicked == [f'Tüm "{target}" İlanları']
+
+    return [
+        ("read_categories", None, read, True, 'local'),
+        (f"click_category[{target}] local", None, click_target, True, 'local'),
+        (f"click_category[{target}] server", None, click_target, True, 'server'),
+        (f"click_category[{target}] harita", read, click_target, True, 'local'),
+        (f"click_category[{missing}] yok", None, click_missing, False, 'local'),
+        (f"click_tum_button[{target}]", click_target, click_tum, True, 'local'),
+    ]
+
+
+def run_benchmarks(make_device, target='Tesla', missing='Yugo', repeat=1, real_sleep=False, verbose=False,
+                   profile='default', calls=0):
+    """Senaryoları çalıştırır; her senaryo için metrik sözlüğü listesi döndürür.
+
+    make_device(clock) sahte cihaz döndürmelidir. Beklemeler sanal saatle
+    yapılır (real_sleep verilmezse): çalışma hızlı biter, 'simulated'
+    gerçek cihazda geçecek süreyi verir. calls verilirse ölçülen cihaz
+    DeviceProxy ile sarılır ve en yavaş calls çağrı noktası 'calls'
+    anahtarına eklenir.
+    """
+    import category_positions
+    from device_proxy import DeviceProxy
+    from timing import RealClock, TimingPolicy, VirtualClock
+
+    categories = expected_categories(make_device(VirtualClock()).screen)
+    results = []
+    previous_cache = os.environ.get('CATEGORY_POSITION_CACHE')
+    previous_strategy = os.environ.get('UI_SEARCH_STRATEGY')
+    try:
+        for name, setup, run, expected, strategy in _scenarios(target, missing, categories):
+            os.environ['UI_SEARCH_STRATEGY'] = strategy
+            best = None
+            for attempt in range(repeat):
+                with tempfile.TemporaryDirectory() as directory:
+                    # Her tekrar boş bir konum haritasıyla başlar
+                    os.environ['CATEGORY_POSITION_CACHE'] = os.path.join(directory, 'positions.json')
+                    category_positions.reset_position_cache()
+                    if setup:
+                        setup_clock = VirtualClock()
+                        d = make_device(setup_clock)
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            setup(d, TimingPolicy(profile=profile, clock=setup_clock))
+                        # Hazırlıkta açılan ekran korunur, sayaçlar yeni cihazla sıfırlanır
+                        screens = d.screens
+                    clock = RealClock() if real_sleep else VirtualClock()
+                    d = make_device(clock)
+                    if setup:
+                        d.screens = screens
+                    if calls:
+                        d = DeviceProxy(d, clock=clock)
+                    timing = TimingPolicy(profile=profile, clock=clock)
+                    meter = Meter()
+                    output = sys.stdout if verbose else io.StringIO()
+                    with meter.installed(), contextlib.redirect_stdout(output):
+                        started = time.perf_counter()
+                        simulated_start = clock.now()
+                        ok = bool(run(d, timing))
+                        wall = time.perf_counter() - started
+                        simulated = clock.now() - simulated_start
+                result = {
+                    'name': name,
+                    'ok': ok == expected,
+                    'wall': wall,
+                    'rpc': d.rpc_count,
+                    'dumps': d.calls['dump_hierarchy'],
+                    'bytes_parsed': meter.bytes_parsed,
+                    'swipes': d.swipes,
+                    'sleep': round(clock.slept, 3),
+                    'simulated': round(simulated, 3),
+                }
+                if calls:
+                    result['calls'] = d.report(limit=calls)['sites']
+                if best is None or result['wall'] < best['wall']:
+                    best = result
+            results.append(best)
+    finally:
+        _restore_env('CATEGORY_POSITION_CACHE', previous_cache)
+        _restore_env('UI_SEARCH_STRATEGY', previous_strategy)
+        category_positions.reset_position_cache()
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance=0.1):
+    """Baseline'a göre tolerance'tan fazla kötüleşen metrikleri döndürür"""
+    previous = {row['name']: row for row in baseline}
+    regressions = []
+    for row in results:
+        if not row['ok']:
+            regressions.append(f"{row['name']}: beklenen sonuç alınamadı")
+        base = previous.get(row['name'])
+        if not base:
+            continue
+        for metric in GATED_METRICS:
+            if metric in base and metric in row and row[metric] > base[metric] * (1 + tolerance) + 1e-9:
+                regressions.append(f"{row['name']}: {metric} {base[metric]} -> {row[metric]}")
+    return regressions
+
+
+def print_results(results):
+    header = (f"{'Senaryo':<38} {'Sonuç':>5} {'Süre(ms)':>9} {'Cihazda(s)':>11} {'RPC':>5} {'Dump':>5} "
+              f"{'Parse(KB)':>10} {'Swipe':>6} {'Bekleme(s)':>11}")
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        print(
+            f"{row['name']:<38} {'✓' if row['ok'] else '✗':>5} {row['wall'] * 1000:>9.1f} "
+            f"{row['simulated']:>11.2f} {row['rpc']:>5} "
+            f"{row['dumps']:>5} {row['bytes_parsed'] / 1024:>10.1f} {row['swipes']:>6} {row['sleep']:>11.2f}"
+        )
+
+
+def print_classifier(row):
+    screens = max(1, row['screens'])
+    print(f"\n{'✓' if row['ok'] else '✗'} {row['name']}: {row['screens']} ekran, {row['texts']} farklı metin "
+          f"- eski filtreler {row['legacy_wall'] / screens * 1e6:.1f} µs/ekran, "
+          f"sınıflandırıcı {row['wall'] / screens * 1e6:.1f} µs/ekran")
+
+
+def print_calls(results):
+    for row in results:
+        if not row.get('calls'):
+            continue
+        print(f"\n⊙ {row['name']} - en yavaş cihaz çağrıları:")
+        for call in row['calls']:
+            cached = f", {call['cached']} önbellekten" if call['cached'] else ""
+            print(f"  {call['total'] * 1000:8.2f} ms  {call['count']:4}x{cached}  "
+                  f"{call['method']}[{call['kind']}]  {call['site']}")
+
+
+def _restore_env(key, value):
+    if value is None:
+        os.environ.pop(key, None)
+    else:
+        os.environ[key] = value
+
+
+def main():
+    """Ana giriş noktası"""
+    parser = argparse.ArgumentParser(description="UI sıcak yolları için FakeDevice benchmark'ı")
+    parser.add_argument("--target", default="Tesla", help="Aranacak marka")
+    parser.add_argument("--missing", default="Yugo", help="Listede olmayan marka (bulunamama senaryosu)")
+    parser.add_argument("--recording", default=None,
+                        help="Otomobil listesi yerine oynatılacak kayıtlı dump klasörü (*.xml)")
+    parser.add_argument("--repeat", type=int, default=1, help="Her senaryonun tekrar sayısı (en hızlısı raporlanır)")
+    parser.add_argument("--rpc-latency", type=float, default=0.0, help="Her RPC için eklenecek cihaz gecikmesi (s)")
+    parser.add_argument("--real-sleep", action="store_true", help="Sanal saat yerine gerçekten bekle")
+    parser.add_argument("--profile", default=os.environ.get("TIMING_PROFILE", "default"),
+                        help="Zamanlama profili (default, fast, slow)")
+    parser.add_argument("--verbose", action="store_true", help="Fonksiyonların çıktısını göster")
+    parser.add_argument("--calls", type=int, default=0,
+                        help="Cihazı DeviceProxy ile sar ve her senaryonun en yavaş N çağrı noktasını göster")
+    parser.add_argument("--json", default=None, help="Sonuçları bu dosyaya JSON olarak yaz")
+    parser.add_argument("--baseline", default=None, help="Karşılaştırılacak önceki JSON sonuçları")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Baseline'a göre izin verilen artış oranı")
+    args = parser.parse_args()
+
+    from fake_device import FakeDevice, ReplayScreen, otomobil_screen, brand_screen
+
+    def make_device(clock):
+        if args.recording:
+            screen = ReplayScreen.from_directory(args.recording, on_click=lambda text: brand_screen(text))
+        else:
+            screen = otomobil_screen()
+        return FakeDevice(screen, rpc_latency=args.rpc_latency, clock=clock)
+
+    results = run_benchmarks(make_device, target=args.target, missing=args.missing, repeat=max(1, args.repeat),
+                             real_sleep=args.real_sleep, verbose=args.verbose, profile=args.profile,
+                             calls=max(0, args.calls))
+    print_results(results)
+    print_calls(results)
+    classifier = run_classifier_benchmark(make_device)
+    print_classifier(classifier)
+    results.append(classifier)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    failed = [row['name'] for row in results if not row['ok']]
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare_with_baseline(results, json.load(f), tolerance=args.tolerance)
+        if regressions:
+            print("\n✗ Baseline'a göre kötüleşme:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print("\n✓ Baseline'a göre kötüleşme yok")
+    if failed:
+        print(f"\n✗ Beklenen sonucu vermeyen senaryolar: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,29 +4,52 @@ Sahibinden Bot sınıfı
 """
 
 import os
+import signal
+import threading
 import time
 
 from device import check_adb, connect_device
-from app import launch_app
+from app import launch_app, warm_launch_app, SAHIBINDEN_PACKAGE
 from ui_actions import init_ui_automator, close_cookie_dialog, click_vasita_category, click_otomobil_category, click_category, click_tum_button
+from ui_actions import navigate_back_to, SCREEN_HOME, SCREEN_VASITA, SCREEN_OTOMOBIL
 from category_reader import read_vasita_categories
 from database import (
     run_migration,
     save_categories,
     assign_category_to_device,
+    close_db_pool,
+    complete_category,
     has_any_categories,
+    release_category_lease,
+    CategoryClaimError,
+    CategoryPrefetcher,
+    LeaseHeartbeat,
 )
+from device_proxy import DeviceProxy
+from instrumentation import finish_run, span, start_run
+from profiling import configure_from_env as configure_profiler
+from timing import get_timing_policy
 
 
 class SahibindenBot:
     """Sahibinden uygulaması için otomasyon sınıfı"""
     
-    def __init__(self):
-        """Bot'u başlatır ve ADB bağlantısını kontrol eder"""
-        self.device_id = None
+    def __init__(self, device_id=None, device_token=None, launch_mode=None, timing=None):
+        """Bot'u başlatır (device_id/device_token verilmezse ilk cihaz ve DEVICE_TOKEN kullanılır).
+
+        timing (TimingPolicy) verilmezse cihaza bağlanınca cihaz modeline
+        göre seçilir; tüm beklemeler bu politika üzerinden yapılır.
+        """
+        self.device_id = device_id
         self.d = None  # uiautomator2 device instance
-        self.device_token = None
+        self.device_token = device_token
+        # 'cold': her seferinde yeniden başlatma, 'warm': ekran tanınarak hızlı açılış (gerçek cihazlarda denenene kadar isteğe bağlı)
+        self.launch_mode = launch_mode or os.environ.get("LAUNCH_MODE", "cold")
+        self.timing = timing
         self.assigned_category = None
+        self._stop_requested = False
+        # PROFILER ayarlıysa fazlar profillenir (CLI'dan kurulduysa dokunulmaz)
+        configure_profiler()
         
     def check_adb(self):
         """ADB'nin kurulu olup olmadığını kontrol eder"""
@@ -38,8 +61,11 @@ class SahibindenBot:
         return get_connected_devices()
     
     def connect_device(self):
-        """Cihaza bağlanır"""
-        self.device_id = connect_device()
+        """Cihaza bağlanır; zamanlama politikası verilmediyse cihazın profili seçilir"""
+        self.device_id = connect_device(self.device_id)
+        if self.device_id is not None and self.timing is None:
+            # Soğuk açılış UI bağlantısından önce yapıldığı için profil ADB'den okunur
+            self.timing = get_timing_policy(device_id=self.device_id)
         return self.device_id is not None
     
     def is_app_installed(self):
@@ -49,90 +75,143 @@ class SahibindenBot:
     
     def launch_app(self):
         """Sahibinden uygulamasını açar"""
-        return launch_app(self.device_id)
+        return launch_app(self.device_id, timing=self.timing)
     
     def init_ui_automator(self):
         """UIAutomator2 bağlantısını başlatır"""
-        self.d = init_ui_automator(self.device_id)
+        with span('ui_connect'):
+            self.d = init_ui_automator(self.device_id)
+        if self.d is not None and self.timing is None:
+            self.timing = get_timing_policy(self.d)
         return self.d is not None
     
     def close_cookie_dialog(self):
         """Çerez tercih dialogunu kapatır"""
-        return close_cookie_dialog(self.d)
+        return close_cookie_dialog(self.d, timing=self.timing)
     
     def click_vasita_category(self):
         """Vasıta kategorisine tıklar"""
-        return click_vasita_category(self.d)
+        return click_vasita_category(self.d, timing=self.timing)
     
     def click_otomobil_category(self):
         """Otomobil kategorisine tıklar"""
-        return click_otomobil_category(self.d)
+        return click_otomobil_category(self.d, timing=self.timing)
 
-    def run(self):
-        """Ana çalıştırma fonksiyonu"""
-        print("=" * 50)
-        print("Sahibinden Mobilden Otomasyonu")
-        print("=" * 50)
+    def open_otomobil_list(self):
+        """Uygulamayı açar ve Otomobil marka listesine gider"""
+        if self.launch_mode == "warm":
+            # Hızlı modda hazır olma ekrandan anlaşıldığı için UI otomasyon önce hazırlanır
+            if self.d is None and not self.init_ui_automator():
+                return False
+            with span('launch'):
+                screen = warm_launch_app(self.device_id, self.d, timing=self.timing)
+            if not screen:
+                return False
+            with span('navigation'):
+                # Uygulama zaten ilerideki bir ekrandaysa o adımlar atlanır
+                if screen == SCREEN_HOME and not self.click_vasita_category():
+                    return False
+                if screen in (SCREEN_HOME, SCREEN_VASITA) and not self.click_otomobil_category():
+                    return False
+            return True
+        
+        # Uygulamayı başlat
+        with span('launch'):
+            if not self.launch_app():
+                return False
         
+        # UI otomasyon hazırla (daemon modunda mevcut oturum korunur)
+        if self.d is None and not self.init_ui_automator():
+            return False
+        
+        # Çerez dialogunu kapat
+        #if not self.close_cookie_dialog():
+        #    print("⚠️  Çerez dialogu kapatılamadı ama devam ediliyor...")
+        
+        # Vasıta kategorisine tıkla
+        with span('navigation'):
+            if not self.click_vasita_category():
+                return False
+
+            return self.click_otomobil_category()
+
+    def prepare(self):
+        """Veritabanı, ADB ve cihaz bağlantısını hazırlar, Otomobil listesine gider
+        ve gerekirse kategori tablosunu doldurur"""
         # Veritabanı migration
         print("\n--- Veritabanı Hazırlanıyor ---")
-        if not run_migration():
-            print("⚠️  Veritabanı migration başarısız, devam ediliyor...")
+        with span('migration'):
+            if not run_migration():
+                print("⚠️  Veritabanı migration başarısız, devam ediliyor...")
         
-        # Ortam değişkeninden cihaz belirtecini al
-        self.device_token = os.environ.get("DEVICE_TOKEN")
+        # Cihaz belirteci verilmediyse ortam değişkeninden al
+        self.device_token = self.device_token or os.environ.get("DEVICE_TOKEN")
         if not self.device_token:
             print("✗ DEVICE_TOKEN ortam değişkeni bulunamadı. Lütfen ayarlayıp tekrar deneyin.")
             return False
         print(f"Kullanılacak cihaz belirteci: {self.device_token}")
         
         # ADB kontrolü
-        if not self.check_adb():
-            return False
+        with span('adb_check'):
+            if not self.check_adb():
+                return False
         
         # Cihaz bağlantısı
-        if not self.connect_device():
-            return False
-        
-        # Uygulamayı başlat
-        if not self.launch_app():
-            return False
+        with span('connect'):
+            if not self.connect_device():
+                return False
         
-        # UI otomasyon hazırla
-        if not self.init_ui_automator():
+        # Uygulamayı başlat ve Otomobil listesine git
+        if not self.open_otomobil_list():
             return False
         
-        # Çerez dialogunu kapat
-        #if not self.close_cookie_dialog():
-        #    print("⚠️  Çerez dialogu kapatılamadı ama devam ediliyor...")
-        
-        # Vasıta kategorisine tıkla
-        if not self.click_vasita_category():
-            return False
+        with span('category_read'):
+            needs_category_seed = not has_any_categories()
+            if needs_category_seed:
+                print("\n✱ Kategori tablosu boş, uygulamadan kategoriler okunacak...")
+                # Kategorileri oku
+                categories = read_vasita_categories(self.d, timing=self.timing)
+                
+                if not categories:
+                    print("⚠️  Hiç kategori bulunamadı")
+                    return False
+                
+                # Kategorileri veritabanına kaydet (deviceId boş olacak)
+                print("\n--- Kategoriler Veritabanına Kaydediliyor ---")
+                if not save_categories(categories, page=1):
+                    print("⚠️  Kategoriler kaydedilemedi")
+                    return False
+            else:
+                print("✓ Veritabanında mevcut kategoriler bulundu, kategori okuma adımı atlanacak.")
+        return True
 
-        if not self.click_otomobil_category():
-            return False
+    def run(self):
+        """Ana çalıştırma fonksiyonu (fazlar instrumentation ile ölçülür)"""
+        start_run('run', device=self.device_id, token=self.device_token)
+        ok = False
+        try:
+            ok = self._run()
+            return ok
+        finally:
+            finish_run(ok, calls=self._call_report(), device=self.device_id, token=self.device_token)
+
+    def _call_report(self):
+        """DeviceProxy açıksa çalışmanın en yavaş cihaz çağrılarını yazdırır ve döndürür (sayaçlar sıfırlanır)"""
+        if not isinstance(self.d, DeviceProxy):
+            return None
+        return self.d.print_report(reset=True)
+
+    def _run(self):
+        print("=" * 50)
+        print("Sahibinden Mobilden Otomasyonu")
+        print("=" * 50)
         
-        needs_category_seed = not has_any_categories()
-        if needs_category_seed:
-            print("\n✱ Kategori tablosu boş, uygulamadan kategoriler okunacak...")
-            # Kategorileri oku
-            categories = read_vasita_categories(self.d)
-            
-            if not categories:
-                print("⚠️  Hiç kategori bulunamadı")
-                return False
-            
-            # Kategorileri veritabanına kaydet (deviceId boş olacak)
-            print("\n--- Kategoriler Veritabanına Kaydediliyor ---")
-            if not save_categories(categories, device_id=None, page=1):
-                print("⚠️  Kategoriler kaydedilemedi")
-                return False
-        else:
-            print("✓ Veritabanında mevcut kategoriler bulundu, kategori okuma adımı atlanacak.")
+        if not self.prepare():
+            return False
         
         # İşlenecek kategoriyi belirle
-        self.assigned_category = assign_category_to_device(self.device_token)
+        with span('db_claim'):
+            self.assigned_category = assign_category_to_device(self.device_token)
         if not self.assigned_category:
             print("✗ İşlenebilecek kategori bulunamadı.")
             return False
@@ -142,19 +221,168 @@ class SahibindenBot:
             f"(order={self.assigned_category['order']})"
         )
 
+        # İşlem sürerken kategorinin lease'ini arka planda yenile. Tek çalışmada kategori
+        # tamamlandı olarak işaretlenmez ve bırakılmaz: satır bu cihazda kalır, sonraki
+        # çalışma cihazın kendi yarım kalan kategorisi olarak onu tekrar alır
+        heartbeat = LeaseHeartbeat(self.device_token)
+        heartbeat.add(self.assigned_category['id'])
+        heartbeat.start()
+        try:
+            if not self.process_assigned_category():
+                return False
+        finally:
+            heartbeat.stop()
+
+        print("\n" + "=" * 50)
+        print("✓ İşlem tamamlandı!")
+        print("=" * 50)
+        return True
+
+    def process_assigned_category(self):
+        """Atanan kategoriye ve 'Tüm {kategori} İlanları' butonuna tıklar"""
         # Kategori butonuna tıkla (örneğin "Honda")
         category_name = self.assigned_category['subCategory']
-        if not click_category(self.d, category_name):
-            print(f"✗ '{category_name}' kategorisine tıklanamadı")
-            return False
+        with span('click_category'):
+            if not click_category(self.d, category_name, timing=self.timing):
+                print(f"✗ '{category_name}' kategorisine tıklanamadı")
+                return False
         
         # "Tüm {category_name} İlanları" butonuna tıkla
-        if not click_tum_button(self.d, category_name):
-            print(f"✗ 'Tüm {category_name} İlanları' butonuna tıklanamadı")
-            return False
+        with span('click_tum_button'):
+            if not click_tum_button(self.d, category_name, timing=self.timing):
+                print(f"✗ 'Tüm {category_name} İlanları' butonuna tıklanamadı")
+                return False
+        return True
 
-        print("\n" + "=" * 50)
-        print("✓ İşlem tamamlandı!")
+    def return_to_otomobil_list(self):
+        """Önceki kategorinin sayfalarından Otomobil marka listesine geri döner"""
+        with span('navigation'):
+            if navigate_back_to(self.d, SCREEN_OTOMOBIL, package=SAHIBINDEN_PACKAGE, timing=self.timing):
+                return True
+        print("  → Geri tuşu ile dönülemedi, Otomobil listesi yeniden açılıyor...")
+        return self.open_otomobil_list()
+
+    def request_stop(self, *_):
+        """Daemon döngüsünün mevcut kategori bittikten sonra durmasını ister"""
+        if not self._stop_requested:
+            print("\n⊙ Durdurma isteği alındı, mevcut kategori bitince çıkılacak...")
+        self._stop_requested = True
+
+    def _install_signal_handlers(self):
+        """SIGTERM/SIGINT'i request_stop'a yönlendirir; önceki işleyicileri döndürür"""
+        # Sinyal işleyicisi sadece ana thread'den kurulabilir
+        if threading.current_thread() is not threading.main_thread():
+            return {}
+        previous = {}
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            previous[signum] = signal.signal(signum, self.request_stop)
+        return previous
+
+    def run_daemon(self, max_iterations=None, max_consecutive_failures=3):
+        """Kategorileri iş kalmayana kadar art arda işler.
+
+        Hazırlık (migration, ADB, uiautomator2 oturumu, veritabanı havuzu)
+        bir kez yapılır ve döngü boyunca korunur. Her turda kategori alınır,
+        Otomobil listesine dönülür, kategori işlenir ve tamamlandı olarak
+        işaretlenir. SIGTERM/SIGINT alınırsa mevcut kategori bitirilip çıkılır.
+        Sıradaki kategori, mevcut kategori işlenirken arka planda önceden
+        alınır (CategoryPrefetcher). İşlenemeyen kategori bırakılır ve bu
+        oturumda tekrar alınmaz. Kategori veritabanı hatası yüzünden tekrar
+        denemelere rağmen alınamazsa döngü başarısız olarak biter. Döngü sadece sayaçları ve başarısız kategori
+        id'lerini tutar; tur sayısı arttıkça bellek kullanımı büyümez.
+        Hazırlık ve her tur ayrı birer çalışma olarak instrumentation'a yazılır.
+        """
         print("=" * 50)
-        return True
+        print("Sahibinden Mobilden Otomasyonu (daemon)")
+        print("=" * 50)
+
+        self._stop_requested = False
+        previous_handlers = self._install_signal_handlers()
+        heartbeat = prefetcher = None
+        iterations = processed = failed = consecutive_failures = 0
+        claim_failed = False
+        try:
+            start_run('prepare', device=self.device_id, token=self.device_token)
+            prepared = False
+            try:
+                prepared = self.prepare()
+            finally:
+                finish_run(prepared, calls=self._call_report(), device=self.device_id, token=self.device_token)
+            if not prepared:
+                return False
 
+            # Tek heartbeat tüm döngü boyunca işlenen ve önceden alınan kategorilerin lease'ini yeniler
+            heartbeat = LeaseHeartbeat(self.device_token).start()
+            prefetcher = CategoryPrefetcher(self.device_token, heartbeat=heartbeat).start()
+            needs_navigation = False  # prepare() sonrası zaten Otomobil listesindeyiz
+
+            while not self._stop_requested:
+                if max_iterations and iterations >= max_iterations:
+                    print(f"⊙ Tur sınırına ulaşıldı ({max_iterations})")
+                    break
+
+                start_run('category', device=self.device_id, token=self.device_token)
+                completed = False
+                try:
+                    try:
+                        with span('db_claim'):
+                            category = prefetcher.get()
+                    except CategoryClaimError as e:
+                        print(f"✗ Kategori alınamadı ({e}), daemon durduruluyor")
+                        claim_failed = True
+                        break
+                    if not category:
+                        print("\n✓ İşlenecek kategori kalmadı.")
+                        break
+                    iterations += 1
+                    self.assigned_category = category
+                    print(
+                        f"\n[{iterations}] İşlenecek kategori: "
+                        f"{category['parentCategory']} -> {category['subCategory']} (order={category['order']})"
+                    )
+
+                    try:
+                        success = (not needs_navigation or self.return_to_otomobil_list()) \
+                            and self.process_assigned_category()
+                    except Exception as e:
+                        print(f"✗ Kategori işlenirken hata: {e}")
+                        success = False
+                    finally:
+                        self.assigned_category = None
+                    needs_navigation = True
+
+                    with span('db_complete'):
+                        completed = success and complete_category(self.device_token, category['id'])
+                        if not completed:
+                            # Başarısız kategori başka cihazlar (veya sonraki tur) için bırakılır
+                            release_category_lease(self.device_token, category['id'])
+                finally:
+                    finish_run(completed, calls=self._call_report(), device=self.device_id, token=self.device_token)
+
+                if completed:
+                    prefetcher.done(category['id'])
+                    processed += 1
+                    consecutive_failures = 0
+                    print(f"✓ '{category['subCategory']}' tamamlandı")
+                    continue
+
+                failed += 1
+                consecutive_failures += 1
+                prefetcher.done(category['id'], failed=True)
+                if consecutive_failures >= max_consecutive_failures:
+                    print(f"✗ Art arda {consecutive_failures} kategori işlenemedi, daemon durduruluyor")
+                    break
+        finally:
+            # Önce kullanılmayan kategoriler bırakılır, sonra heartbeat durdurulur
+            if prefetcher is not None:
+                prefetcher.stop()
+            if heartbeat is not None:
+                heartbeat.stop()
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+            close_db_pool()
+
+        print("\n" + "=" * 50)
+        print(f"✓ {processed} kategori tamamlandı, ✗ {failed} kategori başarısız ({iterations} tur)")
+        print("=" * 50)
+        return not claim_failed and consecutive_failures < max_consecutive_failures
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Kategori metin sınıflandırıcı modülü - ekrandaki metinleri tek geçişte etiketler
+"""
+
+import re
+from functools import lru_cache
+
+
+# Etiketler
+LABEL_CATEGORY = 'category'   # Marka/kategori ismi
+LABEL_SYSTEM = 'system'       # Sistem mesajı (saat, pil, wifi, ...)
+LABEL_EXCLUDED = 'excluded'   # UI elementi (geri, filtre, tüm, ...)
+LABEL_HEADER = 'header'       # "Navigasyon Cihazı" başlığı
+LABEL_NOISE = 'noise'         # Çok kısa, sadece sayı, saat formatı vb.
+
+# UI elementleri (ekrandan okuma filtresi)
+EXCLUDE_KEYWORDS = [
+    'vasıta', 'kategori', 'ara', 'filtre', 'sırala', 'menü', 'geri', 'ileri',
+    'aç', 'kapat', 'tamam', 'iptal', 'giriş', 'kayıt', 'profil', 'ayarlar',
+    'yardım', 'back', 'home', 'overview', 'seçimi', 'tüm'
+]
+
+# Sistem mesajları
+SYSTEM_MESSAGES = [
+    'wifi', 'signal', 'battery', 'charging', 'percent', 'phone', 'full',
+    'pm', 'am', ':', 'overview'
+]
+
+# "Navigasyon Cihazı" başlığı
+NAVIGATION_KEYWORDS = [
+    'navigasyon cihazı',
+    'navigasyon cihazları',
+    'navigasyon cihazi',
+    'navigasyon cihazlari',
+    'navigation device',
+    'navigation devices'
+]
+
+# Okuma sonrası ikinci filtre (read_categories_from_page)
+CANDIDATE_EXCLUDE_KEYWORDS = [keyword.lower() for keyword in ['Vasıta', 'Kategori seçimi', 'Tüm', 'İlanları']]
+
+
+def _alternation(keywords):
+    return '|'.join(re.escape(keyword) for keyword in keywords)
+
+
+# Tüm anahtar kelime grupları tek bir regex'te: her grup metnin herhangi bir
+# yerinde geçiyorsa ilgili named group dolu olur (küçük harfli metin üzerinde)
+_KEYWORD_RE = re.compile(
+    '^'
+    + ''.join(
+        f'(?=.*?(?P<{name}>{_alternation(keywords)}))?'
+        for name, keywords in (
+            ('system', SYSTEM_MESSAGES),
+            ('excluded', EXCLUDE_KEYWORDS),
+            ('header', NAVIGATION_KEYWORDS),
+            ('candidate_excluded', CANDIDATE_EXCLUDE_KEYWORDS),
+            ('tum', ['tüm']),
+            ('ilan', ['ilan']),
+        )
+    ),
+    re.DOTALL,
+)
+
+
+def _keywords(text_lower):
+    """Küçük harfli metinde geçen anahtar kelime gruplarını döndürür"""
+    return _KEYWORD_RE.match(text_lower)
+
+
+def _is_numeric(text):
+    # Sadece rakam ve nokta içeren text'ler (396.611, (1.234) gibi)
+    return all(c.isdigit() or c in '.,()' for c in text)
+
+
+@lru_cache(maxsize=8192)
+def classify_text(text):
+    """Bir elementin text değerini etiketler (text önceden strip edilmiş olmalı)"""
+    # 1. Çok kısa text'ler (2 karakter veya daha az)
+    if len(text) <= 2:
+        return LABEL_NOISE
+    # 2. Parantez içindeki sayılar
+    if text.startswith('(') and text.endswith(')'):
+        return LABEL_NOISE
+    # 3. Sadece rakam ve nokta
+    if _is_numeric(text):
+        return LABEL_NOISE
+    text_lower = text.lower()
+    # 4. Zaman formatları (7:20, 7:20 PM gibi)
+    if ':' in text and any(c.isdigit() for c in text):
+        if 'pm' in text_lower or 'am' in text_lower or len(text) <= 6:
+            return LABEL_NOISE
+    match = _keywords(text_lower)
+    # 5. Sistem mesajları
+    if match.group('system'):
+        return LABEL_SYSTEM
+    # 6. UI elementleri
+    if match.group('excluded'):
+        return LABEL_EXCLUDED
+    # 7. "Navigasyon Cihazı" başlığı
+    if match.group('header'):
+        return LABEL_HEADER
+    # 8. Sayı içeren text'ler (marka isimleri genellikle sadece harf içerir)
+    if text.replace(' ', '').replace('&', '').replace('-', '').replace("'", '').isdigit():
+        return LABEL_NOISE
+    # 9. En az bir harf içermeli
+    if not any(c.isalpha() for c in text):
+        return LABEL_NOISE
+    return LABEL_CATEGORY
+
+
+@lru_cache(maxsize=8192)
+def classify_content_desc(content_desc):
+    """Bir elementin content-desc değerini etiketler (daha az güvenilir kaynak).
+
+    Başlık kontrolü burada yapılmaz; başlık okuma sonrası filtrede elenir.
+    """
+    if len(content_desc) <= 2 or content_desc.startswith('(') or _is_numeric(content_desc):
+        return LABEL_NOISE
+    if ':' in content_desc:
+        return LABEL_SYSTEM
+    match = _keywords(content_desc.lower())
+    if match.group('system'):
+        return LABEL_SYSTEM
+    if match.group('excluded'):
+        return LABEL_EXCLUDED
+    if not any(c.isalpha() for c in content_desc):
+        return LABEL_NOISE
+    return LABEL_CATEGORY
+
+
+@lru_cache(maxsize=8192)
+def classify_candidate(category):
+    """Ekrandan toplanmış bir kategori adayını son kez etiketler (okuma sonrası filtre)"""
+    category = category.strip()
+    if len(category) <= 2:
+        return LABEL_NOISE
+    match = _keywords(category.lower())
+    # "Tüm 'Otomobil' İlanları" gibi text'ler
+    if match.group('tum') and match.group('ilan'):
+        return LABEL_EXCLUDED
+    if match.group('header'):
+        return LABEL_HEADER
+    if match.group('candidate_excluded'):
+        return LABEL_EXCLUDED
+    if category.replace(' ', '').isdigit():
+        return LABEL_NOISE
+    return LABEL_CATEGORY
+
+
+@lru_cache(maxsize=8192)
+def is_navigation_header(text):
+    """Metnin 'Navigasyon Cihazı' başlığı olup olmadığını döndürür"""
+    return _keywords(text.lower().strip()).group('header') is not None
+
+
+def classify_texts(texts):
+    """Bir ekrandaki text listesini toplu olarak etiketler"""
+    return [classify_text(text) for text in texts]
+
+
+def classify_nodes(nodes):
+    """Bir ekrandaki Node'lardan kategori metinlerini ekran sırasıyla döndürür"""
+    categories = {}
+    for node in nodes:
+        if node.text:
+            # Text'i elenen elementin content-desc'ine de bakılmaz (eski filtrenin davranışı)
+            if classify_text(node.text) != LABEL_CATEGORY:
+                continue
+            categories[node.text] = None
+        if node.content_desc and classify_content_desc(node.content_desc) == LABEL_CATEGORY:
+            categories[node.content_desc] = None
+    return list(categories)
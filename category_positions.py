@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Kategori konum haritası modülü - markaların listedeki yerini yerel dosyada saklar
+"""
+
+import json
+import os
+import threading
+
+from app import SAHIBINDEN_PACKAGE
+from scroll_planner import cached_window_size
+
+
+# Konum haritası dosyası (uygulama sürümü ve ekran boyutuna göre anahtarlanır)
+DEFAULT_CACHE_PATH = '.category_positions.json'
+
+_positions = None  # dosyanın bellekteki kopyası: anahtar -> {kategori: {'ordinal', 'swipes'}}
+_cache_keys = {}   # cihaz -> anahtar (oturum boyunca bir kez hesaplanır)
+_lock = threading.Lock()
+
+
+def _cache_path():
+    return os.getenv('CATEGORY_POSITION_CACHE', DEFAULT_CACHE_PATH)
+
+
+def _read_file():
+    try:
+        with open(_cache_path(), encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def reset_position_cache():
+    """Bellekteki haritayı bırakır; bir sonraki sorguda dosya yeniden okunur"""
+    global _positions
+    with _lock:
+        _positions = None
+
+
+def position_cache_key(d):
+    """Cihaz için harita anahtarını döndürür: '<uygulama sürümü>|<genişlik>x<yükseklik>'"""
+    device_key = getattr(d, 'serial', None) or id(d)
+    if device_key not in _cache_keys:
+        try:
+            version = d.app_info(SAHIBINDEN_PACKAGE).get('versionName') or 'unknown'
+        except Exception:
+            version = 'unknown'
+        try:
+            width, height = cached_window_size(d)
+        except Exception:
+            width, height = 0, 0
+        _cache_keys[device_key] = f"{version}|{width}x{height}"
+    return _cache_keys[device_key]
+
+
+def get_category_position(d, name):
+    """Kategorinin kayıtlı konumunu döndürür ({'ordinal', 'swipes'}; yoksa None)"""
+    global _positions
+    key = position_cache_key(d)
+    with _lock:
+        if _positions is None:
+            _positions = _read_file()
+        return _positions.get(key, {}).get(name)
+
+
+def save_category_positions(d, positions):
+    """Kategori konumlarını ({kategori: {'ordinal', 'swipes'}}) haritaya ekler ve dosyaya yazar"""
+    global _positions
+    if not positions:
+        return False
+    key = position_cache_key(d)
+    with _lock:
+        # Diğer süreçlerin yazdıkları kaybolmasın diye dosya yeniden okunup birleştirilir
+        data = _read_file()
+        data.setdefault(key, {}).update(positions)
+        _positions = data
+        path = _cache_path()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+            return True
+        except OSError as e:
+            print(f"  ⚠️  Kategori konum haritası yazılamadı: {e}")
+            return False
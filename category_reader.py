@@ -4,6 +4,14 @@ Kategori okuma modülü - Vasıta sayfasındaki kategorileri okur
 """
 
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+from category_classifier import LABEL_CATEGORY, classify_candidate, classify_nodes, is_navigation_header
+from category_positions import save_category_positions
+from hierarchy_parser import parse_bounds
+from screen_snapshot import ScreenSnapshot
+from scroll_planner import ListEndDetector, ScrollPlanner
+from timing import get_timing_policy
 
 # Öncelikli kategoriler (markalar) - case-insensitive
 PRIORITY_CATEGORIES = [
@@ -13,152 +21,165 @@ PRIORITY_CATEGORIES = [
 ]
 
 
-def read_categories_from_page(d):
+def read_categories_from_page(d, timing=None):
     """Vasıta sayfasındaki tüm kategorileri okur"""
     print("\n--- Kategoriler Okunuyor ---")
+    timing = timing or get_timing_policy(d)
     try:
-        # Sayfanın yüklenmesi için bekle
-        time.sleep(3)
-        
         categories = []
+        swipes_by_category = {}  # Kategori -> ilk görüldüğü ekrana kadar yapılan swipe sayısı
         
         # Çeşitli yöntemlerle kategorileri bulmaya çalış
         
         # 1. Resource ID ile kategori listesi bulmaya çalış
         # Sahibinden uygulamasında kategoriler genellikle RecyclerView veya ListView içinde olur
         try:
-            # XML dump alarak kategorileri bulabiliriz
-            xml = d.dump_hierarchy()
-            
-            # Text içeren tüm elementleri al
-            all_elements = d.dump_hierarchy()
-            
-            # Kategoriler genellikle TextView veya clickable elementler olur
-            # Farklı selector'ları dene
-            
-            # Text ile kategori isimlerini bul
-            # Kategori isimleri genellikle belirli bir pattern'e sahiptir
-            # Örnek: "Otomobil", "Motosiklet", "Minivan", vb.
-            
-            # Scroll edilebilir bir liste varsa, scroll yaparak tüm kategorileri oku
-            # Önce scroll edilebilir container'ı bul
-            
-            # UIAutomator2 ile tüm text elementlerini al
-            # Ancak bu çok fazla element döndürebilir, filtreleme gerekir
-            
-            # Daha spesifik bir yaklaşım: Kategori listesi genellikle belirli bir resource ID'ye sahiptir
-            # veya belirli bir class'a sahiptir
-            
-            # Basit yaklaşım: Ekrandaki tüm text'leri al ve filtrele
-            # Ancak bu çok fazla noise içerebilir
-            
             # Daha iyi yaklaşım: Scroll yaparak tüm kategorileri topla
             print("  Kategoriler scroll edilerek okunuyor...")
             
+            # Ekran durumu başına tek dump - tüm kontroller aynı parse üzerinden yapılır
+            # Sayfanın yüklenmesi için UI sakinleşene kadar bekle
+            snapshot = ScreenSnapshot(d, timing=timing).settle('list_load')
+            
             # Scroll edilebilir container bul
             scrollable = d(scrollable=True)
-            if scrollable.exists(timeout=2):
+            if scrollable.exists(timeout=timing.seconds('element_timeout')):
                 print("  ✓ Scroll edilebilir container bulundu")
                 
                 # İlk okuma - başlangıç kategorileri
                 print("  → İlk okuma yapılıyor...")
                 
                 # İlk okumada "Navigasyon Cihazı" kontrolü
-                if check_navigation_device_header(d):
+                if snapshot.has_navigation_header():
                     print("  → 'Navigasyon Cihazı' zaten görünüyor, kategori okunmayacak")
                     return []
                 
-                current_categories = extract_categories_from_screen(d)
+                current_categories = snapshot.category_texts()
                 # "Navigasyon Cihazı" başlığını filtrele
                 current_categories = {cat for cat in current_categories 
                                    if not is_navigation_device_header(cat)}
                 
-                for cat in current_categories:
+                for cat in _screen_order(snapshot, current_categories):
                     categories.append(cat)
+                    swipes_by_category[cat] = 0
                     print(f"  ✓ Kategori bulundu: {cat}")
                 
                 previous_categories = set(current_categories)
                 scroll_attempts = 0
                 no_new_categories_count = 0
-                max_no_new_categories = 3  # 3 kez üst üste yeni kategori yoksa dur
+                max_no_new_categories = 3  # 3 kez üst üste yeni kategori yoksa dur (ekranı sürekli değişen listeler için)
                 max_scrolls = 100  # Maksimum scroll sayısı (güvenlik için)
                 
                 print(f"  → Scroll başlatılıyor (maksimum {max_scrolls} scroll)...")
+                planner = ScrollPlanner(d)
+                planner.observe(snapshot)
+                end_detector = ListEndDetector()
+                end_detector.update(snapshot)
+                timings = {'swipe': 0.0, 'settle': 0.0, 'parse': 0.0, 'parse_wait': 0.0}
                 
-                while scroll_attempts < max_scrolls:
-                    # "Navigasyon Cihazı" başlığına gelip gelmediğini kontrol et
-                    if check_navigation_device_header(d):
-                        print("  → 'Navigasyon Cihazı' görüldü, okuma durduruluyor")
-                        break
-                    
-                    # Smooth scroll için swipe kullan (ekranın ortasından aşağı doğru)
-                    # Bu şekilde elementlere tıklamadan sadece scroll yapar
+                # Pipeline: N. ekran worker thread'de parse edilip sınıflandırılırken N+1. ekran için
+                # swipe yapılır. Sonuçlar ekran sırasıyla işlendiği için kategori sırası değişmez.
+                # Ekran liste sonu olabilirse (ham XML'de başlık metni geçiyor ya da dump bir
+                # öncekiyle aynı) swipe sonuç görülene kadar ertelenir, boşa swipe yapılmaz.
+                def swipe():
+                    started = timing.now()
                     try:
-                        # Ekran boyutlarını al
-                        width, height = d.window_size()
-                        center_x = width // 2
-                        start_y = int(height * 0.6)  # Ekranın %60'ından başla
-                        end_y = int(height * 0.3)    # Ekranın %30'una kadar swipe yap
-                        
-                        # Smooth swipe (duration uzun olursa daha smooth)
-                        d.swipe(center_x, start_y, center_x, end_y, duration=0.5)
+                        # Satır atlamayan en uzun swipe - snapshot otomatik olarak geçersiz olur
+                        planner.perform(snapshot)
                     except Exception as e:
                         # Swipe başarısız olursa fallback olarak scroll kullan
+                        snapshot.invalidate()
                         try:
                             scrollable.scroll.vert.forward(steps=1)
                         except:
                             pass
-                    
-                    time.sleep(1.5)  # Scroll sonrası bekleme süresi
-                    
-                    # Scroll sonrası tekrar kontrol et
-                    if check_navigation_device_header(d):
-                        print("  → 'Navigasyon Cihazı' görüldü, okuma durduruluyor")
-                        break
-                    
-                    # Mevcut ekrandaki kategorileri oku
-                    current_categories = extract_categories_from_screen(d)
-                    
-                    # "Navigasyon Cihazı" başlığını kategorilerden çıkar
-                    current_categories = {cat for cat in current_categories 
-                                        if not is_navigation_device_header(cat)}
-                    
-                    # Yeni kategorileri bul
-                    new_categories = current_categories - previous_categories
-                    
-                    if new_categories:
-                        # Yeni kategori var
-                        no_new_categories_count = 0
-                        for cat in new_categories:
-                            # "Navigasyon Cihazı" başlığını ekleme
-                            if not is_navigation_device_header(cat):
+                    timings['swipe'] += timing.now() - started
+                
+                with ThreadPoolExecutor(max_workers=1, thread_name_prefix='category-parse') as executor:
+                    pending = None  # (future, ekran, ekrana kadar yapılan swipe sayısı)
+                    previous_screen = snapshot.freeze()
+                    while True:
+                        can_swipe = scroll_attempts < max_scrolls
+                        speculate = can_swipe and (pending is None or not (
+                            pending[1].raw_contains('navigasyon') or pending[1].same_dump(previous_screen)
+                        ))
+                        if speculate:
+                            swipe()
+                        
+                        # Önceki ekranın sonucu (swipe sürerken hazırlandı) sırayla işlenir
+                        if pending is not None:
+                            future, screen, screen_swipes = pending
+                            pending = None
+                            started = time.monotonic()
+                            has_header, screen_categories, parse_time = future.result()
+                            timings['parse_wait'] += time.monotonic() - started
+                            timings['parse'] += parse_time
+                            
+                            new_categories = [cat for cat in screen_categories if cat not in previous_categories]
+                            for cat in new_categories:
                                 categories.append(cat)
+                                swipes_by_category[cat] = screen_swipes
                                 print(f"  ✓ Kategori bulundu: {cat}")
-                        previous_categories.update(current_categories)
-                    else:
-                        # Yeni kategori yok
-                        no_new_categories_count += 1
-                        print(f"  ⊙ Yeni kategori bulunamadı ({no_new_categories_count}/{max_no_new_categories})")
+                            previous_categories.update(screen_categories)
+                            
+                            if has_header:
+                                print("  → 'Navigasyon Cihazı' görüldü, okuma durduruluyor")
+                                break
+                            
+                            if new_categories:
+                                no_new_categories_count = 0
+                            else:
+                                # Yeni kategori yok
+                                no_new_categories_count += 1
+                                print(f"  ⊙ Yeni kategori bulunamadı ({no_new_categories_count}/{max_no_new_categories})")
+                                
+                                # Eğer birkaç kez üst üste yeni kategori yoksa, sayfa sonuna gelmiş olabiliriz
+                                if no_new_categories_count >= max_no_new_categories:
+                                    print("  → Sayfa sonuna gelindi (yeni kategori yok)")
+                                    break
+                            
+                            # Swipe listeyi kaydırmadıysa sayfa sonundayız
+                            if end_detector.update(screen):
+                                print("  → Sayfa sonuna gelindi (liste kaymadı)")
+                                break
+                            
+                            # Satır atlandıysa mesafe kısaltılır, sonraki swipe bu ekrana göre planlanır
+                            planner.observe(screen)
+                            previous_screen = screen
                         
-                        # Eğer birkaç kez üst üste yeni kategori yoksa, sayfa sonuna gelmiş olabiliriz
-                        if no_new_categories_count >= max_no_new_categories:
-                            print("  → Sayfa sonuna gelindi (yeni kategori yok)")
+                        if not can_swipe:
                             break
-                    
-                    scroll_attempts += 1
-                    
-                    # Her 10 scroll'da bir ilerleme göster
-                    if scroll_attempts % 10 == 0:
-                        print(f"  → İlerleme: {scroll_attempts} scroll, {len(categories)} kategori bulundu")
+                        if not speculate:
+                            swipe()
+                        
+                        # Scroll sonrası liste sakinleşene kadar bekle (son dump snapshot'a aktarılır)
+                        started = timing.now()
+                        snapshot.settle('post_swipe')
+                        timings['settle'] += timing.now() - started
+                        scroll_attempts += 1
+                        
+                        # Ekran kopyası worker'a verilir, asıl snapshot sonraki swipe için serbest kalır
+                        screen = snapshot.freeze()
+                        pending = (executor.submit(_analyse_screen, screen), screen, scroll_attempts)
+                        
+                        # Her 10 scroll'da bir ilerleme göster
+                        if scroll_attempts % 10 == 0:
+                            print(f"  → İlerleme: {scroll_attempts} scroll, {len(categories)} kategori bulundu")
                 
                 if scroll_attempts >= max_scrolls:
                     print(f"  ⚠️  Maksimum scroll sayısına ulaşıldı ({max_scrolls})")
                 
+                # Parse süresinin beklenmeyen kısmı swipe ile örtüşmüştür
+                print(
+                    f"  ⊙ Süreler: swipe {timings['swipe']:.2f}s, bekleme {timings['settle']:.2f}s, "
+                    f"parse {timings['parse']:.2f}s (swipe ile örtüşen "
+                    f"{max(0.0, timings['parse'] - timings['parse_wait']):.2f}s)"
+                )
                 print(f"  ✓ Toplam {len(categories)} kategori bulundu ({scroll_attempts} scroll yapıldı)")
             else:
                 # Scroll edilebilir container yoksa, direkt ekrandaki kategorileri oku
                 print("  ⊙ Scroll edilebilir container bulunamadı, ekrandaki kategoriler okunuyor...")
-                categories = list(extract_categories_from_screen(d))
+                categories = list(snapshot.category_texts())
                 print(f"  ✓ {len(categories)} kategori bulundu")
             
         except Exception as e:
@@ -169,27 +190,11 @@ def read_categories_from_page(d):
         # Kategorileri temizle ve filtrele (extract_categories_from_screen zaten filtreleme yapıyor)
         # Ekstra temizlik için
         filtered_categories = []
-        exclude_keywords = ['Vasıta', 'Kategori seçimi', 'Tüm', 'İlanları']
         
         for cat in categories:
-            cat = cat.strip()
-            if cat and len(cat) > 2:  # En az 3 karakter
-                cat_lower = cat.lower()
-                
-                # Ekstra filtreleme
-                # "Tüm 'Otomobil' İlanları" gibi text'leri atla
-                if 'tüm' in cat_lower and 'ilan' in cat_lower:
-                    continue
-                
-                # "Navigasyon Cihazı" başlığını atla
-                if is_navigation_device_header(cat):
-                    continue
-                
-                # Exclude keywords içermiyorsa ekle
-                if not any(keyword.lower() in cat_lower for keyword in exclude_keywords):
-                    # Sadece sayı değilse ekle
-                    if not cat.replace(' ', '').isdigit():
-                        filtered_categories.append(cat)
+            # Tek geçişte: kısa text, "Tüm ... İlanları", "Navigasyon Cihazı", exclude keywords, sayı
+            if classify_candidate(cat) == LABEL_CATEGORY:
+                filtered_categories.append(cat.strip())
         
         # Duplicate'leri kaldır ama sırayı koru
         seen = set()
@@ -199,6 +204,13 @@ def read_categories_from_page(d):
                 seen.add(cat)
                 unique_categories.append(cat)
         
+        # Listedeki sıra ve swipe sayısı konum haritasına kaydedilir (click_category doğrudan atlar)
+        save_category_positions(d, {
+            cat: {'ordinal': ordinal, 'swipes': swipes_by_category[cat]}
+            for ordinal, cat in enumerate(unique_categories)
+            if cat in swipes_by_category
+        })
+        
         # Kategorileri öncelik sırasına göre sırala
         sorted_categories = sort_categories_by_priority(unique_categories)
         
@@ -214,114 +226,76 @@ def read_categories_from_page(d):
 
 def extract_categories_from_screen(d):
     """Ekrandaki kategorileri çıkarır - sadece marka/kategori isimlerini"""
-    categories = set()
-    
-    try:
-        # XML hierarchy'yi al ve parse et
-        xml_content = d.dump_hierarchy()
-        
-        # XML'i parse etmek için lxml kullanabiliriz
-        from lxml import etree
-        
-        # XML string'i parse et
-        try:
-            root = etree.fromstring(xml_content.encode('utf-8'))
-        except:
-            # Eğer encoding sorunu varsa, direkt string olarak dene
-            root = etree.fromstring(xml_content)
-        
-        # Filtreleme için exclude listeleri
-        exclude_keywords = [
-            'vasıta', 'kategori', 'ara', 'filtre', 'sırala', 'menü', 'geri', 'ileri',
-            'aç', 'kapat', 'tamam', 'iptal', 'giriş', 'kayıt', 'profil', 'ayarlar',
-            'yardım', 'back', 'home', 'overview', 'seçimi', 'tüm'
-        ]
-        
-        # Sistem mesajları
-        system_messages = [
-            'wifi', 'signal', 'battery', 'charging', 'percent', 'phone', 'full',
-            'pm', 'am', ':', 'overview'
-        ]
-        
-        # Tüm elementleri gez
-        for elem in root.iter():
-            attrib = elem.attrib
-            text = attrib.get('text', '').strip()
-            content_desc = attrib.get('content-desc', '').strip()
-            resource_id = attrib.get('resource-id', '').lower()
-            clickable = attrib.get('clickable', 'false').lower() == 'true'
-            class_name = attrib.get('class', '').lower()
-            
-            # Text'i kontrol et
-            if text:
-                text_lower = text.lower()
-                
-                # 1. Çok kısa text'leri atla (2 karakter veya daha az)
-                if len(text) <= 2:
-                    continue
-                
-                # 2. Sadece sayı içeren text'leri atla (parantez içindeki sayılar)
-                if text.startswith('(') and text.endswith(')'):
-                    continue
-                
-                # 3. Sadece rakam ve nokta içeren text'leri atla (396.611 gibi)
-                if all(c.isdigit() or c in '.,()' for c in text):
-                    continue
-                
-                # 4. Zaman formatlarını atla (7:20, 7:20 PM gibi)
-                if ':' in text and any(c.isdigit() for c in text):
-                    if 'pm' in text_lower or 'am' in text_lower or len(text) <= 6:
-                        continue
-                
-                # 5. Sistem mesajlarını atla
-                if any(msg in text_lower for msg in system_messages):
-                    continue
-                
-                # 6. UI elementlerini atla
-                if any(exclude in text_lower for exclude in exclude_keywords):
-                    continue
-                
-                # 7. "Navigasyon Cihazı" başlığını atla
-                if is_navigation_device_header(text):
-                    continue
-                
-                # 7. Sadece harf, boşluk ve bazı özel karakterler içermeli (marka isimleri için)
-                # Sayı içermemeli (marka isimleri genellikle sadece harf içerir)
-                if text.replace(' ', '').replace('&', '').replace('-', '').replace("'", '').isdigit():
-                    continue
-                
-                # 8. En az bir harf içermeli
-                if not any(c.isalpha() for c in text):
-                    continue
-                
-                # 9. Resource ID'de "item", "row", "category" gibi kelimeler varsa daha güvenilir
-                # Ama zorunlu değil, çünkü bazı uygulamalarda farklı olabilir
-                
-                # Kategori olarak ekle
-                categories.add(text)
-            
-            # Content description'dan da kategori bulabiliriz (daha az güvenilir)
-            if content_desc and len(content_desc) > 2:
-                content_desc_lower = content_desc.lower()
-                
-                # Aynı filtrelemeleri uygula
-                if (not content_desc.startswith('(') and 
-                    not all(c.isdigit() or c in '.,()' for c in content_desc) and
-                    ':' not in content_desc and
-                    not any(msg in content_desc_lower for msg in system_messages) and
-                    not any(exclude in content_desc_lower for exclude in exclude_keywords) and
-                    any(c.isalpha() for c in content_desc)):
-                    categories.add(content_desc)
-        
-    except Exception as e:
-        print(f"  ⚠️  XML parse sırasında hata: {e}")
-        # Fallback: Basit text extraction
-        try:
-            print("  ⊙ XML parse başarısız, alternatif yöntem deneniyor...")
-        except:
-            pass
-    
-    return categories
+    return ScreenSnapshot(d).category_texts()
+
+
+def _screen_order(snapshot, categories):
+    """Kategorileri ekranda göründükleri sıraya göre döndürür"""
+    order = {text: index for index, text in enumerate(classify_nodes(snapshot.nodes()))}
+    return sorted(categories, key=lambda cat: order.get(cat, len(order)))
+
+
+def _analyse_screen(screen):
+    """Ekranı parse edip sınıflandırır: (başlık var mı, ekran sırasıyla kategoriler, süre).
+
+    Pipeline'da worker thread'de, sonraki swipe sürerken çalışır.
+    """
+    started = time.monotonic()  # Host CPU süresi (sanal saatte de gerçek süre ölçülür)
+    if screen.has_navigation_header():
+        # Başlığın üstünde kalan markalar bu ekranda okunur (uzun swipe'ta birkaç tane olabilir)
+        return True, _categories_above_header(screen), time.monotonic() - started
+    screen_categories = [cat for cat in _screen_order(screen, screen.category_texts())
+                         if not is_navigation_device_header(cat)]
+    return False, screen_categories, time.monotonic() - started
+
+
+def _categories_above_header(snapshot):
+    """'Navigasyon Cihazı' başlığından önce gelen kategorileri ekran sırasıyla döndürür"""
+    category_texts = snapshot.category_texts()
+    above = []
+    for node in snapshot.nodes():
+        if is_navigation_device_header(node.text or '') or is_navigation_device_header(node.content_desc or ''):
+            break
+        if node.text in category_texts and node.text not in above:
+            above.append(node.text)
+    return above
+
+
+def categories_from_nodes(nodes):
+    """Parse edilmiş Node'lardan kategori isimlerini çıkarır.
+
+    Kategori listesi scroll edilebilir bir alansa sadece onun içindeki
+    elementler okunur (başlık çubuğundaki sayfa adı kategori sayılmaz).
+    """
+    return set(classify_nodes(list_nodes(nodes)))
+
+
+def list_nodes(nodes):
+    """Kategori listesinin içindeki Node'ları döndürür.
+
+    Liste, içinde en çok kategori metni bulunan scroll edilebilir alandır
+    (en büyük alan her zaman marka listesi olmayabilir). Scroll edilebilir
+    alan yoksa ya da hiçbirinde kategori yoksa tüm Node'lar döndürülür.
+    """
+    best, best_count = nodes, 0
+    rects = None
+    for container in nodes:
+        if not container.scrollable:
+            continue
+        area = parse_bounds(container.bounds)
+        if not area:
+            continue
+        if rects is None:
+            rects = [parse_bounds(node.bounds) for node in nodes]
+        inside = [node for node, rect in zip(nodes, rects) if rect and _contains(area, rect)]
+        found = len(classify_nodes(inside))
+        if found > best_count:
+            best, best_count = inside, found
+    return best
+
+
+def _contains(area, rect):
+    return area[0] <= rect[0] and rect[2] <= area[2] and area[1] <= rect[1] and rect[3] <= area[3]
 
 
 def is_priority_category(category):
@@ -349,48 +323,15 @@ def sort_categories_by_priority(categories):
 
 def is_navigation_device_header(text):
     """Text'in 'Navigasyon Cihazı' veya 'Navigasyon Cihazları' olup olmadığını kontrol eder"""
-    text_lower = text.lower().strip()
-    navigation_keywords = [
-        'navigasyon cihazı', 
-        'navigasyon cihazları', 
-        'navigasyon cihazi',
-        'navigasyon cihazlari',
-        'navigation device',
-        'navigation devices'
-    ]
-    return any(keyword in text_lower for keyword in navigation_keywords)
+    return is_navigation_header(text)
 
 
 def check_navigation_device_header(d):
     """Ekranda 'Navigasyon Cihazı' veya 'Navigasyon Cihazları' olup olmadığını kontrol eder"""
-    try:
-        # XML dump al ve kontrol et
-        xml_content = d.dump_hierarchy()
-        from lxml import etree
-        
-        try:
-            root = etree.fromstring(xml_content.encode('utf-8'))
-        except:
-            root = etree.fromstring(xml_content)
-        
-        # Tüm text'leri kontrol et
-        for elem in root.iter():
-            attrib = elem.attrib
-            text = attrib.get('text', '').strip()
-            content_desc = attrib.get('content-desc', '').strip()
-            
-            if text and is_navigation_device_header(text):
-                return True
-            if content_desc and is_navigation_device_header(content_desc):
-                return True
-        
-        return False
-    except Exception as e:
-        # Hata durumunda False döndür (güvenli taraf)
-        return False
+    return ScreenSnapshot(d).has_navigation_header()
 
 
-def read_vasita_categories(d):
+def read_vasita_categories(d, timing=None):
     """Vasıta sayfasındaki kategorileri okur ve döndürür"""
-    return read_categories_from_page(d)
+    return read_categories_from_page(d, timing=timing)
 
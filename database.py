@@ -4,41 +4,199 @@ PostgreSQL veritabanı bağlantı ve migration modülü
 """
 
 import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
 import psycopg2
+import psycopg2.errors
+from psycopg2 import pool as pg_pool
 from psycopg2 import sql
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN
+from psycopg2.extensions import connection as pg_connection, cursor as pg_cursor
+from psycopg2.extras import execute_values
 from dotenv import load_dotenv
 
+from instrumentation import count
+
 # .env dosyasını yükle
 load_dotenv()
 
 
+def _db_config():
+    """Ortam değişkenlerinden bağlantı parametrelerini okur"""
+    return dict(
+        host=os.getenv('DB_HOST', '45.147.47.18'),
+        port=os.getenv('DB_PORT', '6432'),
+        database=os.getenv('DB_NAME', 'instant-cash'),
+        user=os.getenv('DB_USER', 'instant-cash'),
+        password=os.getenv('DB_PASSWORD', 'E3PsdnJ71n5J2If7sI11Rg9z')
+    )
+
+
+class _CountingCursor(pg_cursor):
+    """Her sorguyu instrumentation'da veritabanı gidiş-dönüşü olarak sayar"""
+
+    def execute(self, query, vars=None):
+        count('db_roundtrips')
+        return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        count('db_roundtrips')
+        return super().executemany(query, vars_list)
+
+
+class _CountingConnection(pg_connection):
+    """commit/rollback çağrılarını veritabanı gidiş-dönüşü olarak sayar"""
+
+    # Havuz bağlantıları: alındığı (havuz, semafor) ve havuza son iade zamanı (monotonic)
+    pool_owner = None
+    last_used = None
+
+    def commit(self):
+        count('db_roundtrips')
+        return super().commit()
+
+    def rollback(self):
+        count('db_roundtrips')
+        return super().rollback()
+
+
+# Tüm bağlantılar gidiş-dönüşleri sayan sınıflarla açılır
+_CONNECTION_FACTORIES = dict(connection_factory=_CountingConnection, cursor_factory=_CountingCursor)
+
+
 def get_db_connection():
-    """PostgreSQL veritabanı bağlantısı oluşturur"""
+    """PostgreSQL veritabanı bağlantısı oluşturur (havuz dışı, tek seferlik)"""
     try:
-        conn = psycopg2.connect(
-            host=os.getenv('DB_HOST', '45.147.47.18'),
-            port=os.getenv('DB_PORT', '6432'),
-            database=os.getenv('DB_NAME', 'instant-cash'),
-            user=os.getenv('DB_USER', 'instant-cash'),
-            password=os.getenv('DB_PASSWORD', 'E3PsdnJ71n5J2If7sI11Rg9z')
-        )
+        conn = psycopg2.connect(**_db_config(), **_CONNECTION_FACTORIES)
         return conn
     except Exception as e:
         print(f"✗ Veritabanı bağlantısı kurulamadı: {e}")
         return None
 
 
-def run_migration():
-    """Veritabanı tablosunu oluşturur (migration)"""
-    conn = get_db_connection()
-    if not conn:
+# Bağlantı havuzu (modül seviyesinde, thread-safe)
+_pool = None
+_pool_slots = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """Bağlantı havuzunu ilk ihtiyaçta oluşturur; (havuz, semafor) döndürür"""
+    global _pool, _pool_slots
+    with _pool_lock:
+        if _pool is None:
+            min_size = int(os.getenv('DB_POOL_MIN', '1'))
+            max_size = int(os.getenv('DB_POOL_MAX', '5'))
+            _pool = pg_pool.ThreadedConnectionPool(min_size, max_size, **_db_config(), **_CONNECTION_FACTORIES)
+            # ThreadedConnectionPool dolunca hata verir; semafor ile boş bağlantı beklenir
+            _pool_slots = threading.BoundedSemaphore(max_size)
+        return _pool, _pool_slots
+
+
+def _is_healthy(conn):
+    """Havuzdan alınan bağlantının kullanılabilir olup olmadığını kontrol eder"""
+    if conn.closed:
         return False
+    if conn.get_transaction_status() == TRANSACTION_STATUS_UNKNOWN:
+        return False
+    # Uzun süre boşta kalan bağlantılar (pgbouncer/sunucu tarafından kapatılmış olabilir) sorgu ile doğrulanır
+    idle_limit = float(os.getenv('DB_POOL_HEALTHCHECK_INTERVAL', '30'))
+    last_used = conn.last_used
+    if last_used is not None and time.monotonic() - last_used > idle_limit:
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            conn.rollback()
+        except Exception:
+            return False
+    return True
+
+
+def _checkout():
+    """Havuzdan sağlıklı bir bağlantı alır (bağlantı kurulamazsa None)"""
+    try:
+        db_pool, slots = _get_pool()
+    except Exception as e:
+        print(f"✗ Veritabanı bağlantısı kurulamadı: {e}")
+        return None
     
+    slots.acquire()
     try:
-        cursor = conn.cursor()
-        
-        # Tablo oluştur
-        create_table_query = """
+        # Bozuk bağlantılar kapatılıp yenisi istenir
+        for _ in range(3):
+            conn = db_pool.getconn()
+            if _is_healthy(conn):
+                # İade, havuz bu arada kapatılıp yeniden kurulsa da alındığı havuza yapılır
+                conn.pool_owner = (db_pool, slots)
+                return conn
+            db_pool.putconn(conn, close=True)
+        raise psycopg2.OperationalError("Sağlıklı bağlantı alınamadı")
+    except Exception as e:
+        slots.release()
+        print(f"✗ Veritabanı bağlantısı kurulamadı: {e}")
+        return None
+
+
+def _checkin(conn):
+    """Bağlantıyı havuza iade eder (yarım kalan transaction geri alınır)"""
+    broken = conn.closed != 0
+    if not broken and conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+        try:
+            conn.rollback()
+        except Exception:
+            broken = True
+    conn.last_used = None if broken else time.monotonic()
+    db_pool, slots = conn.pool_owner
+    conn.pool_owner = None
+    try:
+        # close_db_pool() bağlantı kullanımdayken çalıştıysa havuz kapalıdır; bağlantı sadece kapatılır
+        if db_pool.closed:
+            conn.close()
+        else:
+            db_pool.putconn(conn, close=broken)
+    except pg_pool.PoolError:
+        conn.close()
+    finally:
+        slots.release()
+
+
+@contextmanager
+def db_connection():
+    """Havuzdan bir bağlantı verir ve blok sonunda havuza iade eder.
+
+    Bağlantı kurulamazsa None verilir:
+
+        with db_connection() as conn:
+            if not conn:
+                return False
+    """
+    conn = _checkout()
+    try:
+        yield conn
+    finally:
+        if conn is not None:
+            _checkin(conn)
+
+
+def close_db_pool():
+    """Havuzdaki tüm bağlantıları kapatır"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+
+# Şema migration'ları: (versiyon, açıklama, SQL listesi)
+# Yeni migration'lar her zaman listenin sonuna, bir sonraki versiyon numarasıyla eklenir.
+# SQL'ler %(lease_seconds)s parametresini kullanabilir (CATEGORY_LEASE_SECONDS)
+MIGRATIONS = [
+    (1, "categories tablosu", [
+        """
         CREATE TABLE IF NOT EXISTS categories (
             id SERIAL PRIMARY KEY,
             parentCategory VARCHAR(255) NOT NULL,
@@ -50,173 +208,226 @@ def run_migration():
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             UNIQUE(parentCategory, subCategory, deviceId)
-        );
+        )
+        """,
+        # Tablo eski sürümden kalmışsa order kolonunu ekle
+        'ALTER TABLE categories ADD COLUMN IF NOT EXISTS "order" INTEGER DEFAULT 1',
+    ]),
+    (2, "kategori lease kolonu", [
+        # Kategori sahipliği için lease kolonu (süresi dolan kategoriler tekrar alınabilir)
+        "ALTER TABLE categories ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE",
+        # Çalışan cihazların elindeki kategoriler migration anından itibaren tam bir lease alır;
+        # aksi halde deploy sonrası başka bir cihaz bunları hemen alabilirdi
         """
-        
-        cursor.execute(create_table_query)
-        
-        # Eğer tablo zaten varsa, order kolonunu ekle (migration)
-        try:
-            cursor.execute("""
-                ALTER TABLE categories 
-                ADD COLUMN IF NOT EXISTS "order" INTEGER DEFAULT 1;
-            """)
-        except Exception as e:
-            # Kolon zaten varsa hata vermez, devam et
-            pass
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
-        print("✓ Veritabanı tablosu oluşturuldu/kontrol edildi")
-        return True
-        
-    except Exception as e:
-        print(f"✗ Migration sırasında hata: {e}")
-        if conn:
-            conn.rollback()
-            conn.close()
-        return False
+        UPDATE categories
+        SET lease_expires_at = CURRENT_TIMESTAMP + make_interval(secs => %(lease_seconds)s)
+        WHERE isCompleted = FALSE AND deviceId <> '' AND lease_expires_at IS NULL
+        """,
+    ]),
+    (3, "kategori claim index'leri", [
+        # Cihazın kendi bitmemiş kategorisi
+        """
+        CREATE INDEX IF NOT EXISTS idx_categories_device_open
+        ON categories (deviceId, "order", id)
+        WHERE isCompleted = FALSE
+        """,
+        # Sahipsiz bekleyen kategoriler
+        """
+        CREATE INDEX IF NOT EXISTS idx_categories_pending
+        ON categories ("order", id)
+        WHERE isCompleted = FALSE AND (deviceId IS NULL OR deviceId = '')
+        """,
+        # Lease süresi dolmuş sahipli kategoriler
+        """
+        CREATE INDEX IF NOT EXISTS idx_categories_leased
+        ON categories ("order", id)
+        WHERE isCompleted = FALSE AND deviceId <> ''
+        """,
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Aynı anda başlayan botların migration'ları aynı anda uygulamasını engeller
+MIGRATION_LOCK_ID = 7310524
 
 
-def category_exists(conn, parent_category, sub_category, device_id):
-    """Kategori kaydının var olup olmadığını kontrol eder (deviceId NULL olabilir)"""
+def _current_schema_version(conn):
+    """Veritabanındaki şema versiyonunu döndürür (schema_migrations yoksa 0)"""
+    cursor = conn.cursor()
     try:
-        cursor = conn.cursor()
-        # deviceId NULL ise veya boş string ise, NULL olarak kontrol et
-        if not device_id or device_id.strip() == '':
-            cursor.execute(
-                "SELECT id FROM categories WHERE parentCategory = %s AND subCategory = %s AND (deviceId IS NULL OR deviceId = '')",
-                (parent_category, sub_category)
-            )
-        else:
-            cursor.execute(
-                "SELECT id FROM categories WHERE parentCategory = %s AND subCategory = %s AND deviceId = %s",
-                (parent_category, sub_category, device_id)
-            )
-        result = cursor.fetchone()
+        cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+        return cursor.fetchone()[0]
+    except psycopg2.errors.UndefinedTable:
+        conn.rollback()
+        return 0
+    finally:
         cursor.close()
-        return result is not None
-    except Exception as e:
-        print(f"✗ Kategori kontrolü sırasında hata: {e}")
-        return False
 
 
-def insert_category(conn, parent_category, sub_category, page, device_id, is_completed=False, order=1):
-    """Yeni kategori kaydı ekler"""
-    try:
-        cursor = conn.cursor()
-        # deviceId boş string ise NULL yap
-        device_id_value = None if (not device_id or device_id.strip() == '') else device_id
+def run_migration():
+    """Veritabanı şemasını günceller (şema güncelse tek bir versiyon sorgusu yapar)"""
+    with db_connection() as conn:
+        if not conn:
+            return False
         
-        cursor.execute(
-            """
-            INSERT INTO categories (parentCategory, subCategory, page, deviceId, isCompleted, "order")
-            VALUES (%s, %s, %s, %s, %s, %s)
-            ON CONFLICT (parentCategory, subCategory, deviceId) 
-            DO UPDATE SET 
-                page = EXCLUDED.page,
-                isCompleted = EXCLUDED.isCompleted,
-                "order" = EXCLUDED."order",
-                updated_at = CURRENT_TIMESTAMP
-            """,
-            (parent_category, sub_category, page, device_id_value, is_completed, order)
-        )
-        conn.commit()
-        cursor.close()
-        return True
-    except Exception as e:
-        print(f"✗ Kategori ekleme sırasında hata: {e}")
-        conn.rollback()
-        return False
+        try:
+            current_version = _current_schema_version(conn)
+            conn.commit()
+            if current_version >= SCHEMA_VERSION:
+                print(f"✓ Veritabanı şeması güncel (v{current_version})")
+                return True
+            
+            cursor = conn.cursor()
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    description VARCHAR(255),
+                    applied_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            # Kilidi beklerken başka bir bot migration'ı uygulamış olabilir
+            current_version = _current_schema_version(conn)
+            
+            for version, description, statements in MIGRATIONS:
+                if version <= current_version:
+                    continue
+                for statement in statements:
+                    cursor.execute(statement, {"lease_seconds": _lease_seconds()})
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                    (version, description)
+                )
+                print(f"  ✓ Migration uygulandı: v{version} ({description})")
+            
+            conn.commit()
+            cursor.close()
+            
+            print(f"✓ Veritabanı şeması güncellendi (v{SCHEMA_VERSION})")
+            return True
+        
+        except Exception as e:
+            print(f"✗ Migration sırasında hata: {e}")
+            conn.rollback()
+            return False
 
 
 def has_any_categories():
     """Tabloda herhangi bir kategori olup olmadığını kontrol eder."""
-    conn = get_db_connection()
-    if not conn:
-        return False
+    with db_connection() as conn:
+        if not conn:
+            return False
     
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT EXISTS (SELECT 1 FROM categories LIMIT 1);")
-        result = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        return bool(result[0]) if result else False
-    except Exception as e:
-        print(f"✗ Kategori varlık kontrolü sırasında hata: {e}")
-        if conn:
-            conn.close()
-        return False
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM categories LIMIT 1);")
+            result = cursor.fetchone()
+            cursor.close()
+            return bool(result[0]) if result else False
+        except Exception as e:
+            print(f"✗ Kategori varlık kontrolü sırasında hata: {e}")
+            return False
+
+
+# Toplu kategori kaydı: deviceId NULL olan satırlar UNIQUE kısıtında çakışmadığı için
+# (NULL != NULL) var olan kayıtlar NOT EXISTS ile ayıklanır; her satır için yeni mi
+# yoksa mevcut mu olduğu tek sorguda döner
+BULK_INSERT_CATEGORIES_QUERY = """
+WITH input (parentCategory, subCategory, page, "order") AS (
+    VALUES %s
+),
+inserted AS (
+    INSERT INTO categories (parentCategory, subCategory, page, deviceId, isCompleted, "order")
+    SELECT i.parentCategory, i.subCategory, i.page, NULL, FALSE, i."order"
+    FROM input AS i
+    WHERE NOT EXISTS (
+        SELECT 1 FROM categories AS c
+        WHERE c.parentCategory = i.parentCategory
+          AND c.subCategory = i.subCategory
+          AND (c.deviceId IS NULL OR c.deviceId = '')
+    )
+    ON CONFLICT (parentCategory, subCategory, deviceId) DO NOTHING
+    RETURNING subCategory
+)
+SELECT i.subCategory, ins.subCategory IS NOT NULL AS is_new
+FROM input AS i
+LEFT JOIN inserted AS ins ON ins.subCategory = i.subCategory
+"""
 
 
-def save_categories(categories, device_id=None, page=1):
+def save_categories(categories, page=1):
     """Kategori listesini veritabanına kaydeder (öncelikli kategoriler önce işlenir)"""
     from category_reader import is_priority_category
     
-    conn = get_db_connection()
-    if not conn:
-        return False
+    with db_connection() as conn:
+        if not conn:
+            return False
     
-    parent_category = "Vasıta"
-    # deviceId boş olacak (ileride kullanılacak)
-    device_id = ""  # Boş string, NULL olarak kaydedilecek
+        parent_category = "Vasıta"
+        # deviceId NULL kaydedilir; kategoriler cihazlara claim ile atanır
     
-    # Kategorileri öncelikli ve diğerleri olarak ayır
-    priority_categories = [cat for cat in categories if is_priority_category(cat)]
-    other_categories = [cat for cat in categories if not is_priority_category(cat)]
+        # Kategorileri öncelikli ve diğerleri olarak ayır
+        priority_categories = [cat for cat in categories if is_priority_category(cat)]
+        other_categories = [cat for cat in categories if not is_priority_category(cat)]
     
-    # Sayıcılar
-    priority_new = 0
-    priority_existing = 0
-    other_new = 0
-    other_existing = 0
+        # Sayıcılar
+        priority_new = 0
+        priority_existing = 0
+        other_new = 0
+        other_existing = 0
     
-    print(f"\n--- Öncelikli Kategoriler Kaydediliyor ({len(priority_categories)} adet) ---")
+        # Tüm kategoriler tek transaction ve tek round-trip ile gönderilir
+        # (öncelikli kategoriler order = 0, diğerleri order = 1)
+        rows = []
+        seen = set()
+        for order, group in ((0, priority_categories), (1, other_categories)):
+            for sub_category in group:
+                if sub_category not in seen:
+                    seen.add(sub_category)
+                    rows.append((parent_category, sub_category, page, order))
     
-    try:
-        # Önce öncelikli kategorileri işle (order = 0)
-        for sub_category in priority_categories:
-            if not category_exists(conn, parent_category, sub_category, device_id):
-                if insert_category(conn, parent_category, sub_category, page, device_id, is_completed=False, order=0):
+        try:
+            is_new_by_category = {}
+            if rows:
+                cursor = conn.cursor()
+                results = execute_values(cursor, BULK_INSERT_CATEGORIES_QUERY, rows, page_size=len(rows), fetch=True)
+                conn.commit()
+                cursor.close()
+                is_new_by_category = dict(results)
+        
+            print(f"\n--- Öncelikli Kategoriler Kaydediliyor ({len(priority_categories)} adet) ---")
+            for sub_category in priority_categories:
+                if is_new_by_category.pop(sub_category, False):
                     priority_new += 1
                     print(f"  ✓ [ÖNCELİKLİ] Yeni kategori kaydedildi: {sub_category} (order=0)")
                 else:
-                    print(f"  ✗ [ÖNCELİKLİ] Kategori kaydedilemedi: {sub_category}")
-            else:
-                priority_existing += 1
-                print(f"  ⊙ [ÖNCELİKLİ] Kategori zaten mevcut: {sub_category}")
+                    priority_existing += 1
+                    print(f"  ⊙ [ÖNCELİKLİ] Kategori zaten mevcut: {sub_category}")
         
-        # Sonra diğer kategorileri işle (order = 1)
-        if other_categories:
-            print(f"\n--- Diğer Kategoriler Kaydediliyor ({len(other_categories)} adet) ---")
-            for sub_category in other_categories:
-                if not category_exists(conn, parent_category, sub_category, device_id):
-                    if insert_category(conn, parent_category, sub_category, page, device_id, is_completed=False, order=1):
+            if other_categories:
+                print(f"\n--- Diğer Kategoriler Kaydediliyor ({len(other_categories)} adet) ---")
+                for sub_category in other_categories:
+                    if is_new_by_category.pop(sub_category, False):
                         other_new += 1
                         print(f"  ✓ Yeni kategori kaydedildi: {sub_category} (order=1)")
                     else:
-                        print(f"  ✗ Kategori kaydedilemedi: {sub_category}")
-                else:
-                    other_existing += 1
-                    print(f"  ⊙ Kategori zaten mevcut: {sub_category}")
+                        other_existing += 1
+                        print(f"  ⊙ Kategori zaten mevcut: {sub_category}")
         
-        conn.close()
-        total_new = priority_new + other_new
-        total_existing = priority_existing + other_existing
-        print(f"\n✓ Toplam {len(categories)} kategori işlendi:")
-        print(f"  - Öncelikli: {len(priority_categories)} ({priority_new} yeni, {priority_existing} mevcut)")
-        print(f"  - Diğerleri: {len(other_categories)} ({other_new} yeni, {other_existing} mevcut)")
-        print(f"  - Toplam: {total_new} yeni, {total_existing} mevcut")
-        return True
+            total_new = priority_new + other_new
+            total_existing = priority_existing + other_existing
+            print(f"\n✓ Toplam {len(categories)} kategori işlendi:")
+            print(f"  - Öncelikli: {len(priority_categories)} ({priority_new} yeni, {priority_existing} mevcut)")
+            print(f"  - Diğerleri: {len(other_categories)} ({other_new} yeni, {other_existing} mevcut)")
+            print(f"  - Toplam: {total_new} yeni, {total_existing} mevcut")
+            return True
         
-    except Exception as e:
-        print(f"✗ Kategori kaydetme sırasında hata: {e}")
-        if conn:
-            conn.close()
-        return False
+        except Exception as e:
+            print(f"✗ Kategori kaydetme sırasında hata: {e}")
+            if conn:
+                conn.rollback()
+            return False
 
 
 def _map_category_row(row):
@@ -232,98 +443,386 @@ def _map_category_row(row):
     }
 
 
-def assign_category_to_device(device_token):
-    """Assigns or retrieves a category for the provided device token."""
+def _lease_seconds(lease_seconds=None):
+    """Lease süresini döndürür (varsayılan CATEGORY_LEASE_SECONDS ortam değişkeni)"""
+    if lease_seconds is None:
+        lease_seconds = float(os.getenv('CATEGORY_LEASE_SECONDS', '600'))
+    return lease_seconds
+
+
+# Tek sorguda en iyi kategoriyi alır. Adaylar öncelik sırasıyla denenir ve COALESCE
+# ilk bulunan adayda durur (sonraki alt sorgular çalıştırılmaz):
+#   1. cihazın kendi bitmemiş kategorisi
+#   2. "order" = 0: sahipsiz, sonra lease süresi dolmuş kategoriler
+#   3. "order" = 1: sahipsiz, sonra lease süresi dolmuş kategoriler
+# Lease'i olmayan sahipli kategoriler (lease göndermeyen eski sürüm botlar) süresi
+# dolmuş sayılmaz ve başka cihaza geçmez.
+# Her alt sorgu bir partial index'e denk gelir (bkz. MIGRATIONS v3); FOR UPDATE
+# SKIP LOCKED sayesinde eşzamanlı cihazlar aynı satırı alamaz. exclude_ids'deki
+# kategoriler (örneğin bu oturumda işlenemeyenler) atlanır.
+CLAIM_CATEGORY_QUERY = """
+WITH selected AS (
+    SELECT COALESCE(
+        (SELECT id FROM categories
+         WHERE isCompleted = FALSE AND deviceId = %(device_token)s
+           AND NOT (id = ANY(%(exclude_ids)s::integer[]))
+         ORDER BY "order", id LIMIT 1 FOR UPDATE SKIP LOCKED),
+        (SELECT id FROM categories
+         WHERE isCompleted = FALSE AND (deviceId IS NULL OR deviceId = '') AND "order" = 0
+           AND NOT (id = ANY(%(exclude_ids)s::integer[]))
+         ORDER BY "order", id LIMIT 1 FOR UPDATE SKIP LOCKED),
+        (SELECT id FROM categories
+         WHERE isCompleted = FALSE AND deviceId <> '' AND "order" = 0
+           AND lease_expires_at IS NOT NULL AND lease_expires_at < CURRENT_TIMESTAMP
+           AND NOT (id = ANY(%(exclude_ids)s::integer[]))
+         ORDER BY "order", id LIMIT 1 FOR UPDATE SKIP LOCKED),
+        (SELECT id FROM categories
+         WHERE isCompleted = FALSE AND (deviceId IS NULL OR deviceId = '') AND "order" = 1
+           AND NOT (id = ANY(%(exclude_ids)s::integer[]))
+         ORDER BY "order", id LIMIT 1 FOR UPDATE SKIP LOCKED),
+        (SELECT id FROM categories
+         WHERE isCompleted = FALSE AND deviceId <> '' AND "order" = 1
+           AND lease_expires_at IS NOT NULL AND lease_expires_at < CURRENT_TIMESTAMP
+           AND NOT (id = ANY(%(exclude_ids)s::integer[]))
+         ORDER BY "order", id LIMIT 1 FOR UPDATE SKIP LOCKED)
+    ) AS id
+)
+UPDATE categories AS c
+SET deviceId = %(device_token)s,
+    lease_expires_at = CURRENT_TIMESTAMP + make_interval(secs => %(lease_seconds)s),
+    updated_at = CURRENT_TIMESTAMP
+FROM selected
+WHERE c.id = selected.id
+RETURNING c.id, c.parentCategory, c.subCategory, c.page, c.deviceId, c.isCompleted, c."order"
+"""
+
+
+class CategoryClaimError(Exception):
+    """Kategori veritabanı hatası yüzünden alınamadı (iş kalmadığı anlamına gelmez)"""
+
+
+def claim_category(device_token, lease_seconds=None, exclude_ids=None):
+    """assign_category_to_device gibi kategori alır, fakat hatada None yerine
+    CategoryClaimError fırlatır; None sadece alınacak kategori kalmadığında döner.
+    """
+    with db_connection() as conn:
+        if not conn:
+            raise CategoryClaimError("Veritabanı bağlantısı kurulamadı")
+        
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                CLAIM_CATEGORY_QUERY,
+                {
+                    "device_token": device_token,
+                    "lease_seconds": _lease_seconds(lease_seconds),
+                    "exclude_ids": list(exclude_ids or []),
+                }
+            )
+            row = cursor.fetchone()
+            conn.commit()
+            cursor.close()
+            return _map_category_row(row) if row else None
+        
+        except Exception as e:
+            conn.rollback()
+            raise CategoryClaimError(str(e)) from e
+
+
+def assign_category_to_device(device_token, lease_seconds=None, exclude_ids=None):
+    """Claims the best pending category for the device token with a time-limited lease.
+
+    The device's own unfinished category wins, then unowned and then
+    lease-expired categories of priority "order" = 0, then of "order" = 1.
+    Categories whose id is in exclude_ids are never returned.
+    """
     if not device_token:
         print("✗ Geçersiz cihaz belirteci.")
         return None
     
-    conn = get_db_connection()
-    if not conn:
+    try:
+        return claim_category(device_token, lease_seconds, exclude_ids)
+    except CategoryClaimError as e:
+        print(f"✗ Kategori seçimi sırasında hata: {e}")
         return None
+
+
+def renew_category_leases(device_token, category_ids, lease_seconds=None):
+    """Cihaza ait kategorilerin lease süresini uzatır; uzatılan id'leri döndürür"""
+    if not device_token or not category_ids:
+        return []
     
-    cursor = None
-    assigned = None
-    
-    try:
-        cursor = conn.cursor()
+    with db_connection() as conn:
+        if not conn:
+            return []
         
-        # Step 1: Try to find an unfinished category already assigned to this device
-        cursor.execute(
-            """
-            SELECT id, parentCategory, subCategory, page, deviceId, isCompleted, "order"
-            FROM categories
-            WHERE isCompleted = FALSE AND deviceId = %s
-            ORDER BY "order" ASC, id ASC
-            LIMIT 1
-            """,
-            (device_token,)
-        )
-        row = cursor.fetchone()
-        if row:
-            assigned = _map_category_row(row)
-            return assigned
-        
-        # Step 2: Claim a pending priority category (order = 0)
-        cursor.execute(
-            """
-            WITH selected AS (
-                SELECT id FROM categories
-                WHERE isCompleted = FALSE
-                  AND "order" = 0
-                  AND (deviceId IS NULL OR deviceId = '')
-                ORDER BY id
-                LIMIT 1
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                UPDATE categories
+                SET lease_expires_at = CURRENT_TIMESTAMP + make_interval(secs => %s),
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = ANY(%s) AND deviceId = %s AND isCompleted = FALSE
+                RETURNING id
+                """,
+                (_lease_seconds(lease_seconds), list(category_ids), device_token)
             )
-            UPDATE categories AS c
-            SET deviceId = %s, updated_at = CURRENT_TIMESTAMP
-            FROM selected
-            WHERE c.id = selected.id
-            RETURNING c.id, c.parentCategory, c.subCategory, c.page, c.deviceId, c.isCompleted, c."order"
-            """,
-            (device_token,)
-        )
-        row = cursor.fetchone()
-        if row:
+            renewed = [row[0] for row in cursor.fetchall()]
             conn.commit()
-            assigned = _map_category_row(row)
-            return assigned
+            cursor.close()
+            return renewed
+        except Exception as e:
+            print(f"✗ Lease yenileme sırasında hata: {e}")
+            conn.rollback()
+            return []
+
+
+def release_category_lease(device_token, category_id):
+    """Bitmemiş kategoriyi cihazdan bırakır, başka cihazlar hemen alabilir"""
+    with db_connection() as conn:
+        if not conn:
+            return False
         
-        # Step 3: Claim a pending non-priority category (order = 1)
-        cursor.execute(
-            """
-            WITH selected AS (
-                SELECT id FROM categories
-                WHERE isCompleted = FALSE
-                  AND "order" = 1
-                  AND (deviceId IS NULL OR deviceId = '')
-                ORDER BY id
-                LIMIT 1
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                UPDATE categories
+                SET deviceId = NULL, lease_expires_at = NULL, updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s AND deviceId = %s AND isCompleted = FALSE
+                """,
+                (category_id, device_token)
             )
-            UPDATE categories AS c
-            SET deviceId = %s, updated_at = CURRENT_TIMESTAMP
-            FROM selected
-            WHERE c.id = selected.id
-            RETURNING c.id, c.parentCategory, c.subCategory, c.page, c.deviceId, c.isCompleted, c."order"
-            """,
-            (device_token,)
-        )
-        row = cursor.fetchone()
-        if row:
+            released = cursor.rowcount > 0
             conn.commit()
-            assigned = _map_category_row(row)
-            return assigned
-        
-        return None
-    
-    except Exception as e:
-        print(f"✗ Kategori seçimi sırasında hata: {e}")
-        if conn:
+            cursor.close()
+            return released
+        except Exception as e:
+            print(f"✗ Lease bırakma sırasında hata: {e}")
             conn.rollback()
-        return None
-    
-    finally:
-        if cursor:
+            return False
+
+
+def complete_category(device_token, category_id):
+    """Cihaza ait kategoriyi tamamlandı olarak işaretler ve lease'i kaldırır"""
+    with db_connection() as conn:
+        if not conn:
+            return False
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                UPDATE categories
+                SET isCompleted = TRUE, lease_expires_at = NULL, updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s AND deviceId = %s AND isCompleted = FALSE
+                """,
+                (category_id, device_token)
+            )
+            completed = cursor.rowcount > 0
+            conn.commit()
             cursor.close()
-        conn.close()
+            return completed
+        except Exception as e:
+            print(f"✗ Kategori tamamlanırken hata: {e}")
+            conn.rollback()
+            return False
+
+
+class LeaseHeartbeat:
+    """Cihazın elindeki kategorilerin lease süresini arka planda düzenli olarak yeniler"""
+    
+    def __init__(self, device_token, interval=None, lease_seconds=None):
+        self.device_token = device_token
+        self.lease_seconds = _lease_seconds(lease_seconds)
+        # Varsayılan: lease süresinin üçte birinde bir yenile
+        self.interval = interval if interval is not None else self.lease_seconds / 3
+        self._category_ids = set()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def add(self, category_id):
+        with self._lock:
+            self._category_ids.add(category_id)
+    
+    def discard(self, category_id):
+        with self._lock:
+            self._category_ids.discard(category_id)
+    
+    def renew(self):
+        """Lease'leri hemen yeniler; süresi dolup başka cihaza geçenler listeden çıkarılır"""
+        with self._lock:
+            category_ids = list(self._category_ids)
+        if not category_ids:
+            return []
+        renewed = renew_category_leases(self.device_token, category_ids, self.lease_seconds)
+        lost = set(category_ids) - set(renewed)
+        if lost:
+            print(f"⚠️  Lease kaybedildi: {sorted(lost)}")
+            with self._lock:
+                self._category_ids -= lost
+        return renewed
+    
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.renew()
+    
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="lease-heartbeat", daemon=True)
+            self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+class CategoryPrefetcher:
+    """Sıradaki kategorileri arka planda önceden alır (lookahead).
+
+    Mevcut kategori işlenirken depth kadar kategori arka plandaki thread'de
+    alınıp hazırda bekletilir; böylece kategori sınırında veritabanı
+    beklenmez. Hazırda bekleyen kategorilerin lease'leri heartbeat ile
+    yenilenir, stop() ile kullanılmayanların lease'leri bırakılır.
+
+    Veritabanı hatasında kategori alma, her denemede iki katına çıkan
+    beklemeyle retries kez tekrarlanır; sonunda da alınamazsa get()
+    CategoryClaimError fırlatır. Kuyruk sadece gerçekten kategori
+    kalmadığında tükenmiş sayılır.
+    """
+    
+    MAX_RETRY_DELAY = 30.0
+    
+    def __init__(self, device_token, depth=None, heartbeat=None, lease_seconds=None,
+                 retries=None, retry_delay=None):
+        self.device_token = device_token
+        if depth is None:
+            depth = int(os.getenv('CATEGORY_PREFETCH_DEPTH', '1'))
+        self.depth = depth  # 0: önceden alma yok, get() kategoriyi o an alır
+        self.heartbeat = heartbeat
+        self.lease_seconds = lease_seconds
+        if retries is None:
+            retries = int(os.getenv('CATEGORY_CLAIM_RETRIES', '5'))
+        if retry_delay is None:
+            retry_delay = float(os.getenv('CATEGORY_CLAIM_RETRY_DELAY', '1'))
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._queue = queue.Queue()
+        self._slots = threading.Semaphore(max(depth, 0))  # Kuyruktaki boş yer sayısı
+        self._held = set()     # Önceden alınmış veya işlenmekte olan kategoriler
+        self._skipped = set()  # Bu oturumda işlenemeyen kategoriler (tekrar alınmaz)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._exhausted = False
+        self._thread = None
+    
+    def _claim(self):
+        """Elde tutulan ve atlanan kategoriler dışındaki en iyi kategoriyi alır"""
+        with self._lock:
+            exclude_ids = self._held | self._skipped
+        category = claim_category(self.device_token, self.lease_seconds, exclude_ids=exclude_ids)
+        if category:
+            with self._lock:
+                self._held.add(category['id'])
+            if self.heartbeat is not None:
+                self.heartbeat.add(category['id'])
+        return category
+    
+    def _claim_with_retry(self):
+        """Kategoriyi alır; veritabanı hatasında artan beklemeyle tekrar dener"""
+        delay = self.retry_delay
+        for attempt in range(self.retries + 1):
+            try:
+                return self._claim()
+            except CategoryClaimError as e:
+                if attempt == self.retries:
+                    raise
+                print(f"⚠️  Kategori alınamadı ({e}), {delay:g} sn sonra tekrar denenecek "
+                      f"({attempt + 1}/{self.retries})")
+                if self._stop_event.wait(delay):
+                    raise
+                delay = min(delay * 2, self.MAX_RETRY_DELAY)
+    
+    def _release(self, category_id):
+        """Kullanılmayan kategorinin lease'ini bırakır"""
+        release_category_lease(self.device_token, category_id)
+        with self._lock:
+            self._held.discard(category_id)
+        if self.heartbeat is not None:
+            self.heartbeat.discard(category_id)
+    
+    def _run(self):
+        try:
+            while not self._stop_event.is_set():
+                # Kuyrukta yer açılana kadar bekle (stop() kontrol edilerek)
+                if not self._slots.acquire(timeout=0.2):
+                    continue
+                if self._stop_event.is_set():
+                    break
+                category = self._claim_with_retry()
+                self._queue.put(category)
+                if category is None:
+                    # İş kalmadı - tüketici None alınca durur
+                    return
+        except Exception as e:
+            # Hata tüketiciye iletilir; iş kalmadı (None) ile karıştırılmaz
+            print(f"✗ Kategori önceden alınırken hata: {e}")
+            self._queue.put(e if isinstance(e, CategoryClaimError) else CategoryClaimError(str(e)))
+    
+    def start(self):
+        if self.depth > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="category-prefetch", daemon=True)
+            self._thread.start()
+        return self
+    
+    def get(self):
+        """Sıradaki kategoriyi döndürür (hazır değilse bekler); iş kalmadıysa None.
+
+        Kategori tekrar denemelere rağmen alınamazsa CategoryClaimError fırlatır.
+        """
+        if self.depth <= 0:
+            return self._claim_with_retry()
+        if self._exhausted:
+            return None
+        category = self._queue.get()
+        if isinstance(category, CategoryClaimError):
+            # Thread durdu; sonraki çağrılar da aynı hatayı alır
+            self._queue.put(category)
+            raise category
+        if category is None:
+            self._exhausted = True
+            return None
+        self._slots.release()
+        return category
+    
+    def done(self, category_id, failed=False):
+        """İşlenen kategoriyi bırakır; failed ise bu oturumda tekrar alınmaz.
 
+        Başarısız kategorinin lease'i bu çağrıdan önce bırakılmış olmalıdır.
+        """
+        with self._lock:
+            self._held.discard(category_id)
+            if failed:
+                self._skipped.add(category_id)
+        if self.heartbeat is not None:
+            self.heartbeat.discard(category_id)
+    
+    def stop(self):
+        """Önceden alma thread'ini durdurur ve kullanılmayan kategorilerin lease'lerini bırakır"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        while True:
+            try:
+                category = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(category, dict):
+                print(f"  → Önceden alınan kategori bırakılıyor: {category['subCategory']}")
+                self._release(category['id'])
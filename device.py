@@ -3,59 +3,42 @@
 Cihaz ve ADB yönetimi modülü
 """
 
-import subprocess
+from adb_transport import get_transport
 
 
 def check_adb():
-    """ADB'nin kurulu olup olmadığını kontrol eder"""
+    """ADB sunucusuna ulaşılabildiğini kontrol eder"""
     try:
-        result = subprocess.run(['adb', 'version'], 
-                              capture_output=True, 
-                              text=True, 
-                              timeout=5)
-        if result.returncode == 0:
-            print("✓ ADB başarıyla bulundu")
-            print(result.stdout.split('\n')[0])
-            return True
-        else:
-            print("✗ ADB bulunamadı. Lütfen Android SDK Platform-Tools'u yükleyin.")
-            print("\nKurulum için:")
-            print("  macOS: brew install android-platform-tools")
-            print("  veya: https://developer.android.com/tools/releases/platform-tools")
-            return False
-    except FileNotFoundError:
+        version = get_transport().version()
+        print("✓ ADB başarıyla bulundu")
+        print(f"ADB sunucusu protokol sürümü: {version}")
+        return True
+    except RuntimeError as e:
+        print(f"✗ ADB sunucusuna bağlanılamadı: {e}")
         print("✗ ADB bulunamadı. Lütfen Android SDK Platform-Tools'u yükleyin.")
         print("\nKurulum için:")
         print("  macOS: brew install android-platform-tools")
+        print("  veya: https://developer.android.com/tools/releases/platform-tools")
         return False
     except Exception as e:
         print(f"✗ ADB kontrolü sırasında hata: {e}")
         return False
 
 
-def get_connected_devices():
+def get_connected_devices(verbose=True):
     """Bağlı cihazları listeler"""
     try:
-        result = subprocess.run(['adb', 'devices'], 
-                              capture_output=True, 
-                              text=True, 
-                              timeout=5)
-        lines = result.stdout.strip().split('\n')[1:]  # İlk satırı atla (başlık)
-        print(lines)
-        devices = []
-        for line in lines:
-            if line.strip() and '\tdevice' in line:
-                device_id = line.split('\t')[0]
-                devices.append(device_id)
-        print(devices)
+        devices = get_transport().devices()
+        if verbose:
+            print(devices)
         return devices
     except Exception as e:
         print(f"✗ Cihaz listesi alınırken hata: {e}")
         return []
 
 
-def connect_device():
-    """Cihaza bağlanır"""
+def connect_device(device_id=None):
+    """Cihaza bağlanır (device_id verilirse sadece o cihaz kullanılır)"""
     print("\n--- Cihaz Bağlantısı ---")
     
     devices = get_connected_devices()
@@ -68,6 +51,13 @@ def connect_device():
         print("  3. Bilgisayarı güvenilir cihaz olarak onaylayın")
         return None
     
+    if device_id:
+        if device_id not in devices:
+            print(f"✗ Cihaz bağlı değil: {device_id}")
+            return None
+        print(f"✓ Cihaza bağlanıldı: {device_id}")
+        return device_id
+    
     if len(devices) == 1:
         device_id = devices[0]
         print(f"✓ Cihaza bağlanıldı: {device_id}")
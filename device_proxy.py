@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Cihaz proxy modülü - uiautomator2 çağrılarını metoda, selector türüne ve çağrı noktasına göre ölçer
+"""
+
+import os
+import sys
+import threading
+import time
+
+
+# Ekranı değiştiren cihaz metotları: çağrıldıklarında önbellek temizlenir
+DEVICE_GESTURES = {
+    'click', 'double_click', 'long_click', 'swipe', 'swipe_points', 'swipe_ext', 'drag',
+    'press', 'send_keys', 'clear_text', 'app_start', 'app_stop', 'app_clear', 'open_url', 'shell',
+}
+
+# Ekranı değiştirmeyen selector metotları; diğerleri (click, scroll, set_text, ...) önbelleği temizler
+SELECTOR_QUERIES = {'exists', 'info', 'get_text', 'bounds', 'center', 'count', 'wait', 'wait_gone', 'screenshot'}
+
+# Çağrılabilir olmasalar da metotlarına zincirleme erişilen nesneler (scroll.vert.to, fling.toEnd)
+CHAINED = {'scroll', 'fling', 'vert', 'horiz'}
+
+
+class _CallStats:
+    """Bir (çağrı noktası, metot, selector türü) için sayaçlar"""
+
+    __slots__ = ('count', 'cached', 'total', 'slowest')
+
+    def __init__(self):
+        self.count = 0
+        self.cached = 0
+        self.total = 0.0
+        self.slowest = 0.0
+
+
+class DeviceProxy:
+    """uiautomator2 cihazını saran ve her çağrıyı ölçen proxy.
+
+    Tüm çağrılar asıl cihaza iletilir; süreleri metot, selector türü
+    (ör. text, textContains, scrollable) ve çağrı noktası (dosya:satır)
+    bazında toplanır. Aynı ekran durumunda tekrarlanan yan etkisiz
+    sorgular (window_size() ve aynı selector için bulunan exists())
+    önbellekten cevaplanır; swipe, click, press gibi ekranı değiştiren
+    her çağrı önbelleği temizler. exists() sadece bulunduğunda saklanır,
+    böylece element beklenen yoklama döngüleri etkilenmez. clock verilirse
+    (ör. sanal saat) süreler onunla ölçülür.
+    """
+
+    def __init__(self, d, clock=None):
+        object.__setattr__(self, '_d', d)
+        object.__setattr__(self, '_now', clock.now if clock is not None else time.perf_counter)
+        object.__setattr__(self, '_stats', {})
+        object.__setattr__(self, '_cache', {})
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    @property
+    def device(self):
+        """Sarılan asıl cihaz"""
+        return self._d
+
+    def __getattr__(self, name):
+        value = getattr(self._d, name)
+        if not callable(value):
+            return value
+        if name == 'window_size':
+            return lambda: self._cached_call(('window_size',), 'window_size', '-', value)
+        return _TracedCallable(self, value, name, '-', name in DEVICE_GESTURES)
+
+    def __setattr__(self, name, value):
+        setattr(self._d, name, value)
+
+    def __call__(self, **selector):
+        return SelectorProxy(self, self._d(**selector), selector)
+
+    def invalidate(self):
+        """Ekran durumu değişti - önbellekteki sorgular tekrar sorulur"""
+        with self._lock:
+            self._cache.clear()
+
+    def _cached_call(self, key, method, kind, call, *args, **kwargs):
+        with self._lock:
+            hit = key in self._cache
+            value = self._cache.get(key)
+        if hit:
+            self._record(method, kind, 0.0, cached=True)
+            return value
+        value = self._timed(method, kind, call, *args, **kwargs)
+        with self._lock:
+            self._cache[key] = value
+        return value
+
+    def _timed(self, method, kind, call, *args, **kwargs):
+        started = self._now()
+        try:
+            return call(*args, **kwargs)
+        finally:
+            self._record(method, kind, self._now() - started)
+
+    def _record(self, method, kind, elapsed, cached=False):
+        key = (_call_site(), method, kind)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _CallStats()
+            stats.count += 1
+            stats.total += elapsed
+            stats.slowest = max(stats.slowest, elapsed)
+            if cached:
+                stats.cached += 1
+
+    def report(self, limit=10, reset=False):
+        """En yavaş çağrı noktalarını ve metot/selector türü toplamlarını döndürür"""
+        with self._lock:
+            items = list(self._stats.items())
+            if reset:
+                self._stats.clear()
+
+        methods = {}
+        for (site, method, kind), stats in items:
+            row = methods.setdefault((method, kind), {'method': method, 'kind': kind, 'count': 0,
+                                                      'cached': 0, 'total': 0.0, 'slowest': 0.0})
+            row['count'] += stats.count
+            row['cached'] += stats.cached
+            row['total'] += stats.total
+            row['slowest'] = max(row['slowest'], stats.slowest)
+        sites = [
+            {'site': site, 'method': method, 'kind': kind, 'count': stats.count, 'cached': stats.cached,
+             'total': round(stats.total, 4), 'slowest': round(stats.slowest, 4)}
+            for (site, method, kind), stats in items
+        ]
+        for row in methods.values():
+            row['total'], row['slowest'] = round(row['total'], 4), round(row['slowest'], 4)
+        by_total = lambda row: row['total']
+        return {
+            'methods': sorted(methods.values(), key=by_total, reverse=True),
+            'sites': sorted(sites, key=by_total, reverse=True)[:limit],
+        }
+
+    def print_report(self, limit=10, reset=False):
+        """En yavaş çağrı noktalarını yazdırır; raporu döndürür"""
+        report = self.report(limit=limit, reset=reset)
+        print("\n⊙ En yavaş cihaz çağrıları:")
+        for row in report['sites']:
+            cached = f", {row['cached']} önbellekten" if row['cached'] else ""
+            print(f"  {row['total'] * 1000:8.1f} ms  {row['count']:4}x{cached}  "
+                  f"{row['method']}[{row['kind']}]  {row['site']}")
+        return report
+
+
+class SelectorProxy:
+    """d(**selector) sonucunu saran proxy (exists önbelleği ve ölçüm)"""
+
+    def __init__(self, proxy, ui_object, selector):
+        self._proxy = proxy
+        self._object = ui_object
+        self._kind = '+'.join(sorted(selector)) or '-'
+        self._key = tuple(sorted((key, repr(value)) for key, value in selector.items()))
+
+    @property
+    def exists(self):
+        return _CachedExists(self)
+
+    def __getattr__(self, name):
+        value = getattr(self._object, name)
+        if not callable(value) and name not in CHAINED:
+            return value
+        return _TracedCallable(self._proxy, value, name, self._kind, name not in SELECTOR_QUERIES)
+
+
+class _CachedExists:
+    """UiObject.exists yerine: bool() ve exists(timeout) bulunan selector'ı ekran durumu boyunca saklar"""
+
+    def __init__(self, selector):
+        self._selector = selector
+
+    def __call__(self, timeout=0):
+        selector = self._selector
+        proxy = selector._proxy
+        key = ('exists', selector._key)
+        with proxy._lock:
+            found = key in proxy._cache
+        if found:
+            proxy._record('exists', selector._kind, 0.0, cached=True)
+            return True
+        value = proxy._timed('exists', selector._kind, selector._object.exists, timeout)
+        if value:
+            with proxy._lock:
+                proxy._cache[key] = True
+        return value
+
+    def __bool__(self):
+        return bool(self())
+
+    def __repr__(self):
+        return str(bool(self))
+
+
+class _TracedCallable:
+    """Ölçülen çağrılabilir; scroll.vert.to gibi zincirleme erişimleri de ölçer"""
+
+    def __init__(self, proxy, target, name, kind, gesture):
+        self._proxy = proxy
+        self._target = target
+        self._name = name
+        self._kind = kind
+        self._gesture = gesture
+
+    def __call__(self, *args, **kwargs):
+        try:
+            return self._proxy._timed(self._name, self._kind, self._target, *args, **kwargs)
+        finally:
+            if self._gesture:
+                self._proxy.invalidate()
+
+    def __getattr__(self, name):
+        value = getattr(self._target, name)
+        if not callable(value) and name not in CHAINED:
+            return value
+        return _TracedCallable(self._proxy, value, f"{self._name}.{name}", self._kind, self._gesture)
+
+
+def _call_site():
+    """Bu modül dışındaki ilk çağıranın 'dosya:satır fonksiyon' bilgisi"""
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_code.co_filename == __file__:
+        frame = frame.f_back
+    if frame is None:
+        return '?'
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+
+
+def proxy_enabled():
+    """DEVICE_PROXY=1 ise cihaz çağrıları proxy üzerinden ölçülür"""
+    return os.getenv('DEVICE_PROXY', '0') == '1'
+
+
+def wrap_device(d):
+    """Açıksa cihazı DeviceProxy ile sarar (zaten sarılıysa dokunmaz)"""
+    if d is None or isinstance(d, DeviceProxy) or not proxy_enabled():
+        return d
+    return DeviceProxy(d)
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Sahte cihaz modülü - uiautomator2 cihaz API'sinin kullanılan kısmını telefon olmadan taklit eder
+"""
+
+import os
+import re
+from collections import Counter
+from xml.sax.saxutils import quoteattr
+
+from app import SAHIBINDEN_PACKAGE
+from hierarchy_parser import bounds_center, parse_bounds, parse_nodes
+from instrumentation import count
+from timing import RealClock
+
+# Varsayılan sahte Otomobil marka listesi
+DEFAULT_BRANDS = [
+    "Alfa Romeo", "Aston Martin", "Audi", "Bentley", "BMW", "Buick", "Cadillac", "Chery",
+    "Chevrolet", "Chrysler", "Citroen", "Dacia", "Daewoo", "Daihatsu", "Dodge", "Ferrari",
+    "Fiat", "Ford", "Geely", "Honda", "Hyundai", "Infiniti", "Isuzu", "Jaguar", "Kia", "Lada",
+    "Lamborghini", "Lancia", "Lexus", "Lotus", "Maserati", "Mazda", "Mercedes-Benz", "Mini",
+    "Mitsubishi", "Nissan", "Opel", "Peugeot", "Porsche", "Proton", "Renault", "Rover", "Seat",
+    "Skoda", "Smart", "Subaru", "Suzuki", "Tata", "Tesla", "Tofaş", "Toyota", "Volkswagen", "Volvo",
+]
+
+# Marka listesinin altındaki, kategori olarak okunmaması gereken bölüm
+DEFAULT_TRAILER = ["Navigasyon Cihazı", "Garmin", "TomTom", "Mio"]
+
+
+class ListScreen:
+    """Başlık çubuğu ve kaydırılabilir bir satır listesinden oluşan sentetik ekran.
+
+    rows: satır metinleri, ekran sırasıyla. Her satır tıklanabilir bir
+    LinearLayout içinde metin ve (counts verilirse) ilan sayısıdır.
+    on_click: tıklanan satırın metnini alıp açılacak ekranı döndüren
+    fonksiyon (None dönerse ekran değişmez).
+    """
+
+    def __init__(self, title, rows, counts=None, on_click=None, window=(1080, 2340),
+                 top=300, bottom=2300, row_height=150):
+        self.title = title
+        self.rows = list(rows)
+        self.counts = counts or {}
+        self.on_click = on_click
+        self.window = window
+        self.top = top  # Liste container'ının üst kenarı
+        self.bottom = bottom  # Liste container'ının alt kenarı
+        self.row_height = row_height
+        self.offset = 0  # Listenin kaydırılan miktarı (piksel)
+
+    @property
+    def viewport(self):
+        return self.bottom - self.top
+
+    @property
+    def max_offset(self):
+        return max(0, len(self.rows) * self.row_height - self.viewport)
+
+    def scroll(self, dy):
+        """Listeyi dy piksel kaydırır (pozitif: aşağıdaki satırlar görünür); kaydırılan miktarı döndürür"""
+        previous = self.offset
+        self.offset = max(0, min(self.max_offset, self.offset + int(dy)))
+        return self.offset - previous
+
+    def to_top(self):
+        self.offset = 0
+
+    def visible_rows(self):
+        """Görünen satırlar: (metin, (x1, y1, x2, y2)); kenarlarda kırpılmış satırlar dahil"""
+        width = self.window[0]
+        first = self.offset // self.row_height
+        for index in range(first, len(self.rows)):
+            y = self.top + index * self.row_height - self.offset
+            if y >= self.bottom:
+                break
+            y1, y2 = max(y, self.top), min(y + self.row_height, self.bottom)
+            if y2 > y1:
+                yield self.rows[index], (0, y1, width, y2)
+
+    def xml(self):
+        width, height = self.window
+        parts = [
+            _node('', 'android.widget.FrameLayout', (0, 0, width, height), open_tag=True),
+            _node('', 'android.widget.ImageButton', (0, 100, 150, 250), desc='Geri', clickable=True),
+            _node(self.title, 'android.widget.TextView', (150, 100, width, 250)),
+            _node('', 'androidx.recyclerview.widget.RecyclerView', (0, self.top, width, self.bottom),
+                  resource_id=f'{SAHIBINDEN_PACKAGE}:id/recyclerView', scrollable=True, open_tag=True),
+        ]
+        for text, (x1, y1, x2, y2) in self.visible_rows():
+            parts.append(_node('', 'android.widget.LinearLayout', (x1, y1, x2, y2),
+                               resource_id=f'{SAHIBINDEN_PACKAGE}:id/row', clickable=True, open_tag=True))
+            parts.append(_node(text, 'android.widget.TextView', (40, y1, 800, y2),
+                               resource_id=f'{SAHIBINDEN_PACKAGE}:id/title'))
+            if text in self.counts:
+                parts.append(_node(f"({self.counts[text]})", 'android.widget.TextView', (800, y1, x2 - 40, y2),
+                                   resource_id=f'{SAHIBINDEN_PACKAGE}:id/count'))
+            parts.append('</node>')
+        parts.append('</node></node>')
+        return _hierarchy(parts)
+
+    def click(self, x, y):
+        """Koordinattaki satıra tıklar; açılan ekranı döndürür (yoksa None)"""
+        for text, (x1, y1, x2, y2) in self.visible_rows():
+            if x1 <= x < x2 and y1 <= y < y2:
+                return self.on_click(text) if self.on_click else None
+        return None
+
+
+class ReplayScreen:
+    """Kaydedilmiş hierarchy dump'larını sırayla oynatan ekran.
+
+    Her aşağı kaydırma bir sonraki kareye, yukarı kaydırma bir öncekine
+    geçer; son karede kaydırma ekranı değiştirmez (liste sonu).
+    """
+
+    def __init__(self, frames, on_click=None):
+        if not frames:
+            raise ValueError("En az bir kare gerekli")
+        self.frames = list(frames)
+        self.on_click = on_click
+        self.index = 0
+
+    @classmethod
+    def from_directory(cls, directory, on_click=None):
+        """Klasördeki *.xml dosyalarını isim sırasıyla kare olarak yükler"""
+        names = sorted(name for name in os.listdir(directory) if name.endswith('.xml'))
+        frames = []
+        for name in names:
+            with open(os.path.join(directory, name), encoding='utf-8') as f:
+                frames.append(f.read())
+        return cls(frames, on_click=on_click)
+
+    @property
+    def viewport(self):
+        container = _scroll_container(parse_nodes(self.xml()))
+        return container[3] - container[1] if container else 0
+
+    def scroll(self, dy):
+        previous = self.index
+        if dy > 0:
+            self.index = min(self.index + 1, len(self.frames) - 1)
+        elif dy < 0:
+            self.index = max(self.index - 1, 0)
+        return self.index - previous
+
+    def to_top(self):
+        self.index = 0
+
+    def xml(self):
+        return self.frames[self.index]
+
+    def click(self, x, y):
+        if not self.on_click:
+            return None
+        for node in parse_nodes(self.xml()):
+            rect = parse_bounds(node.bounds)
+            if node.text and rect and rect[0] <= x < rect[2] and rect[1] <= y < rect[3]:
+                return self.on_click(node.text)
+        return None
+
+
+def otomobil_screen(brands=None, trailer=None, models_per_brand=12, window=(1080, 2340)):
+    """Otomobil marka listesi; markaya tıklanınca markanın model listesi açılır"""
+    brands = list(brands or DEFAULT_BRANDS)
+    trailer = list(DEFAULT_TRAILER if trailer is None else trailer)
+    counts = {brand: (index + 3) * 1117 for index, brand in enumerate(brands)}
+    return ListScreen(
+        'Otomobil',
+        ['Tüm "Otomobil" İlanları'] + brands + trailer,
+        counts=counts,
+        on_click=lambda text: brand_screen(text, models_per_brand, window) if text in counts else None,
+        window=window,
+    )
+
+
+def brand_screen(brand, models=12, window=(1080, 2340)):
+    """Bir markanın model listesi ('Tüm "{marka}" İlanları' satırı ile başlar)"""
+    rows = [f'Tüm "{brand}" İlanları'] + [f"{brand} Model {index + 1}" for index in range(models)]
+    return ListScreen(brand, rows, window=window)
+
+
+class FakeDevice:
+    """uiautomator2 Device yerine kullanılabilen sahte cihaz.
+
+    Ekranlar bir yığında tutulur: satıra tıklamak yeni ekran açar, geri tuşu
+    bir önceki ekrana döner. Her çağrı RPC olarak sayılır (calls); dump'lar
+    ve dump edilen byte'lar ayrıca tutulur. rpc_latency verilirse her RPC
+    gerçek cihazdaki gibi o kadar sürer; sanal saat (timing.VirtualClock)
+    verilirse bu süre beklenmeden saate eklenir.
+    """
+
+    def __init__(self, screen, serial='fake-1', model='FakeDevice', version='fake',
+                 window=(1080, 2340), rpc_latency=0.0, clock=None):
+        self.serial = serial
+        self.screens = [screen]
+        self.window = window
+        self.version = version
+        self.model = model
+        self.rpc_latency = rpc_latency
+        self.clock = clock or RealClock()
+        self.calls = Counter()  # metod -> RPC sayısı
+        self.swipes = 0  # Cihaz tarafında yapılan swipe'lar (scroll.to dahil)
+        self.bytes_dumped = 0
+        self.clicked = []  # Tıklanan satır metinleri
+
+    @property
+    def screen(self):
+        return self.screens[-1]
+
+    @property
+    def rpc_count(self):
+        return sum(self.calls.values())
+
+    def _rpc(self, method):
+        self.calls[method] += 1
+        count('rpc')
+        if self.rpc_latency:
+            self.clock.advance(self.rpc_latency)
+
+    def _swipe_list(self, dy):
+        self.swipes += 1
+        return self.screen.scroll(dy)
+
+    # --- uiautomator2 Device API ---
+
+    @property
+    def device_info(self):
+        self._rpc('device_info')
+        return {'model': self.model, 'serial': self.serial}
+
+    def app_info(self, package):
+        self._rpc('app_info')
+        return {'packageName': package, 'versionName': self.version}
+
+    def window_size(self):
+        self._rpc('window_size')
+        return self.window
+
+    def dump_hierarchy(self, **kwargs):
+        self._rpc('dump_hierarchy')
+        xml = self.screen.xml()
+        self.bytes_dumped += len(xml.encode('utf-8'))
+        return xml
+
+    def swipe(self, fx, fy, tx, ty, duration=None, steps=None):
+        self._rpc('swipe')
+        self._swipe_list(fy - ty)
+
+    def swipe_points(self, points, duration=0.5):
+        self._rpc('swipe_points')
+        self._swipe_list(points[0][1] - points[-1][1])
+
+    def click(self, x, y):
+        self._rpc('click')
+        self._click(x, y)
+
+    def press(self, key):
+        self._rpc('press')
+        if key == 'back' and len(self.screens) > 1:
+            self.screens.pop()
+
+    def __call__(self, **selector):
+        return FakeSelector(self, selector)
+
+    def _click(self, x, y):
+        for node in parse_nodes(self.screen.xml()):
+            rect = parse_bounds(node.bounds)
+            if node.text and rect and rect[0] <= x < rect[2] and rect[1] <= y < rect[3]:
+                self.clicked.append(node.text)
+        opened = self.screen.click(x, y)
+        if opened is not None:
+            self.screens.append(opened)
+
+
+class FakeSelector:
+    """d(**selector) nesnesi: exists, click ve scroll desteklenir"""
+
+    def __init__(self, d, selector):
+        self.d = d
+        self.selector = selector
+
+    def _matches(self):
+        return [node for node in parse_nodes(self.d.screen.xml()) if _match(node, self.selector)]
+
+    def exists(self, timeout=0):
+        self.d._rpc('exists')
+        return bool(self._matches())
+
+    def click(self, timeout=None):
+        self.d._rpc('selector_click')
+        for node in self._matches():
+            center = bounds_center(node.bounds)
+            if center:
+                self.d._click(*center)
+                return
+        raise LookupError(f"Eleman bulunamadı: {self.selector}")
+
+    @property
+    def scroll(self):
+        return FakeScroll(self)
+
+
+class FakeScroll:
+    """d(scrollable=True).scroll - UiScrollable davranışını taklit eder"""
+
+    # UiScrollable container'ın kenarlarından %10 içeriden swipe yapar
+    SWIPE_RATIO = 0.8
+    # UiScrollable.scrollIntoView'in varsayılan en fazla swipe sayısı
+    MAX_SEARCH_SWIPES = 30
+
+    def __init__(self, selector):
+        self.selector = selector
+        self.d = selector.d
+
+    @property
+    def vert(self):
+        return self
+
+    def _distance(self):
+        return int(self.d.screen.viewport * self.SWIPE_RATIO)
+
+    def forward(self, steps=None):
+        self.d._rpc('scroll')
+        return bool(self.d._swipe_list(self._distance()))
+
+    def toBeginning(self, max_swipes=500, steps=None):
+        self.d._rpc('scroll')
+        self.d.screen.to_top()
+
+    def to(self, **target):
+        """Hedef görünene kadar kaydırır (tek RPC); bulunduysa True.
+
+        scrollIntoView gibi önce mevcut ekrana bakar, yoksa listenin başına
+        dönüp en fazla MAX_SEARCH_SWIPES kez aşağı kaydırır.
+        """
+        self.d._rpc('scroll')
+        if self._visible(target):
+            return True
+        self.d.screen.to_top()
+        for attempt in range(self.MAX_SEARCH_SWIPES + 1):
+            if self._visible(target):
+                return True
+            if attempt == self.MAX_SEARCH_SWIPES or not self.d._swipe_list(self._distance()):
+                return False
+        return False
+
+    def _visible(self, target):
+        return any(_match(node, target) for node in parse_nodes(self.d.screen.xml()))
+
+
+def record_screen(d, directory, max_swipes=30):
+    """Gerçek cihazdaki listeyi sonuna kadar kaydırıp her ekranı klasöre kaydeder.
+
+    Kareler ReplayScreen.from_directory ile tekrar oynatılabilir. Kaydedilen
+    kare sayısını döndürür.
+    """
+    from screen_snapshot import ScreenSnapshot
+    from scroll_planner import ListEndDetector, ScrollPlanner
+
+    os.makedirs(directory, exist_ok=True)
+    snapshot = ScreenSnapshot(d).settle('list_load')
+    planner = ScrollPlanner(d)
+    end_detector = ListEndDetector()
+    frames = 0
+    while True:
+        frame = snapshot.freeze()
+        if end_detector.update(frame):
+            break
+        with open(os.path.join(directory, f"{frames:03d}.xml"), 'w', encoding='utf-8') as f:
+            f.write(frame.xml)
+        frames += 1
+        if frames > max_swipes:
+            break
+        planner.swipe(snapshot)
+        snapshot.settle('post_swipe')
+    return frames
+
+
+def _match(node, selector):
+    """Node'un uiautomator2 selector'ına uyup uymadığını döndürür"""
+    for key, value in selector.items():
+        if key == 'text' and node.text != value:
+            return False
+        if key == 'textContains' and value not in node.text:
+            return False
+        if key == 'textMatches' and not _java_fullmatch(value, node.text):
+            return False
+        if key == 'description' and node.content_desc != value:
+            return False
+        if key == 'descriptionContains' and value not in node.content_desc:
+            return False
+        if key == 'resourceId' and node.resource_id != value:
+            return False
+        if key == 'scrollable' and node.scrollable != value:
+            return False
+        if key == 'clickable' and node.clickable != value:
+            return False
+    return True
+
+
+def _java_fullmatch(pattern, text):
+    """Java regex'ini (\\Q...\\E alıntıları dahil) Python ile tam eşleştirir"""
+    pattern = re.sub(r'\\Q(.*?)\\E', lambda m: re.escape(m.group(1)), pattern, flags=re.S)
+    return re.fullmatch(pattern, text or '') is not None
+
+
+def _scroll_container(nodes):
+    for node in nodes:
+        if node.scrollable:
+            return parse_bounds(node.bounds)
+    return None
+
+
+def _node(text, class_name, rect, resource_id='', desc='', clickable=False, scrollable=False, open_tag=False):
+    x1, y1, x2, y2 = rect
+    attrs = (
+        f'index="0" text={quoteattr(text)} resource-id="{resource_id}" class="{class_name}" '
+        f'package="{SAHIBINDEN_PACKAGE}" content-desc={quoteattr(desc)} '
+        f'clickable="{str(clickable).lower()}" scrollable="{str(scrollable).lower()}" '
+        f'bounds="[{x1},{y1}][{x2},{y2}]"'
+    )
+    return f'<node {attrs}>' if open_tag else f'<node {attrs} />'
+
+
+def _hierarchy(parts):
+    return "<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>\r\n<hierarchy rotation=\"0\">" \
+        + ''.join(parts) + '</hierarchy>'
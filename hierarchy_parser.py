@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Hierarchy parse modülü - uiautomator dump'ını ağaç kurmadan stream olarak okur
+"""
+
+import re
+import threading
+from collections import namedtuple
+
+from lxml import etree
+
+
+# Ekrandaki bir elementin ihtiyaç duyulan alanları
+Node = namedtuple('Node', ['text', 'content_desc', 'resource_id', 'clickable', 'class_name', 'bounds', 'package', 'scrollable'])
+
+_BOUNDS_RE = re.compile(r'\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]')
+
+# Parser'a her seferinde verilecek parça boyutu
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_bounds(bounds):
+    """'[x1,y1][x2,y2]' formatındaki bounds'u (x1, y1, x2, y2) tuple'ına çevirir"""
+    match = _BOUNDS_RE.match(bounds or '')
+    if not match:
+        return None
+    return tuple(int(v) for v in match.groups())
+
+
+def bounds_center(bounds):
+    """Bounds'un merkez koordinatını döndürür (geçersiz veya boş alan ise None)"""
+    rect = parse_bounds(bounds)
+    if not rect:
+        return None
+    x1, y1, x2, y2 = rect
+    if x2 <= x1 or y2 <= y1:
+        return None
+    return (x1 + x2) // 2, (y1 + y2) // 2
+
+
+class _NodeCollector:
+    """lxml target parser - element ağacı kurmadan sadece gerekli alanları toplar"""
+
+    def __init__(self):
+        self.nodes = []
+
+    def start(self, tag, attrib):
+        # Kök <hierarchy> elementinin kategori/arama için anlamı yok
+        if tag != 'node':
+            return
+        get = attrib.get
+        self.nodes.append(Node(
+            get('text', '').strip(),
+            get('content-desc', '').strip(),
+            get('resource-id', ''),
+            get('clickable', 'false').lower() == 'true',
+            get('class', ''),
+            get('bounds', ''),
+            get('package', ''),
+            get('scrollable', 'false').lower() == 'true',
+        ))
+
+    def end(self, tag):
+        pass
+
+    def data(self, data):
+        pass
+
+    def close(self):
+        nodes = self.nodes
+        self.nodes = []
+        return nodes
+
+
+_local = threading.local()
+
+
+def _new_parser():
+    """Önceden yapılandırılmış, tekrar kullanılabilir parser oluşturur"""
+    collector = _NodeCollector()
+    parser = etree.XMLParser(
+        target=collector,
+        resolve_entities=False,
+        no_network=True,
+        huge_tree=True,
+        remove_comments=True,
+        remove_pis=True,
+        collect_ids=False,
+    )
+    return parser, collector
+
+
+def _acquire_parser():
+    """Thread'e ait parser'ı döndürür; meşgulse geçici bir parser oluşturur"""
+    if getattr(_local, 'busy', False):
+        return _new_parser() + (False,)
+    if getattr(_local, 'parser', None) is None:
+        _local.parser, _local.collector = _new_parser()
+    _local.busy = True
+    return _local.parser, _local.collector, True
+
+
+def iter_nodes(xml_content, chunk_size=CHUNK_SIZE):
+    """Dump'ı parça parça parse eder ve her elementi Node olarak üretir.
+
+    Element ağacı kurulmaz; her parçadan sonra toplanan Node'lar üretilip
+    serbest bırakılır. Parser thread başına bir kez oluşturulur ve tekrar
+    kullanılır.
+    """
+    data = xml_content.encode('utf-8') if isinstance(xml_content, str) else xml_content
+    parser, collector, shared = _acquire_parser()
+    finished = False
+    try:
+        for offset in range(0, len(data), chunk_size):
+            parser.feed(data[offset:offset + chunk_size])
+            if collector.nodes:
+                nodes = collector.nodes
+                collector.nodes = []
+                yield from nodes
+        remaining = parser.close()
+        finished = True
+        yield from remaining
+    finally:
+        if shared:
+            _local.busy = False
+            if not finished:
+                # Yarım kalan parse parser'ın durumunu bozar - bir sonraki çağrıda yenisi oluşturulur
+                _local.parser = None
+                _local.collector = None
+
+
+def parse_nodes(xml_content):
+    """Dump'taki tüm elementleri Node listesi olarak döndürür"""
+    return list(iter_nodes(xml_content))
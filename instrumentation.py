@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Instrumentation modülü - bot'un fazlarını span olarak ölçer, sayaçları JSONL ve Prometheus dosyasına yazar
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+
+
+# Span başına tutulan sayaçlar
+COUNTERS = ('rpc', 'dumps', 'bytes_dumped', 'parse_seconds', 'sleep_seconds', 'db_roundtrips')
+
+DEFAULT_METRICS_DIR = 'metrics'
+
+_recorder = None  # Aktif çalışmanın kaydedicisi (yoksa sayaçlar hiçbir şey yapmaz)
+_last_phases = {}  # faz -> son ölçüm (Prometheus dosyası daemon turları boyunca tüm fazları içerir)
+_last_launch = None  # Son uygulama açılışı (sonraki turların Prometheus dosyasında da kalır)
+_phase_hook = None  # Faz profilcisi (profiling.PhaseProfiler; kapalıyken None)
+_write_lock = threading.Lock()
+
+
+class Span:
+    """Bir fazın süresi ve sayaçları (alt span'ların sayaçları dahil)"""
+
+    __slots__ = ('name', 'depth', 'started', 'duration', 'counters')
+
+    def __init__(self, name, depth, started):
+        self.name = name
+        self.depth = depth
+        self.started = started
+        self.duration = None
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def to_dict(self, run_started):
+        return {
+            'name': self.name,
+            'depth': self.depth,
+            'start': round(self.started - run_started, 4),
+            'duration': round(self.duration or 0.0, 4),
+            'counters': {key: round(value, 4) if isinstance(value, float) else value
+                         for key, value in self.counters.items()},
+        }
+
+
+class RunRecorder:
+    """Tek bir çalışmanın span'larını kaydeder.
+
+    Sayaçlar o anda açık olan en içteki span'a eklenir; span kapanınca
+    sayaçları üst span'a aktarılır. Span yığını thread'ler arasında
+    ortaktır, böylece arka plan thread'lerindeki işler (ör. pipeline'daki
+    parse) o sırada açık olan faza yazılır.
+    """
+
+    def __init__(self, kind, labels=None):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.labels = dict(labels or {})
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.totals = dict.fromkeys(COUNTERS, 0)
+        self.spans = []  # Kapanan span'lar, açılış sırasıyla
+        self.launch = None  # Uygulama açılışı: mode, launch_state, total_time_ms, ready_time_ms, screen
+        self._stack = []
+        self._lock = threading.Lock()
+
+    def count(self, counter, value=1):
+        with self._lock:
+            target = self._stack[-1].counters if self._stack else self.totals
+            target[counter] += value
+
+    @contextmanager
+    def span(self, name):
+        with self._lock:
+            current = Span(name, len(self._stack), time.perf_counter())
+            self._stack.append(current)
+            self.spans.append(current)
+        try:
+            yield current
+        finally:
+            with self._lock:
+                current.duration = time.perf_counter() - current.started
+                if current in self._stack:
+                    self._stack.remove(current)
+                # Sayaçlar üst span'a (yoksa çalışma toplamına) aktarılır
+                parent = self._stack[-1].counters if self._stack else self.totals
+                for key, value in current.counters.items():
+                    parent[key] += value
+
+    def to_dict(self, ok):
+        record = {
+            'run_id': self.run_id,
+            'kind': self.kind,
+            'started_at': self.started_at.isoformat(),
+            'duration': round(time.perf_counter() - self.started, 4),
+            'ok': bool(ok),
+            'labels': self.labels,
+            'totals': {key: round(value, 4) if isinstance(value, float) else value
+                       for key, value in self.totals.items()},
+            'spans': [span.to_dict(self.started) for span in self.spans if span.duration is not None],
+        }
+        if self.launch is not None:
+            record['launch'] = dict(self.launch)
+        return record
+
+
+def enabled():
+    """Instrumentation açık mı.
+
+    Varsayılan kapalıdır: METRICS_ENABLED=1 veya METRICS_DIR verilirse açılır,
+    METRICS_ENABLED=0 her durumda kapatır.
+    """
+    flag = os.getenv('METRICS_ENABLED')
+    if flag:
+        return flag != '0'
+    return bool(os.getenv('METRICS_DIR'))
+
+
+def set_phase_hook(hook):
+    """Çalışma ve span'lara bağlanacak profilciyi ayarlar (None kaldırır)"""
+    global _phase_hook
+    _phase_hook = hook
+
+
+def start_run(kind='run', **labels):
+    """Yeni çalışma kaydını başlatır; kapalıysa None döner"""
+    global _recorder
+    _recorder = RunRecorder(kind, labels) if enabled() else None
+    if _phase_hook is not None:
+        _phase_hook.run_started(kind, _recorder.run_id if _recorder else uuid.uuid4().hex[:12])
+    return _recorder
+
+
+def finish_run(ok, calls=None, **labels):
+    """Aktif çalışmayı bitirir ve dosyalara yazar; kaydı sözlük olarak döndürür.
+
+    calls verilirse (DeviceProxy raporu) JSONL kaydına eklenir.
+    """
+    global _recorder
+    recorder, _recorder = _recorder, None
+    if _phase_hook is not None:
+        _phase_hook.run_finished()
+    if recorder is None:
+        return None
+    recorder.labels.update({key: value for key, value in labels.items() if value})
+    record = recorder.to_dict(ok)
+    if calls:
+        record['calls'] = calls
+    try:
+        _write(record)
+    except OSError as e:
+        print(f"  ⚠️  Metrikler yazılamadı: {e}")
+    return record
+
+
+@contextmanager
+def span(name):
+    """Aktif çalışmada bir faz span'ı açar (çalışma ve profilci yoksa hiçbir şey yapmaz)"""
+    recorder = _recorder
+    hook = _phase_hook
+    if recorder is None and hook is None:
+        yield None
+        return
+    with ExitStack() as stack:
+        current = stack.enter_context(recorder.span(name)) if recorder is not None else None
+        if hook is not None:
+            stack.enter_context(hook.phase(name))
+        yield current
+
+
+def count(counter, value=1):
+    """Aktif span'ın sayacını artırır (çalışma yoksa maliyeti tek bir kontrol)"""
+    recorder = _recorder
+    if recorder is not None:
+        recorder.count(counter, value)
+
+
+def record_launch(mode, launch_state=None, total_time_ms=None, ready_time_ms=None, screen=None):
+    """Uygulama açılışını aktif çalışmanın kaydına ekler (çalışma yoksa hiçbir şey yapmaz).
+
+    launch_state ve total_time_ms `am start -W` çıktısındaki LaunchState ve
+    TotalTime, ready_time_ms açılış isteğinden uygulamanın hazır olmasına
+    kadar geçen süredir.
+    """
+    recorder = _recorder
+    if recorder is not None:
+        recorder.launch = {'mode': mode, 'launch_state': launch_state, 'total_time_ms': total_time_ms,
+                           'ready_time_ms': ready_time_ms, 'screen': screen}
+
+
+def instrument_device(d):
+    """uiautomator2 cihazının JSON-RPC çağrılarını sayar (aynı cihaz iki kez sarılmaz)"""
+    original = getattr(d, 'jsonrpc_call', None)
+    if original is None or getattr(original, 'instrumented', False):
+        return d
+
+    def jsonrpc_call(method, params=None, timeout=10):
+        count('rpc')
+        return original(method, params, timeout)
+
+    jsonrpc_call.instrumented = True
+    d.jsonrpc_call = jsonrpc_call
+    return d
+
+
+def _metrics_dir():
+    return os.getenv('METRICS_DIR', DEFAULT_METRICS_DIR)
+
+
+def _write(record):
+    directory = _metrics_dir()
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    line = json.dumps(record, ensure_ascii=False) + '\n'
+    with _write_lock:
+        # Tek write çağrısı: aynı dosyaya yazan birden fazla süreç satırları karıştırmaz
+        with open(os.path.join(directory, 'runs.jsonl'), 'a', encoding='utf-8') as f:
+            f.write(line)
+        _write_prometheus(directory, record)
+
+
+def _write_prometheus(directory, record):
+    """node_exporter textfile collector için cihaz başına .prom dosyası yazar"""
+    global _last_launch
+    device = record['labels'].get('device') or record['labels'].get('token') or 'unknown'
+    for item in record['spans']:
+        _last_phases[item['name']] = item
+    if 'launch' in record:
+        _last_launch = record['launch']
+
+    base = {'device': device}
+    kind = dict(base, kind=record['kind'])
+    lines = []
+
+    def metric(name, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in samples:
+            label_text = ','.join(f'{key}="{_escape(value_)}"' for key, value_ in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}")
+
+    metric('sahibinden_run_duration_seconds', 'Son calismanin suresi',
+           [(kind, record['duration'])])
+    metric('sahibinden_run_success', 'Son calisma basarili mi (1/0)',
+           [(kind, 1 if record['ok'] else 0)])
+    metric('sahibinden_run_last_timestamp_seconds', 'Son calismanin bitis zamani',
+           [(kind, round(time.time(), 3))])
+    phases = sorted(_last_phases.items())
+    metric('sahibinden_phase_duration_seconds', 'Fazin son olculen suresi',
+           [(dict(base, phase=name), item['duration']) for name, item in phases])
+    for counter in COUNTERS:
+        metric(f'sahibinden_phase_{counter}', f'Fazin son olculen {counter} degeri',
+               [(dict(base, phase=name), item['counters'][counter]) for name, item in phases])
+
+    if _last_launch is not None:
+        launch = dict(base, mode=_last_launch['mode'], launch_state=_last_launch['launch_state'] or '')
+        if _last_launch['total_time_ms'] is not None:
+            metric('sahibinden_launch_total_time_seconds', 'Son acilisin am start TotalTime degeri',
+                   [(launch, _last_launch['total_time_ms'] / 1000)])
+        if _last_launch['ready_time_ms'] is not None:
+            metric('sahibinden_launch_ready_seconds', 'Son acilista uygulamanin hazir olma suresi',
+                   [(launch, _last_launch['ready_time_ms'] / 1000)])
+
+    safe_device = re.sub(r'[^A-Za-z0-9_.-]', '_', device)
+    path = os.path.join(directory, f'sahibinden_bot_{safe_device}.prom')
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    # Exporter yarım dosya okumasın diye atomik olarak değiştirilir
+    os.replace(tmp_path, path)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Çoklu cihaz orkestratörü
+Bağlı her Android cihaz için ayrı bir süreçte SahibindenBot çalıştırır.
+"""
+
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+from device import check_adb, get_connected_devices
+from database import close_db_pool, run_migration
+
+
+def load_device_tokens():
+    """DEVICE_TOKENS ortam değişkeninden seri numarası -> belirteç eşlemesini okur.
+
+    Format: "SERIAL1=token1,SERIAL2=token2"
+    """
+    tokens = {}
+    for pair in os.environ.get("DEVICE_TOKENS", "").split(","):
+        if "=" in pair:
+            serial, token = pair.split("=", 1)
+            if serial.strip() and token.strip():
+                tokens[serial.strip()] = token.strip()
+    return tokens
+
+
+def device_token_for(serial, tokens):
+    """Cihazın belirtecini döndürür (eşlemede yoksa seri numarasından türetilir)"""
+    if serial in tokens:
+        return tokens[serial]
+    return f"{os.environ.get('DEVICE_TOKEN_PREFIX', 'device-')}{serial}"
+
+
+def run_worker(serial, device_token, daemon=False):
+    """Tek bir cihaz için bot'u çalıştırır (ayrı süreçte)"""
+    from bot import SahibindenBot
+
+    # Orkestratörün sinyal işleyicileri fork ile miras kalır; worker varsayılana döner
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    bot = SahibindenBot(device_id=serial, device_token=device_token)
+    # Daemon modunda SIGTERM mevcut kategori bitince düzgün çıkış sağlar
+    success = bot.run_daemon() if daemon else bot.run()
+    sys.exit(0 if success else 1)
+
+
+class DeviceOrchestrator:
+    """Bağlı cihazları izler ve her cihaz için izole bir bot süreci yönetir"""
+
+    def __init__(self, poll_interval=5.0, watch=False, max_workers=None, lost_grace=2, daemon=False):
+        self.poll_interval = poll_interval
+        self.watch = watch  # True ise iş bitse de yeni cihazlar için beklemeye devam eder
+        self.max_workers = max_workers
+        self.lost_grace = lost_grace  # Cihaz kaç ardışık kontrolde görünmezse worker durdurulur
+        self.daemon = daemon  # True ise worker'lar kategorileri art arda işler
+        self.tokens = load_device_tokens()
+        self.workers = {}   # serial -> Process
+        self.results = {}   # serial -> son çıkış kodu
+        self.finished = set()  # Worker'ı kendiliğinden biten cihazlar
+        self.missing = {}   # serial -> ardışık görünmeme sayısı
+        self.stopping = False
+
+    def _start_worker(self, serial):
+        token = device_token_for(serial, self.tokens)
+        process = multiprocessing.Process(
+            target=run_worker,
+            args=(serial, token, self.daemon),
+            name=f"bot-{serial}",
+        )
+        process.start()
+        self.workers[serial] = process
+        self.missing.pop(serial, None)
+        print(f"✓ [{serial}] Worker başlatıldı (belirteç: {token}, pid: {process.pid})")
+
+    def _reap_workers(self):
+        """Biten worker'ların çıkış kodlarını toplar"""
+        for serial, process in list(self.workers.items()):
+            if not process.is_alive():
+                process.join()
+                self.results[serial] = process.exitcode
+                self.finished.add(serial)
+                del self.workers[serial]
+                status = "✓" if process.exitcode == 0 else "✗"
+                print(f"{status} [{serial}] Worker bitti (çıkış kodu: {process.exitcode})")
+
+    def _handle_lost_devices(self, devices):
+        """Bağlantısı kopan cihazların worker'larını durdurur"""
+        # Çıkarılıp tekrar takılan cihaz yeniden çalıştırılabilir
+        self.finished &= set(devices)
+        for serial, process in list(self.workers.items()):
+            if serial in devices:
+                self.missing.pop(serial, None)
+                continue
+            self.missing[serial] = self.missing.get(serial, 0) + 1
+            if self.missing[serial] >= self.lost_grace:
+                print(f"⚠️  [{serial}] Cihaz bağlantısı koptu, worker durduruluyor...")
+                process.terminate()
+                process.join(timeout=10)
+                self.results[serial] = process.exitcode if process.exitcode is not None else 1
+                del self.workers[serial]
+                self.missing.pop(serial, None)
+
+    def _start_new_workers(self, devices):
+        """Worker'ı olmayan yeni cihazlar için worker başlatır"""
+        for serial in devices:
+            if serial in self.workers:
+                continue
+            # İşini bitirmiş cihaz, çıkarılıp tekrar takılmadıkça yeniden başlatılmaz
+            if serial in self.finished:
+                continue
+            if self.max_workers and len(self.workers) >= self.max_workers:
+                break
+            self._start_worker(serial)
+
+    def stop(self, *_):
+        """Tüm worker'lara SIGTERM gönderir"""
+        self.stopping = True
+        for process in self.workers.values():
+            if process.is_alive():
+                process.terminate()
+
+    def run(self):
+        """Cihazları izleyerek worker'ları çalıştırır; tüm worker'lar başarılıysa True döner"""
+        print("=" * 50)
+        print("Sahibinden Çoklu Cihaz Orkestratörü")
+        print("=" * 50)
+
+        if not check_adb():
+            return False
+
+        # Migration bir kez burada; worker'larda şema güncel olduğu için tek sorgu kalır
+        if not run_migration():
+            print("⚠️  Veritabanı migration başarısız, devam ediliyor...")
+        # Havuzdaki bağlantılar fork ile worker'lara geçmemeli
+        close_db_pool()
+
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        while not self.stopping:
+            devices = get_connected_devices(verbose=False)
+            self._reap_workers()
+            self._handle_lost_devices(devices)
+            self._start_new_workers(devices)
+
+            if not self.workers and not self.watch:
+                if not devices and not self.results:
+                    print("✗ Bağlı cihaz bulunamadı!")
+                break
+
+            time.sleep(self.poll_interval)
+
+        for process in self.workers.values():
+            process.join()
+        self._reap_workers()
+
+        succeeded = [serial for serial, code in self.results.items() if code == 0]
+        failed = [serial for serial, code in self.results.items() if code != 0]
+        print("\n" + "=" * 50)
+        print(f"✓ {len(succeeded)} cihaz başarılı, ✗ {len(failed)} cihaz başarısız")
+        for serial in failed:
+            print(f"  ✗ {serial} (çıkış kodu: {self.results[serial]})")
+        print("=" * 50)
+        return bool(self.results) and not failed
+
+
+def main():
+    """Orkestratör giriş noktası"""
+    parser = argparse.ArgumentParser(description="Bağlı her cihaz için ayrı bir Sahibinden botu çalıştırır")
+    parser.add_argument("--watch", action="store_true",
+                        help="İşler bitse de yeni takılan cihazları beklemeye devam et")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Her worker kategorileri iş kalmayana kadar art arda işlesin")
+    parser.add_argument("--poll-interval", type=float, default=5.0,
+                        help="Cihaz listesi kontrol aralığı (saniye)")
+    parser.add_argument("--max-workers", type=int,
+                        default=int(os.environ.get("ORCHESTRATOR_MAX_WORKERS", "0")) or None,
+                        help="Aynı anda çalışacak en fazla worker sayısı")
+    args = parser.parse_args()
+
+    orchestrator = DeviceOrchestrator(
+        poll_interval=args.poll_interval,
+        watch=args.watch,
+        max_workers=args.max_workers,
+        daemon=args.daemon,
+    )
+    success = orchestrator.run()
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Profil modülü - bot fazlarını cProfile veya örnekleme profilcisiyle ölçüp faz başına dosyaya yazar
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+
+MODES = ('cprofile', 'sample')
+DEFAULT_PROFILE_DIR = 'profiles'
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+_configured = False
+
+
+class SamplingProfiler:
+    """Tüm thread'lerin yığınlarını düzenli aralıklarla örnekler (duvar saati).
+
+    Çıktı flamegraph.pl / speedscope'un okuduğu collapsed biçimindedir:
+    "thread;modül:fonksiyon;... örnek_sayısı". Uyuyan ve bekleyen kod da
+    örneklendiği için sleep ve ağ/alt süreç beklemeleri de görünür.
+    """
+
+    def __init__(self, interval=DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+        self._thread_names = {}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="profiler-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                module = os.path.splitext(os.path.basename(code.co_filename))[0]
+                stack.append(f"{module}:{getattr(code, 'co_qualname', code.co_name)}")
+                frame = frame.f_back
+            stack.append(self._thread_name(ident))
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def _thread_name(self, ident):
+        if ident not in self._thread_names:
+            self._thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        return self._thread_names.get(ident, f"thread-{ident}")
+
+    def write(self, path):
+        # Satırlar sıralı yazılır: iki çalışmanın dosyaları doğrudan diff'lenebilir
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f"{stack} {count}\n")
+
+
+class _Session:
+    """Tek bir fazın açık profilcileri"""
+
+    def __init__(self, name, modes, interval):
+        self.name = name
+        self.profile = cProfile.Profile() if 'cprofile' in modes else None
+        self.sampler = SamplingProfiler(interval) if 'sample' in modes else None
+
+    def start(self):
+        if self.sampler is not None:
+            self.sampler.start()
+        if self.profile is not None:
+            self.profile.enable()
+
+    def stop(self):
+        if self.profile is not None:
+            self.profile.disable()
+        if self.sampler is not None:
+            self.sampler.stop()
+
+    def write(self, base_path):
+        written = []
+        if self.profile is not None:
+            self.profile.dump_stats(f"{base_path}.pstats")
+            stream = io.StringIO()
+            stats = pstats.Stats(self.profile, stream=stream)
+            stats.strip_dirs().sort_stats('cumulative').print_stats(60)
+            with open(f"{base_path}.txt", 'w', encoding='utf-8') as f:
+                f.write(stream.getvalue())
+            written.append(f"{base_path}.pstats")
+        if self.sampler is not None:
+            self.sampler.write(f"{base_path}.collapsed")
+            written.append(f"{base_path}.collapsed")
+        return written
+
+
+class PhaseProfiler:
+    """instrumentation span'larına bağlanan faz profilcisi.
+
+    phases içindeki fazlar (veya 'all' ile hepsi, 'run' ile tüm çalışma)
+    profillenir. Profiller iç içe açılmaz: profillenen bir fazın içindeki
+    fazlar dıştaki fazın dosyasına dahildir. Her çalışma
+    <dizin>/<zaman>-<tür>-<run_id>/ klasörüne, her faz <faz>.pstats,
+    <faz>.txt (cProfile) ve <faz>.collapsed (örnekleme) olarak yazılır.
+    cProfile sadece fazı çalıştıran thread'i ölçer; arka plan thread'leri
+    örnekleme profilcisinde görünür.
+    """
+
+    def __init__(self, modes, phases, directory=DEFAULT_PROFILE_DIR, interval=DEFAULT_SAMPLE_INTERVAL):
+        self.modes = set(modes)
+        self.phases = set(phases)
+        self.directory = directory
+        self.interval = interval
+        self._run_dir = None
+        self._run_session = None
+        self._active = None
+        self._file_names = Counter()
+
+    def _wanted(self, name):
+        return name in self.phases or ('all' in self.phases and name != 'run')
+
+    def run_started(self, kind, run_id):
+        self._run_dir = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{kind}-{run_id}")
+        self._file_names = Counter()
+        if 'run' in self.phases:
+            self._run_session = self._start('run')
+
+    def run_finished(self):
+        session, self._run_session = self._run_session, None
+        if session is not None:
+            self._finish(session)
+        self._run_dir = None
+
+    @contextmanager
+    def phase(self, name):
+        if self._active is not None or not self._wanted(name):
+            yield
+            return
+        session = self._start(name)
+        try:
+            yield
+        finally:
+            self._finish(session)
+
+    def _start(self, name):
+        session = _Session(name, self.modes, self.interval)
+        self._active = session
+        session.start()
+        return session
+
+    def _finish(self, session):
+        session.stop()
+        self._active = None
+        # Aynı faz bir çalışmada birden fazla açılırsa dosyalar numaralanır (navigation, navigation-2)
+        self._file_names[session.name] += 1
+        count = self._file_names[session.name]
+        file_name = session.name if count == 1 else f"{session.name}-{count}"
+        directory = self._run_dir or os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-adhoc")
+        try:
+            os.makedirs(directory, exist_ok=True)
+            for path in session.write(os.path.join(directory, file_name)):
+                print(f"  ⊙ Profil yazıldı: {path}")
+        except OSError as e:
+            print(f"  ⚠️  Profil yazılamadı: {e}")
+
+
+def configure(mode=None, phases=None, directory=None, interval=None):
+    """Profilciyi kurar veya kaldırır.
+
+    mode: 'cprofile', 'sample' veya ikisi birden ("cprofile,sample"); boşsa
+    profil kapalıdır ve span'lara hiçbir şey eklenmez. phases: virgülle
+    ayrılmış faz adları, 'all' (tüm fazlar) veya 'run' (tüm çalışma, varsayılan).
+    interval verilmezse PROFILE_INTERVAL (varsayılan 5 ms) örnekleme aralığıdır.
+    """
+    from instrumentation import set_phase_hook
+
+    global _configured
+    _configured = True
+    modes = [item.strip() for item in (mode or "").split(",") if item.strip() and item.strip() != 'off']
+    unknown = [item for item in modes if item not in MODES]
+    if unknown:
+        print(f"  ⚠️  Bilinmeyen profil modu yok sayıldı: {', '.join(unknown)}")
+        modes = [item for item in modes if item in MODES]
+    if not modes:
+        set_phase_hook(None)
+        return None
+
+    phase_names = [item.strip() for item in (phases or "run").split(",") if item.strip()]
+    profiler = PhaseProfiler(
+        modes,
+        phase_names,
+        directory=directory or DEFAULT_PROFILE_DIR,
+        interval=interval or float(os.environ.get("PROFILE_INTERVAL") or DEFAULT_SAMPLE_INTERVAL),
+    )
+    set_phase_hook(profiler)
+    print(f"⊙ Profil açık: {', '.join(modes)} ({', '.join(phase_names)}) -> {profiler.directory}")
+    return profiler
+
+
+def configure_from_env():
+    """PROFILER, PROFILE_PHASES ve PROFILE_DIR'den kurar (bir kez)"""
+    if _configured:
+        return
+    configure(
+        mode=os.environ.get("PROFILER"),
+        phases=os.environ.get("PROFILE_PHASES"),
+        directory=os.environ.get("PROFILE_DIR"),
+    )
@@ -4,17 +4,37 @@ Sahibinden Mobilden Otomasyonu
 Bu script ADB kullanarak Android cihaza bağlanır ve Sahibinden uygulamasını açar.
 """
 
+import argparse
+import os
 import sys
 from bot import SahibindenBot
 
 
 def main():
     """Ana giriş noktası"""
+    parser = argparse.ArgumentParser(description="Sahibinden mobil otomasyonu")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Kategorileri iş kalmayana kadar tek oturumda art arda işle")
+    parser.add_argument("--max-iterations", type=int, default=None,
+                        help="Daemon modunda en fazla işlenecek kategori sayısı")
+    parser.add_argument("--profiler", default=os.environ.get("PROFILER"),
+                        help="Profil modu: cprofile, sample veya cprofile,sample (varsayılan kapalı)")
+    parser.add_argument("--profile-phases", default=os.environ.get("PROFILE_PHASES"),
+                        help="Profillenecek fazlar: run (tüm çalışma), all veya virgülle faz adları")
+    parser.add_argument("--profile-dir", default=os.environ.get("PROFILE_DIR"),
+                        help="Profil dosyalarının yazılacağı klasör (varsayılan profiles)")
+    args = parser.parse_args()
+
+    from profiling import configure
+    configure(mode=args.profiler, phases=args.profile_phases, directory=args.profile_dir)
+
     bot = SahibindenBot()
-    success = bot.run()
+    if args.daemon:
+        success = bot.run_daemon(max_iterations=args.max_iterations)
+    else:
+        success = bot.run()
     sys.exit(0 if success else 1)
 
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Ekran indeksi modülü - parse edilmiş ekran üzerinde metin, açıklama ve resource-id ile hızlı arama
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+from hierarchy_parser import parse_bounds
+
+
+# Eşleşen element: ekran sırası, Node, (x1, y1, x2, y2) ve tıklama koordinatı (alanı yoksa None)
+Match = namedtuple('Match', ['order', 'node', 'rect', 'center'])
+
+# Selector anahtarları (uiautomator2 isimleriyle):
+#   text, textFold, textContains, textContainsFold, description, descriptionContains,
+#   resourceId, className, clickable, scrollable
+SELECTOR_KEYS = {
+    'text', 'textFold', 'textContains', 'textContainsFold', 'description', 'descriptionContains',
+    'resourceId', 'className', 'clickable', 'scrollable',
+}
+
+_TURKISH_UPPER = str.maketrans({'İ': 'i', 'I': 'ı'})
+
+
+def turkish_fold(text):
+    """Türkçe kurallarıyla küçük harfe çevirir (İ -> i, I -> ı)"""
+    return (text or '').translate(_TURKISH_UPPER).lower()
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class ScreenIndex:
+    """Bir ekranın elementleri üzerinde sözlük tabanlı indeks.
+
+    Ekran başına bir kez kurulur. Tam metin, Türkçe küçük harfe çevrilmiş
+    metin, content-desc ve resource-id sözlüklerle doğrudan bulunur; metin
+    içinde arama (textContains) küçük harfli metinlerin üçlü harf (trigram)
+    indeksiyle adaylara indirilir. Sorgular uiautomator2 selector'larının
+    yerel karşılığıdır ve RPC yapmaz:
+
+        index.find(text="Tesla")
+        index.find(textContainsFold=("tüm", "tesla", "ilan"), clickable=True)
+        index.find(resourceId="com.sahibinden:id/rejectButton")
+
+    Birden fazla anahtar verilirse hepsi sağlanmalıdır; *Contains anahtarları
+    metin listesi de alabilir (hepsi geçmeli). Sonuçlar ekran sırasıyla,
+    bounds'ları parse edilmiş Match olarak döner.
+    """
+
+    def __init__(self, nodes):
+        self.nodes = list(nodes)
+        self._by_text = {}
+        self._by_fold = {}
+        self._by_description = {}
+        self._by_resource_id = {}
+        self._folded = {}  # sıra -> küçük harfli metin
+        self._trigram_index = None  # trigram -> sıra kümesi (ilk metin içinde aramada kurulur)
+        self._matches = {}  # sıra -> Match (bounds sadece sonuç olan elementler için parse edilir)
+        for order, node in enumerate(self.nodes):
+            if node.text:
+                folded = turkish_fold(node.text)
+                self._folded[order] = folded
+                self._by_text.setdefault(node.text, []).append(order)
+                self._by_fold.setdefault(folded, []).append(order)
+            if node.content_desc:
+                self._by_description.setdefault(node.content_desc, []).append(order)
+            if node.resource_id:
+                self._by_resource_id.setdefault(node.resource_id, []).append(order)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    @property
+    def _trigrams(self):
+        if self._trigram_index is None:
+            index = {}
+            for order, folded in self._folded.items():
+                for trigram in _trigrams(folded):
+                    index.setdefault(trigram, set()).add(order)
+            self._trigram_index = index
+        return self._trigram_index
+
+    def match(self, order):
+        """Sıradaki elementin Match'ini döndürür (bounds bir kez parse edilir)"""
+        match = self._matches.get(order)
+        if match is None:
+            node = self.nodes[order]
+            rect = parse_bounds(node.bounds)
+            center = None
+            if rect and rect[2] > rect[0] and rect[3] > rect[1]:
+                center = ((rect[0] + rect[2]) // 2, (rect[1] + rect[3]) // 2)
+            match = self._matches[order] = Match(order, node, rect, center)
+        return match
+
+    def select(self, **selector):
+        """Selector'a uyan tüm elementleri ekran sırasıyla döndürür"""
+        return list(self._iter(selector))
+
+    def find(self, **selector):
+        """Selector'a uyan, tıklanabilir alanı olan ilk elementi döndürür; yoksa None"""
+        for match in self._iter(selector):
+            if match.center:
+                return match
+        return None
+
+    def _iter(self, selector):
+        items = tuple((name, _hashable(value)) for name, value in selector.items())
+        lookup, key, contains, contains_fold, trigrams, checks = _compile(
+            items if len(items) == 1 else tuple(sorted(items))
+        )
+        if lookup is not None:
+            candidates = getattr(self, lookup).get(key, ())
+        elif trigrams:
+            # En az elemanlı trigram'ın adayları doğrulanır
+            candidates = min((self._trigrams.get(trigram, ()) for trigram in trigrams), key=len)
+            candidates = sorted(candidates) if candidates else ()
+        elif contains or contains_fold:
+            # Üç harften kısa aramalar sadece metni olan elementlerde taranır
+            candidates = self._folded
+        else:
+            candidates = range(len(self.nodes))
+
+        for order in candidates:
+            node = self.nodes[order]
+            if contains and not all(part in node.text for part in contains):
+                continue
+            if contains_fold:
+                folded = self._folded.get(order, '')
+                if not all(part in folded for part in contains_fold):
+                    continue
+            if checks and not all(_check(node, self._folded, order, name, value) for name, value in checks):
+                continue
+            yield self.match(order)
+
+
+@lru_cache(maxsize=256)
+def _compile(items):
+    """Selector'ı bir kez çözümler: (indeks, anahtar, contains, küçük harfli contains, trigram'lar, diğer koşullar)"""
+    selector = dict(items)
+    unknown = sorted(set(selector) - SELECTOR_KEYS)
+    if unknown:
+        raise ValueError(f"Bilinmeyen selector anahtarı: {', '.join(unknown)}")
+    lookup = key = None
+    for name, index_name, normalize in _LOOKUPS:
+        if name in selector:
+            lookup, key = index_name, normalize(selector[name])
+            break
+    contains = _as_tuple(selector.get('textContains'))
+    contains_fold = tuple(turkish_fold(part) for part in _as_tuple(selector.get('textContainsFold')))
+    trigrams = set()
+    for part in contains + contains_fold:
+        trigrams |= _trigrams(turkish_fold(part))
+    checks = tuple(
+        (name, turkish_fold(value) if name == 'textFold' else value)
+        for name, value in items
+        if name not in ('textContains', 'textContainsFold') and name != _LOOKUP_KEYS.get(lookup)
+    )
+    return lookup, key, contains, contains_fold, tuple(trigrams), checks
+
+
+# Aday kümesini doğrudan veren indeksler (öncelik sırasıyla): selector anahtarı, indeks, normalleştirme
+_LOOKUPS = (
+    ('text', '_by_text', str),
+    ('resourceId', '_by_resource_id', str),
+    ('description', '_by_description', str),
+    ('textFold', '_by_fold', turkish_fold),
+)
+_LOOKUP_KEYS = {index_name: name for name, index_name, _ in _LOOKUPS}
+
+
+def _check(node, folded, order, key, value):
+    """Selector anahtarının (metin içinde arama dışındaki) koşulunu değerlendirir"""
+    if key == 'text':
+        return node.text == value
+    if key == 'textFold':
+        return folded.get(order) == value
+    if key == 'description':
+        return node.content_desc == value
+    if key == 'descriptionContains':
+        return all(part in node.content_desc for part in _as_tuple(value))
+    if key == 'resourceId':
+        return node.resource_id == value
+    if key == 'className':
+        return node.class_name == value
+    if key == 'clickable':
+        return node.clickable == bool(value)
+    return node.scrollable == bool(value)
+
+
+def _hashable(value):
+    return tuple(value) if isinstance(value, list) else value
+
+
+def _as_tuple(value):
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        return (value,)
+    return tuple(value)
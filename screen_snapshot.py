@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Ekran görüntüsü (snapshot) modülü - hierarchy'yi ekran durumu başına bir kez alır
+"""
+
+import time
+import zlib
+
+from hierarchy_parser import bounds_center, parse_nodes
+from instrumentation import count
+from screen_index import ScreenIndex
+from timing import get_timing_policy
+
+
+def dump_hierarchy(d):
+    """Hierarchy dump'ı alır ve instrumentation'da dump olarak sayar"""
+    xml_content = d.dump_hierarchy()
+    count('dumps')
+    count('bytes_dumped', len(xml_content.encode('utf-8')))
+    return xml_content
+
+
+def wait_for_idle(d, min_wait=0.3, max_wait=3.0, interval=0.2, clock=None):
+    """UI sakinleşene kadar bekler.
+
+    En az min_wait kadar bekler, ardından hierarchy'nin parmak izini (crc32)
+    art arda iki okumada aynı olana kadar yoklar. En fazla max_wait kadar
+    bekler. Son okunan XML'i döndürür (hata durumunda None). clock
+    verilmezse varsayılan zamanlama politikasının saati kullanılır.
+    """
+    clock = clock or get_timing_policy().clock
+    start = clock.now()
+    clock.sleep(min_wait)
+    last_fingerprint = None
+    try:
+        while True:
+            xml_content = d.dump_hierarchy()
+            encoded = xml_content.encode('utf-8')
+            count('dumps')
+            count('bytes_dumped', len(encoded))
+            fingerprint = zlib.crc32(encoded)
+            if fingerprint == last_fingerprint:
+                return xml_content
+            last_fingerprint = fingerprint
+            if clock.now() - start >= max_wait:
+                return xml_content
+            clock.sleep(interval)
+    except Exception:
+        # Dump alınamazsa sabit bekleme gibi davran
+        remaining = max_wait - (clock.now() - start)
+        if remaining > 0:
+            clock.sleep(remaining)
+        return None
+
+
+class ScreenSnapshot:
+    """Ekranın tek bir durumunu temsil eder.
+
+    Hierarchy dump'ı ve parse işlemi ilk ihtiyaç anında bir kez yapılır, aynı
+    ekran durumundaki tüm sorular (navigasyon başlığı, kategori metinleri,
+    tıklanabilir elementler) bu tek parse üzerinden cevaplanır. Swipe veya
+    click yapıldığında snapshot otomatik olarak geçersiz olur. Beklemeler
+    timing (TimingPolicy; verilmezse cihazın politikası) üzerinden yapılır.
+    """
+
+    def __init__(self, d, timing=None):
+        self.d = d  # uiautomator2 device instance
+        self.timing = timing or get_timing_policy(d)
+        self._xml = None
+        self._cache = {}
+
+    def invalidate(self):
+        """Ekran durumu değişti - bir sonraki soruda yeni dump alınır"""
+        self._xml = None
+        self._cache = {}
+
+    def settle(self, wait='post_swipe'):
+        """İsimli sakinleşme beklemesiyle UI sakinleşene kadar bekler; son okunan XML
+        bu snapshot'ın durumu olur"""
+        self.invalidate()
+        self._xml = self.timing.wait_for_idle(self.d, wait)
+        return self
+
+    @property
+    def xml(self):
+        """Bu ekran durumunun hierarchy XML'i (henüz dump alınmadıysa None)"""
+        return self._xml
+
+    def freeze(self):
+        """Mevcut ekran durumunun swipe/click ile geçersiz olmayan kopyasını döndürür.
+
+        Kopya başka bir thread'de parse edilebilir; bu sırada asıl snapshot
+        bir sonraki ekran için kullanılmaya devam eder.
+        """
+        frozen = ScreenSnapshot(self.d, timing=self.timing)
+        frozen._xml = self._xml if self._xml is not None else dump_hierarchy(self.d)
+        frozen._cache = dict(self._cache)
+        return frozen
+
+    def raw_contains(self, text):
+        """Metnin ham XML'de (küçük harfle) geçip geçmediğini parse etmeden döndürür"""
+        return self._xml is not None and text in self._xml.lower()
+
+    def same_dump(self, other):
+        """İki snapshot'ın aynı hierarchy dump'ına sahip olup olmadığını döndürür"""
+        return other is not None and self._xml is not None and self._xml == other._xml
+
+    def _cached(self, key, compute):
+        """Aynı ekran durumu için hesaplanan sonucu saklar"""
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def has_navigation_header(self):
+        """Ekranda 'Navigasyon Cihazı' başlığı olup olmadığını döndürür"""
+        from category_reader import is_navigation_device_header
+
+        def compute():
+            for node in self.nodes():
+                if node.text and is_navigation_device_header(node.text):
+                    return True
+                if node.content_desc and is_navigation_device_header(node.content_desc):
+                    return True
+            return False
+
+        try:
+            return self._cached('navigation_header', compute)
+        except Exception:
+            # Hata durumunda False döndür (güvenli taraf)
+            return False
+
+    def category_texts(self):
+        """Ekrandaki kategori metinlerini döndürür"""
+        from category_reader import categories_from_nodes
+
+        try:
+            return self._cached('category_texts', lambda: categories_from_nodes(self.nodes()))
+        except Exception as e:
+            print(f"  ⚠️  XML parse sırasında hata: {e}")
+            return set()
+
+    def nodes(self):
+        """Ekrandaki tüm elementleri Node listesi olarak döndürür (gerekirse dump alır)"""
+        def compute():
+            xml_content = self._xml if self._xml is not None else dump_hierarchy(self.d)
+            started = time.perf_counter()
+            nodes = parse_nodes(xml_content)
+            count('parse_seconds', time.perf_counter() - started)
+            return nodes
+
+        try:
+            return self._cached('nodes', compute)
+        except Exception as e:
+            print(f"  ⚠️  XML parse sırasında hata: {e}")
+            return []
+
+    @property
+    def index(self):
+        """Bu ekran durumunun ScreenIndex'i (ilk ihtiyaçta bir kez kurulur)"""
+        return self._cached('index', lambda: ScreenIndex(self.nodes()))
+
+    def clickable_nodes(self):
+        """Tıklanabilir elementlerin listesini döndürür"""
+        return [node for node in self.nodes() if node.clickable]
+
+    def find(self, strategies):
+        """Eşleşme stratejilerini sırayla yerel olarak değerlendirir.
+
+        strategies: (etiket, selector) listesi. selector ScreenIndex sorgusu
+        (ör. {'text': 'Tesla'}) ya da Node alan bir predicate olabilir.
+        Tıklanabilir alanı olan ilk eşleşme (etiket, node) olarak döner.
+        Hiçbiri eşleşmezse None döner.
+        """
+        for label, selector in strategies:
+            if callable(selector):
+                for node in self.nodes():
+                    if selector(node) and bounds_center(node.bounds):
+                        return label, node
+                continue
+            match = self.index.find(**selector)
+            if match:
+                return label, match.node
+        return None
+
+    def click_node(self, node):
+        """Elementin bounds merkezine tıklar"""
+        x, y = bounds_center(node.bounds)
+        return self.click(x, y)
+
+    def swipe(self, fx, fy, tx, ty, duration=None):
+        """Swipe yapar ve snapshot'ı geçersiz kılar"""
+        self.invalidate()
+        return self.d.swipe(fx, fy, tx, ty, duration=duration)
+
+    def swipe_points(self, points, duration=0.5):
+        """Noktalar üzerinden swipe yapar ve snapshot'ı geçersiz kılar"""
+        self.invalidate()
+        return self.d.swipe_points(points, duration=duration)
+
+    def click(self, x, y):
+        """Koordinata tıklar ve snapshot'ı geçersiz kılar"""
+        self.invalidate()
+        return self.d.click(x, y)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Scroll planlama modülü - swipe mesafesini ekrandaki satır yüksekliğine göre hesaplar
+"""
+
+import zlib
+
+from hierarchy_parser import parse_bounds
+
+
+_window_sizes = {}  # cihaz -> (genişlik, yükseklik), oturum boyunca bir kez sorulur
+
+
+def cached_window_size(d):
+    """Ekran boyutunu döndürür (cihaz başına bir kez sorulur)"""
+    device_key = getattr(d, 'serial', None) or id(d)
+    if device_key not in _window_sizes:
+        _window_sizes[device_key] = tuple(d.window_size())
+    return _window_sizes[device_key]
+
+
+class ScrollPlanner:
+    """Bir listeyi satır atlamadan en az swipe ile gezmek için swipe planlar.
+
+    Scroll edilebilir container'ın görünür alanı (viewport) ve satır
+    yüksekliği snapshot'taki bounds'lardan ölçülür. Swipe mesafesi viewport
+    yüksekliğinden bir buçuk satır eksiktir: ekranın altında yarım kalan
+    satır bir sonraki ekranda tamamen görünür. Parmak hedefte kısa süre
+    bekletilip kaldırılır, böylece fling olmaz ve liste sadece sürüklenen
+    kadar kayar. Ölçüm yapılamazsa eski sabit swipe (ekranın %60'ından
+    %30'una) kullanılır.
+    """
+
+    def __init__(self, d, duration=0.35):
+        self.d = d  # uiautomator2 device instance
+        self.duration = duration  # Sürükleme ve bekleme kısımlarının her birinin süresi
+        self._distance_factor = 1.0  # Satır atlandığı görülürse küçültülür
+        self._anchor = None  # Son swipe öncesi en alttaki tam görünen satırın metni
+        self._gesture = None  # Son planlanan swipe: (x, start_y, end_y, hold)
+
+    def measure(self, snapshot):
+        """Container'ın bounds'unu ve satır yüksekliğini döndürür; ölçülemezse None"""
+        nodes = snapshot.nodes()
+        container = find_scroll_container(nodes)
+        if container is None:
+            return None
+
+        x1, y1, x2, y2 = container
+        viewport = y2 - y1
+        row_heights = []
+        for node in nodes:
+            if not node.clickable:
+                continue
+            rect = parse_bounds(node.bounds)
+            if not rect or rect == container:
+                continue
+            # Sadece container içindeki satırlar (kenarlarda kırpılmış satırlar daha kısa görünür)
+            if rect[0] >= x1 and rect[2] <= x2 and rect[1] >= y1 and rect[3] <= y2:
+                height = rect[3] - rect[1]
+                if 0 < height < viewport // 2:
+                    row_heights.append(height)
+        if not row_heights:
+            return None
+        # En uzun satır esas alınır (güvenli taraf)
+        return container, max(row_heights)
+
+    def plan(self, snapshot, measured=None):
+        """Snapshot için swipe'ı planlar: (x, start_y, end_y, hold)"""
+        measured = measured or self.measure(snapshot)
+        if measured:
+            (x1, y1, x2, y2), row_height = measured
+            viewport = y2 - y1
+            edge = max(10, viewport // 20)  # Parmak container'ın kenarına değmesin
+            distance = int((viewport - 1.5 * row_height) * self._distance_factor)
+            distance = min(distance, viewport - 2 * edge)
+            if distance >= row_height:
+                start_y = y2 - edge
+                self._gesture = ((x1 + x2) // 2, start_y, start_y - distance, True)
+                return self._gesture
+
+        # Ölçülemedi - eski sabit swipe
+        width, height = cached_window_size(self.d)
+        self._gesture = (width // 2, int(height * 0.6), int(height * 0.3), False)
+        return self._gesture
+
+    def _perform(self, snapshot, gesture):
+        x, start_y, end_y, hold = gesture
+        if hold:
+            # Son nokta tekrarlanır: parmak hedefte bekler, kaldırıldığında hız sıfırdır
+            snapshot.swipe_points([(x, start_y), (x, end_y), (x, end_y)], duration=self.duration)
+        else:
+            snapshot.swipe(x, start_y, x, end_y, duration=0.5)
+
+    def observe(self, snapshot):
+        """Ekranı ölçer: satır atlandıysa mesafeyi kısaltır ve sonraki swipe'ı planlar"""
+        self._check_overshoot(snapshot)
+        measured = self.measure(snapshot)
+        gesture = self.plan(snapshot, measured)
+        self._anchor = _bottom_row_text(snapshot, measured)
+        return gesture
+
+    def perform(self, snapshot):
+        """Son planlanan swipe'ı yapar (snapshot geçersiz olur)"""
+        self._perform(snapshot, self._gesture or self.plan(snapshot))
+
+    def swipe(self, snapshot):
+        """Mevcut ekrana göre planlanan swipe'ı yapar (snapshot geçersiz olur)"""
+        self._perform(snapshot, self.observe(snapshot))
+
+    def repeat(self, snapshot, count=1):
+        """Son planlanan swipe'ı ara ölçüm yapmadan count kez tekrarlar"""
+        self._anchor = None
+        for _ in range(count):
+            self.perform(snapshot)
+
+    def _check_overshoot(self, snapshot):
+        """Bir önceki swipe öncesi en alttaki satır artık görünmüyorsa mesafeyi kısaltır"""
+        if not self._anchor:
+            return
+        if not any(node.text == self._anchor for node in snapshot.nodes()):
+            self._distance_factor = max(0.4, self._distance_factor * 0.75)
+            print(f"  ⚠️  Swipe satır atlamış olabilir, mesafe kısaltıldı (x{self._distance_factor:.2f})")
+        self._anchor = None
+
+
+class ListEndDetector:
+    """Swipe'ın listeyi artık kaydırmadığını anlayarak liste sonunu tespit eder.
+
+    Her swipe sonrası scroll edilebilir container'daki node'ların metin ve
+    bounds'larından bir parmak izi çıkarılır. Parmak izi bir önceki ekranla
+    aynıysa ya da en alttaki öğe yerinden oynamadıysa liste sonuna
+    gelinmiştir; bu durum confirmations kez görülünce update() True döner.
+    """
+
+    def __init__(self, confirmations=1):
+        self.confirmations = confirmations  # Liste sonu için gereken değişmeyen swipe sayısı
+        self._previous = None  # Son ekranın (parmak izi, en alttaki öğe)
+        self._unchanged = 0
+
+    def update(self, snapshot):
+        """Yeni ekranı kaydeder; liste sonuna gelindiyse True döndürür"""
+        current = list_fingerprint(snapshot)
+        if self._previous is not None and (
+            current[0] == self._previous[0]
+            or (current[1] is not None and current[1] == self._previous[1])
+        ):
+            self._unchanged += 1
+        else:
+            self._unchanged = 0
+        self._previous = current
+        return self._unchanged >= self.confirmations
+
+
+def find_scroll_container(nodes):
+    """En büyük scroll edilebilir alanın bounds'unu döndürür (ana liste); yoksa None"""
+    container = None
+    for node in nodes:
+        if not node.scrollable:
+            continue
+        rect = parse_bounds(node.bounds)
+        if not rect or rect[2] <= rect[0] or rect[3] <= rect[1]:
+            continue
+        if container is None or _area(rect) > _area(container):
+            container = rect
+    return container
+
+
+def list_fingerprint(snapshot):
+    """Container içeriğinin parmak izini ve en alttaki öğeyi döndürür: (crc, (metin, bounds))"""
+    nodes = snapshot.nodes()
+    container = find_scroll_container(nodes)
+    crc = 0
+    last_item, last_top = None, -1
+    for node in nodes:
+        rect = parse_bounds(node.bounds)
+        if container and not (rect and rect[1] >= container[1] and rect[3] <= container[3]):
+            continue
+        label = node.text or node.content_desc
+        crc = zlib.crc32(f"{label}|{node.bounds}\n".encode('utf-8'), crc)
+        if label and rect and rect[1] > last_top:
+            last_item, last_top = (label, node.bounds), rect[1]
+    return crc, last_item
+
+
+def _area(rect):
+    return (rect[2] - rect[0]) * (rect[3] - rect[1])
+
+
+def _bottom_row_text(snapshot, measured):
+    """Container'da tamamen görünen en alttaki metni döndürür"""
+    if not measured:
+        return None
+    (x1, y1, x2, y2), _ = measured
+    bottom_text, bottom_y = None, -1
+    for node in snapshot.nodes():
+        if not node.text:
+            continue
+        rect = parse_bounds(node.bounds)
+        if rect and rect[1] >= y1 and rect[3] <= y2 and rect[1] > bottom_y:
+            bottom_text, bottom_y = node.text, rect[1]
+    return bottom_text
@@ -0,0 +1,98 @@
+"""
+Test ayarları - modüller depo kökünden import edilir.
+
+Veritabanı testleri yerel bir PostgreSQL'e bağlanır: TEST_DB_HOST, TEST_DB_PORT,
+TEST_DB_NAME, TEST_DB_USER ve TEST_DB_PASSWORD (varsayılan localhost:5432/postgres).
+TEST_DB_HOST verilmemişse ve varsayılan sunucuya ulaşılamazsa, `pgserver` paketi
+kuruluysa geçici bir PostgreSQL başlatılır (test oturumu bitince silinir).
+Testler her seferinde silinip yeniden oluşturulan ayrı bir şemada çalışır;
+veritabanı yoksa atlanır.
+"""
+
+import os
+import sys
+
+import psycopg2
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+
+
+TEST_SCHEMA = 'shb_claim_test'
+
+
+def _test_db_config():
+    return dict(
+        host=os.getenv('TEST_DB_HOST', 'localhost'),
+        port=os.getenv('TEST_DB_PORT', '5432'),
+        database=os.getenv('TEST_DB_NAME', 'postgres'),
+        user=os.getenv('TEST_DB_USER', 'postgres'),
+        password=os.getenv('TEST_DB_PASSWORD', ''),
+    )
+
+
+def _reachable(config):
+    try:
+        psycopg2.connect(connect_timeout=3, **config).close()
+        return True
+    except psycopg2.OperationalError:
+        return False
+
+
+@pytest.fixture(scope='session')
+def postgres_config(tmp_path_factory):
+    """Testlerin bağlanacağı PostgreSQL ayarları (gerekirse geçici sunucu başlatılır)"""
+    config = _test_db_config()
+    if os.getenv('TEST_DB_HOST') or _reachable(config):
+        yield config
+        return
+    try:
+        import pgserver
+    except ImportError:
+        yield config  # db fixture'ı bağlanamayınca testi atlar
+        return
+    server = pgserver.get_server(tmp_path_factory.mktemp('pgdata'), cleanup_mode='delete')
+    info = server.get_postmaster_info()
+    try:
+        yield dict(host=str(info.socket_dir), port=str(info.port), database='postgres', user='postgres', password='')
+    finally:
+        server.cleanup()
+
+
+@pytest.fixture
+def db(monkeypatch, postgres_config):
+    """Boş test şemasına bağlı yönetici bağlantısı; bot modülleri de bu şemayı kullanır"""
+    config = postgres_config
+    try:
+        admin = psycopg2.connect(connect_timeout=3, **config)
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL'e ulaşılamadı: {e}")
+    admin.autocommit = True
+    cursor = admin.cursor()
+    cursor.execute(f"DROP SCHEMA IF EXISTS {TEST_SCHEMA} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {TEST_SCHEMA}")
+    cursor.execute(f"SET search_path TO {TEST_SCHEMA}")
+
+    for key, env in (('host', 'DB_HOST'), ('port', 'DB_PORT'), ('database', 'DB_NAME'),
+                     ('user', 'DB_USER'), ('password', 'DB_PASSWORD')):
+        monkeypatch.setenv(env, config[key])
+    # Havuzun bağlantıları da (libpq) sadece test şemasını görür
+    monkeypatch.setenv('PGOPTIONS', f'-c search_path={TEST_SCHEMA}')
+    monkeypatch.setenv('DB_POOL_MAX', '60')
+    monkeypatch.setenv('METRICS_ENABLED', '0')
+    database.close_db_pool()
+    try:
+        yield cursor
+    finally:
+        database.close_db_pool()
+        cursor.execute(f"DROP SCHEMA IF EXISTS {TEST_SCHEMA} CASCADE")
+        admin.close()
+
+
+@pytest.fixture
+def migrated(db):
+    """Güncel şemaya migrate edilmiş test şeması"""
+    assert database.run_migration()
+    return db
@@ -0,0 +1,272 @@
+"""
+adb_transport testleri - adb host protokolünü konuşan yerel sahte sunucuya karşı
+"""
+
+import socket
+import subprocess
+import threading
+import time
+
+import pytest
+
+import adb_transport
+from adb_transport import AdbTransport
+
+
+SERIAL = 'emulator-5554'
+
+
+class FakeAdbServer:
+    """adb sunucusunun host protokolünü konuşan thread'li sahte sunucu.
+
+    host:version, host:devices, host:transport:<serial>, tek seferlik
+    shell:<komut> ve açık tutulan shell,raw: servislerini cevaplar. Shell
+    komutları yerel `sh` ile çalıştırılır.
+    """
+
+    def __init__(self, devices=None, raw_shell=True, port=0):
+        self.devices = devices if devices is not None else {SERIAL: 'device'}
+        self.raw_shell = raw_shell
+        self.requests = []
+        self.connections = 0
+        self._sessions = []
+        self._lock = threading.Lock()
+        self._server = socket.socket()
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(('127.0.0.1', port))
+        self._server.listen(16)
+        self.port = self._server.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            with self._lock:
+                self.connections += 1
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        stream = conn.makefile('rb')
+        try:
+            while True:
+                length = stream.read(4)
+                if not length:
+                    return
+                request = stream.read(int(length, 16)).decode()
+                with self._lock:
+                    self.requests.append(request)
+                if request == 'host:version':
+                    conn.sendall(b'OKAY' + _message('0029'))
+                    return
+                if request == 'host:devices':
+                    body = ''.join(f"{serial}\t{state}\n" for serial, state in self.devices.items())
+                    conn.sendall(b'OKAY' + _message(body))
+                    return
+                if request.startswith('host:transport:'):
+                    serial = request.split(':', 2)[2]
+                    if serial not in self.devices:
+                        conn.sendall(b'FAIL' + _message(f"device '{serial}' not found"))
+                        return
+                    conn.sendall(b'OKAY')
+                    continue
+                if request.startswith('shell:'):
+                    result = subprocess.run(['sh', '-c', request[6:]], stdout=subprocess.PIPE,
+                                            stderr=subprocess.STDOUT)
+                    conn.sendall(b'OKAY' + result.stdout)
+                    return
+                if request == 'shell,raw:' and self.raw_shell:
+                    conn.sendall(b'OKAY')
+                    self._raw_shell(conn)
+                    return
+                conn.sendall(b'FAIL' + _message('closed'))
+                return
+        finally:
+            stream.close()
+            conn.close()
+
+    def _raw_shell(self, conn):
+        process = subprocess.Popen(['sh'], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT)
+        with self._lock:
+            self._sessions.append((conn, process))
+
+        def pump_output():
+            while True:
+                data = process.stdout.read1(65536)
+                if not data:
+                    return
+                try:
+                    conn.sendall(data)
+                except OSError:
+                    return
+
+        output = threading.Thread(target=pump_output, daemon=True)
+        output.start()
+        try:
+            while True:
+                data = conn.recv(65536)
+                if not data:
+                    break
+                process.stdin.write(data)
+                process.stdin.flush()
+        except OSError:
+            pass
+        finally:
+            process.kill()
+            process.wait()
+
+    def drop_sessions(self):
+        """Açık shell oturumlarını sunucu tarafında kapatır (cihaz yeniden bağlanmış gibi)"""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for conn, process in sessions:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            process.kill()
+
+    def count(self, request):
+        with self._lock:
+            return self.requests.count(request)
+
+    def close(self):
+        self._server.close()
+        self.drop_sessions()
+
+
+def _message(text):
+    data = text.encode()
+    return b'%04x' % len(data) + data
+
+
+@pytest.fixture
+def server():
+    fake = FakeAdbServer()
+    yield fake
+    fake.close()
+
+
+@pytest.fixture
+def transport(server):
+    adb = AdbTransport(port=server.port)
+    yield adb
+    adb.close()
+
+
+def _free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def test_version_and_devices(server, transport):
+    server.devices['R58'] = 'offline'
+    assert transport.version() == 0x29
+    assert transport.devices() == [SERIAL]
+
+
+def test_shell_commands_share_one_connection(server, transport):
+    assert transport.shell(SERIAL, 'echo hello') == 'hello\n'
+    assert transport.shell(SERIAL, 'printf abc') == 'abc'
+    assert transport.shell(SERIAL, 'echo hata >&2') == 'hata\n'
+    assert transport.shell(SERIAL, 'exit 3') == ''
+    assert transport.shell(SERIAL, 'echo after') == 'after\n'
+
+    assert server.count(f'host:transport:{SERIAL}') == 1
+    assert server.count('shell,raw:') == 1
+    # ensure_server'ın sürüm kontrolü + tek shell oturumu
+    assert server.connections == 2
+
+
+def test_session_output_matches_one_shot_shell(server, transport):
+    one_shot = AdbTransport(port=server.port, persistent_shell=False)
+    cmd = 'printf "a\\nb\\n"; echo c; printf "son"'
+    assert transport.shell(SERIAL, cmd) == one_shot.shell(SERIAL, cmd) == 'a\nb\nc\nson'
+    assert server.count(f'shell:{cmd}') == 1
+
+
+def test_shell_timeout_closes_the_session(server, transport):
+    assert transport.shell(SERIAL, 'echo ok') == 'ok\n'
+
+    started = time.monotonic()
+    with pytest.raises(socket.timeout):
+        transport.shell(SERIAL, 'sleep 5', timeout=0.3)
+    assert time.monotonic() - started < 2
+
+    # Zaman aşımına uğrayan komutun çıktısı sonraki komuta karışmaz
+    assert transport.shell(SERIAL, 'echo next') == 'next\n'
+    assert server.count('shell,raw:') == 2
+
+
+def test_missing_device(server, transport):
+    with pytest.raises(RuntimeError, match="not found"):
+        transport.shell('yok-1234', 'echo hi')
+
+    one_shot = AdbTransport(port=server.port, persistent_shell=False)
+    with pytest.raises(RuntimeError, match="not found"):
+        one_shot.shell('yok-1234', 'echo hi')
+
+
+def test_no_device_connected():
+    fake = FakeAdbServer(devices={})
+    try:
+        with pytest.raises(RuntimeError, match="Bağlı cihaz bulunamadı"):
+            AdbTransport(port=fake.port).device()
+    finally:
+        fake.close()
+
+
+def test_dropped_session_is_reopened(server, transport):
+    assert transport.shell(SERIAL, 'echo first') == 'first\n'
+    server.drop_sessions()
+    time.sleep(0.1)
+
+    assert transport.shell(SERIAL, 'echo second') == 'second\n'
+    assert server.count('shell,raw:') == 2
+
+
+def test_falls_back_to_one_shot_shell():
+    fake = FakeAdbServer(raw_shell=False)
+    adb = AdbTransport(port=fake.port)
+    try:
+        assert adb.shell(SERIAL, 'echo hi') == 'hi\n'
+        assert adb.shell(SERIAL, 'echo again') == 'again\n'
+        # Desteklenmeyen oturum bir kez denenir
+        assert fake.count('shell,raw:') == 1
+        assert fake.count('shell:echo again') == 1
+    finally:
+        fake.close()
+
+
+def test_ensure_server_starts_adb_server(monkeypatch):
+    port = _free_port()
+    started = []
+
+    def start_server(args, **kwargs):
+        started.append(args)
+        started.append(FakeAdbServer(port=port))
+        return subprocess.CompletedProcess(args, 0)
+
+    monkeypatch.setattr(adb_transport.subprocess, 'run', start_server)
+    adb = AdbTransport(port=port)
+    try:
+        assert adb.version() == 0x29
+        assert adb.shell(SERIAL, 'echo up') == 'up\n'
+        # Sunucu bir kez başlatılır
+        adb.ensure_server()
+        assert started[0] == ['adb', '-P', str(port), 'start-server']
+        assert len(started) == 2
+    finally:
+        adb.close()
+        for item in started[1:]:
+            item.close()
+
+
+def test_ensure_server_does_not_start_a_running_server(server, monkeypatch):
+    monkeypatch.setattr(adb_transport.subprocess, 'run',
+                        lambda *args, **kwargs: pytest.fail("adb start-server çağrılmamalı"))
+    assert AdbTransport(port=server.port).shell(SERIAL, 'echo hi') == 'hi\n'
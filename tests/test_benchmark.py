@@ -0,0 +1,95 @@
+"""
+benchmark testleri - senaryolar sadece doğru sonuçta başarılı sayılır
+"""
+
+import pytest
+
+import category_reader
+import ui_actions
+from benchmark import _list_frames, compare_with_baseline, expected_categories, run_benchmarks
+from category_reader import sort_categories_by_priority
+from fake_device import DEFAULT_BRANDS, DEFAULT_TRAILER, FakeDevice, ReplayScreen, otomobil_screen
+
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    monkeypatch.delenv('UI_SEARCH_STRATEGY_BY_MODEL', raising=False)
+    monkeypatch.delenv('UI_SERVER_SCROLL_MAX_SWIPES', raising=False)
+
+
+def _make_device(clock):
+    return FakeDevice(otomobil_screen(), clock=clock)
+
+
+def _rows(results):
+    return {row['name']: row for row in results}
+
+
+def test_expected_categories_are_the_generated_brands():
+    expected = expected_categories(otomobil_screen())
+
+    # 'am' içerdiği için eski filtreler Lamborghini'yi sistem mesajı sayar
+    assert expected == sort_categories_by_priority([brand for brand in DEFAULT_BRANDS if brand != 'Lamborghini'])
+    assert not set(expected) & set(DEFAULT_TRAILER + ['Otomobil', 'Tüm "Otomobil" İlanları'])
+
+
+def test_expected_categories_from_recorded_frames():
+    frames = _list_frames(otomobil_screen())
+    assert len(frames) > 1
+    assert expected_categories(ReplayScreen(frames)) == expected_categories(otomobil_screen())
+
+
+def test_all_scenarios_pass_on_the_fake_list():
+    results = run_benchmarks(_make_device)
+
+    assert [row['name'] for row in results if not row['ok']] == []
+    assert compare_with_baseline(results, results) == []
+
+
+def test_read_scenario_checks_the_exact_list(monkeypatch):
+    original = category_reader.read_categories_from_page
+
+    def read_without_last_brand(d, timing=None):
+        return original(d, timing=timing)[:-1]
+
+    monkeypatch.setattr(category_reader, 'read_categories_from_page', read_without_last_brand)
+    rows = _rows(run_benchmarks(_make_device))
+
+    assert not rows['read_categories']['ok']
+
+
+def test_click_scenarios_check_the_clicked_row(monkeypatch):
+    original = ui_actions.click_category
+
+    def click_wrong_brand(d, category_name, timing=None):
+        # Hedef yerine komşu markaya basıp başarılı döner
+        return original(d, 'Tata' if category_name == 'Tesla' else category_name, timing=timing)
+
+    monkeypatch.setattr(ui_actions, 'click_category', click_wrong_brand)
+    rows = _rows(run_benchmarks(_make_device))
+
+    assert rows['read_categories']['ok']
+    for name in ('click_category[Tesla] local', 'click_category[Tesla] server', 'click_category[Tesla] harita'):
+        assert not rows[name]['ok'], name
+    # Hazırlıktaki tıklama yanlış markanın ekranını açtığı için Tesla'nın butonu bulunamaz
+    assert not rows['click_tum_button[Tesla]']['ok']
+
+
+def test_missing_scenario_fails_if_any_row_is_clicked(monkeypatch):
+    original = ui_actions.click_category
+
+    def click_first_row(d, category_name, timing=None):
+        original(d, 'Audi', timing=timing)
+        return False
+
+    monkeypatch.setattr(ui_actions, 'click_category', click_first_row)
+    rows = _rows(run_benchmarks(_make_device))
+
+    assert not rows['click_category[Yugo] yok']['ok']
+
+
+def test_failed_scenario_is_a_regression():
+    results = run_benchmarks(_make_device)
+    results[0]['ok'] = False
+
+    assert compare_with_baseline(results, results) == [f"{results[0]['name']}: beklenen sonuç alınamadı"]
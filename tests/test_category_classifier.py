@@ -0,0 +1,88 @@
+"""
+category_classifier testleri - kayıtlı metin korpusu ve sınıflandırıcı öncesi filtrelerle birebir karşılaştırma
+"""
+
+import json
+import os
+
+import pytest
+
+from benchmark import (
+    _list_frames,
+    legacy_categories_from_nodes,
+    legacy_is_navigation_header,
+    legacy_keeps_candidate,
+    run_classifier_benchmark,
+)
+from category_classifier import (
+    LABEL_CATEGORY,
+    classify_candidate,
+    classify_content_desc,
+    classify_nodes,
+    classify_text,
+    is_navigation_header,
+)
+from fake_device import FakeDevice, brand_screen, otomobil_screen
+from hierarchy_parser import Node, parse_nodes
+
+
+# Sahte Otomobil/marka listesi ekranlarındaki metinler + durum çubuğu, UI ve marka uç örnekleri.
+# Etiketler eski filtrelerle doğrulanarak kaydedildi (Lamborghini, Panamera: 'am' içerdiği için sistem mesajı).
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), 'data', 'classifier_corpus.json')
+
+with open(CORPUS_PATH, encoding='utf-8') as f:
+    CORPUS = json.load(f)
+
+
+def _node(text='', content_desc=''):
+    return Node(text, content_desc, '', False, '', '', '', False)
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    for function in (classify_text, classify_content_desc, classify_candidate, is_navigation_header):
+        function.cache_clear()
+
+
+@pytest.mark.parametrize("entry", CORPUS['strings'], ids=lambda entry: entry['value'])
+def test_corpus_labels(entry):
+    value = entry['value']
+    assert classify_text(value.strip()) == entry['text']
+    assert classify_content_desc(value.strip()) == entry['content_desc']
+    assert classify_candidate(value) == entry['candidate']
+    assert is_navigation_header(value) == entry['header']
+
+
+@pytest.mark.parametrize("entry", CORPUS['strings'], ids=lambda entry: entry['value'])
+def test_corpus_matches_legacy_filters(entry):
+    value = entry['value'].strip()
+    assert (value in legacy_categories_from_nodes([_node(text=value)])) == (classify_text(value) == LABEL_CATEGORY)
+    assert ((value in legacy_categories_from_nodes([_node(content_desc=value)]))
+            == (classify_content_desc(value) == LABEL_CATEGORY))
+    assert legacy_keeps_candidate(entry['value']) == (classify_candidate(entry['value']) == LABEL_CATEGORY)
+    assert legacy_is_navigation_header(entry['value']) == is_navigation_header(entry['value'])
+
+
+@pytest.mark.parametrize("entry", CORPUS['nodes'], ids=lambda entry: f"{entry['text']}|{entry['content_desc']}")
+def test_corpus_nodes(entry):
+    nodes = [_node(entry['text'], entry['content_desc'])]
+    assert classify_nodes(nodes) == entry['categories']
+    assert set(entry['categories']) == legacy_categories_from_nodes(nodes)
+
+
+@pytest.mark.parametrize("screen", [otomobil_screen(), brand_screen('Mercedes-Benz')], ids=['otomobil', 'marka'])
+def test_list_frames_match_legacy_filters(screen):
+    for xml in _list_frames(screen):
+        nodes = parse_nodes(xml)
+        categories = classify_nodes(nodes)
+        assert set(categories) == legacy_categories_from_nodes(nodes)
+        # Ekran sırası korunur
+        texts = [node.text for node in nodes if node.text in categories]
+        assert categories == list(dict.fromkeys(texts))
+
+
+def test_classifier_benchmark_scenario():
+    row = run_classifier_benchmark(lambda clock: FakeDevice(otomobil_screen(), clock=clock), passes=1)
+    assert row['ok']
+    assert row['screens'] > 1
+    assert row['wall'] > 0 and row['legacy_wall'] > 0
@@ -0,0 +1,79 @@
+"""
+category_reader testleri - kategoriler sadece kategori listesinin içinden okunur
+"""
+
+from category_reader import categories_from_nodes, list_nodes
+from fake_device import DEFAULT_BRANDS, otomobil_screen
+from hierarchy_parser import Node, parse_nodes
+
+
+def _node(text, rect, scrollable=False):
+    x1, y1, x2, y2 = rect
+    return Node(text, '', '', False, 'android.widget.TextView', f"[{x1},{y1}][{x2},{y2}]", 'com.sahibinden', scrollable)
+
+
+def _brand_rows(brands, top=300, left=0, right=1080):
+    return [_node(brand, (left + 40, top + index * 150, right - 40, top + (index + 1) * 150))
+            for index, brand in enumerate(brands)]
+
+
+def test_toolbar_title_is_excluded():
+    nodes = parse_nodes(otomobil_screen().xml())
+
+    categories = categories_from_nodes(nodes)
+    assert 'Otomobil' not in categories
+    assert 'Alfa Romeo' in categories
+
+
+def test_all_visible_brands_are_kept():
+    brands = ['Audi', 'BMW', 'Fiat', 'Honda', 'Opel']
+    nodes = [_node('Otomobil', (150, 100, 1080, 250)), _node('', (0, 300, 1080, 2300), scrollable=True)]
+    nodes += _brand_rows(brands)
+
+    assert categories_from_nodes(nodes) == set(brands)
+
+
+def test_screen_without_scrollable_returns_every_node():
+    nodes = [_node('Otomobil', (150, 100, 1080, 250))] + _brand_rows(['Audi', 'BMW'])
+
+    assert list_nodes(nodes) == nodes
+    assert categories_from_nodes(nodes) == {'Otomobil', 'Audi', 'BMW'}
+
+
+def test_largest_scrollable_without_categories_is_not_the_list():
+    # Büyük bir kampanya alanı (kategori yok) ve yanında daha küçük marka listesi
+    nodes = [
+        _node('Otomobil', (150, 100, 1080, 250)),
+        _node('', (0, 300, 1080, 2000), scrollable=True),
+        _node('', (0, 2000, 1080, 2300), scrollable=True),
+    ]
+    nodes += _brand_rows(['Audi', 'BMW'], top=2000)
+
+    assert categories_from_nodes(nodes) == {'Audi', 'BMW'}
+
+
+def test_rows_outside_the_list_horizontally_are_excluded():
+    nodes = [_node('', (0, 300, 540, 2300), scrollable=True)]
+    nodes += _brand_rows(['Audi', 'BMW'], right=540)
+    nodes += _brand_rows(['Reklam Alanı'], left=540)
+
+    assert categories_from_nodes(nodes) == {'Audi', 'BMW'}
+
+
+def test_scrollable_with_no_categories_returns_every_node():
+    nodes = [_node('', (0, 300, 1080, 600), scrollable=True)] + _brand_rows(['Audi'], top=700)
+
+    assert list_nodes(nodes) == nodes
+
+
+def test_full_list_is_read_from_every_frame():
+    screen = otomobil_screen()
+    seen = set()
+    while True:
+        seen |= categories_from_nodes(parse_nodes(screen.xml()))
+        if not screen.scroll(screen.viewport // 2):
+            break
+
+    # 'am' içerdiği için eski filtreler Lamborghini'yi sistem mesajı sayar
+    assert set(DEFAULT_BRANDS) - seen == {'Lamborghini'}
+    assert 'Otomobil' not in seen
@@ -0,0 +1,169 @@
+"""
+Kategori claim/lease testleri - yerel PostgreSQL gerektirir (bkz. conftest.db), ulaşılamazsa atlanır
+"""
+
+import threading
+import time
+
+import pytest
+
+from database import (
+    MIGRATIONS,
+    LeaseHeartbeat,
+    assign_category_to_device,
+    complete_category,
+    renew_category_leases,
+    run_migration,
+    save_categories,
+)
+
+
+def _seed(cursor, names, order=1):
+    cursor.execute(
+        'INSERT INTO categories (parentCategory, subCategory, "order") '
+        'SELECT %s, name, %s FROM unnest(%s::text[]) AS name RETURNING id',
+        ('Vasıta', order, list(names)),
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def test_concurrent_claimers_never_share_a_row(migrated):
+    ids = _seed(migrated, [f"Marka {i}" for i in range(30)], order=0)
+    ids += _seed(migrated, [f"Model {i}" for i in range(170)])
+    claimers = 50
+    barrier = threading.Barrier(claimers)
+    claimed = [[] for _ in range(claimers)]
+    errors = []
+
+    def work(index):
+        token = f"device-{index}"
+        barrier.wait()
+        while True:
+            category = assign_category_to_device(token)
+            if category is None:
+                return
+            claimed[index].append(category['id'])
+            # Satır hâlâ bu cihaza ait olmalı: başka bir claimer almadıysa tamamlanabilir
+            if not complete_category(token, category['id']):
+                errors.append(category['id'])
+
+    threads = [threading.Thread(target=work, args=(index,)) for index in range(claimers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    all_claims = [category_id for claims in claimed for category_id in claims]
+    assert errors == []
+    assert len(all_claims) == len(set(all_claims))
+    assert sorted(all_claims) == sorted(ids)
+    migrated.execute("SELECT COUNT(*) FROM categories WHERE isCompleted = FALSE")
+    assert migrated.fetchone()[0] == 0
+
+
+def test_priority_rows_are_claimed_first(migrated):
+    _seed(migrated, ["Fiat", "Opel"])
+    priority = _seed(migrated, ["BMW"], order=0)
+
+    assert assign_category_to_device("device-a")['id'] == priority[0]
+
+
+def test_expired_lease_is_reclaimed(migrated):
+    (category_id,) = _seed(migrated, ["Honda"])
+
+    first = assign_category_to_device("device-a", lease_seconds=0.3)
+    assert first['id'] == category_id
+    assert assign_category_to_device("device-b") is None
+
+    time.sleep(0.5)
+    second = assign_category_to_device("device-b")
+    assert second['id'] == category_id
+    assert second['deviceId'] == "device-b"
+    # Eski sahip lease'ini yenileyemez ve kategoriyi tamamlayamaz
+    assert renew_category_leases("device-a", [category_id]) == []
+    assert not complete_category("device-a", category_id)
+
+
+def test_heartbeat_keeps_the_row(migrated):
+    (category_id,) = _seed(migrated, ["Kia"])
+    assert assign_category_to_device("device-a", lease_seconds=0.5)['id'] == category_id
+
+    heartbeat = LeaseHeartbeat("device-a", interval=0.1, lease_seconds=0.5)
+    heartbeat.add(category_id)
+    heartbeat.start()
+    try:
+        time.sleep(1.2)
+        assert assign_category_to_device("device-b") is None
+    finally:
+        heartbeat.stop()
+
+    time.sleep(0.7)
+    assert assign_category_to_device("device-b")['id'] == category_id
+
+
+def test_migration_leases_rows_owned_before_upgrade(db, monkeypatch):
+    # v1 şeması: lease kolonu yok, eski sürüm bir bot bir kategoriyi almış
+    version, description, statements = MIGRATIONS[0]
+    for statement in statements:
+        db.execute(statement)
+    db.execute("CREATE TABLE schema_migrations (version INTEGER PRIMARY KEY, description VARCHAR(255), "
+               "applied_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP)")
+    db.execute("INSERT INTO schema_migrations (version, description) VALUES (%s, %s)", (version, description))
+    (owned,) = _seed(db, ["Audi"])
+    (done,) = _seed(db, ["Fiat"])
+    (pending,) = _seed(db, ["Opel"])
+    db.execute("UPDATE categories SET deviceId = 'old-bot' WHERE id IN (%s, %s)", (owned, done))
+    db.execute("UPDATE categories SET isCompleted = TRUE WHERE id = %s", (done,))
+
+    monkeypatch.setenv('CATEGORY_LEASE_SECONDS', '600')
+    assert run_migration()
+
+    db.execute("SELECT id, lease_expires_at > CURRENT_TIMESTAMP + INTERVAL '500 seconds' "
+               "FROM categories WHERE lease_expires_at IS NOT NULL")
+    assert db.fetchall() == [(owned, True)]
+    assert assign_category_to_device("device-b")['id'] == pending
+    assert assign_category_to_device("device-b", exclude_ids=[pending]) is None
+
+    # Deploy sonrası lease göndermeyen eski bot da satırını kaybetmez
+    db.execute("UPDATE categories SET lease_expires_at = NULL WHERE id = %s", (owned,))
+    assert assign_category_to_device("device-c") is None
+
+
+@pytest.mark.parametrize("processed", [True, False])
+def test_single_run_keeps_its_category(migrated, processed):
+    from bot import SahibindenBot
+
+    (category_id,) = _seed(migrated, ["Tesla"])
+    _seed(migrated, ["Volvo"])
+    assigned = []
+
+    class Bot(SahibindenBot):
+        def prepare(self):
+            return True
+
+        def process_assigned_category(self):
+            assigned.append(self.assigned_category['id'])
+            return processed
+
+    assert Bot(device_token="device-a").run() is processed
+
+    # Tek çalışma satırı tamamlamaz ve bırakmaz; lease'i olan satır başka cihaza verilmez
+    migrated.execute("SELECT isCompleted, deviceId, lease_expires_at > CURRENT_TIMESTAMP "
+                     "FROM categories WHERE id = %s", (category_id,))
+    assert migrated.fetchone() == (False, "device-a", True)
+    assert assign_category_to_device("device-b")['id'] != category_id
+
+    # Sonraki çalışma cihazın yarım kalan kategorisine devam eder
+    assert Bot(device_token="device-a").run() is processed
+    assert assigned == [category_id, category_id]
+
+
+def test_saving_twice_reports_existing_unowned_rows(migrated, capsys):
+    assert save_categories(['Audi', 'BMW'])
+    assert "Toplam: 2 yeni, 0 mevcut" in capsys.readouterr().out
+
+    # deviceId NULL olan satırlar UNIQUE kısıtında çakışmaz; yine de tekrar eklenmez
+    assert save_categories(['Audi', 'BMW', 'Fiat'])
+    assert "Toplam: 1 yeni, 2 mevcut" in capsys.readouterr().out
+    migrated.execute("SELECT subCategory, deviceId FROM categories ORDER BY subCategory")
+    assert migrated.fetchall() == [('Audi', None), ('BMW', None), ('Fiat', None)]
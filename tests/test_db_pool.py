@@ -0,0 +1,69 @@
+"""
+Bağlantı havuzu testleri - yerel PostgreSQL gerektirir (bkz. conftest.db), ulaşılamazsa atlanır
+"""
+
+import gc
+
+import database
+from database import close_db_pool, db_connection
+
+
+def _select_one(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1")
+    value = cursor.fetchone()[0]
+    cursor.close()
+    return value
+
+
+def test_checkin_after_pool_is_closed(db):
+    with db_connection() as conn:
+        assert _select_one(conn) == 1
+        # Daemon kapanırken heartbeat/prefetch thread'i bağlantıyı tutuyor olabilir
+        close_db_pool()
+    assert conn.closed
+
+    with db_connection() as conn:
+        assert _select_one(conn) == 1
+
+
+def test_checkin_returns_to_the_pool_it_came_from(db, monkeypatch):
+    monkeypatch.setenv('DB_POOL_MAX', '1')
+    with db_connection() as old_conn:
+        close_db_pool()
+        # Havuz yeniden kuruldu; eski bağlantının iadesi yeni havuzun semaforunu etkilememeli
+        with db_connection() as new_conn:
+            assert _select_one(new_conn) == 1
+    assert old_conn.closed
+
+    new_pool, new_slots = database._get_pool()
+    for _ in range(3):
+        with db_connection() as conn:
+            assert conn is not None
+            assert conn.pool_owner == (new_pool, new_slots)
+    # Tek yer tekrar boşalmış olmalı (fazladan release BoundedSemaphore'da ValueError verirdi)
+    assert new_slots.acquire(blocking=False)
+    new_slots.release()
+
+
+def test_last_used_is_kept_on_the_connection(db, monkeypatch):
+    monkeypatch.setenv('DB_POOL_HEALTHCHECK_INTERVAL', '0')
+    with db_connection() as conn:
+        assert conn.last_used is None
+    last_used = conn.last_used
+    assert last_used is not None
+    gc.collect()
+
+    with db_connection() as again:
+        # Tek bağlantılık havuzda aynı bağlantı tekrar verilir ve boşta kaldığı için doğrulanır
+        assert again is conn
+        assert _select_one(again) == 1
+    assert again.last_used > last_used
+
+
+def test_broken_connection_is_replaced(db):
+    with db_connection() as conn:
+        conn.close()
+    with db_connection() as fresh:
+        assert fresh is not conn
+        assert _select_one(fresh) == 1
@@ -0,0 +1,65 @@
+"""
+instrumentation testleri - ölçüm isteğe bağlıdır, açıkken çalışma METRICS_DIR'e yazılır
+"""
+
+import json
+
+import pytest
+
+import instrumentation
+from instrumentation import count, enabled, finish_run, span, start_run
+
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch, tmp_path):
+    monkeypatch.delenv('METRICS_ENABLED', raising=False)
+    monkeypatch.delenv('METRICS_DIR', raising=False)
+    monkeypatch.setattr(instrumentation, '_last_phases', {})
+    monkeypatch.setattr(instrumentation, '_last_launch', None)
+    # Varsayılan klasör (metrics) yazılırsa depo yerine geçici klasöre düşer
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.mark.parametrize("env, expected", [
+    ({}, False),
+    ({'METRICS_ENABLED': '1'}, True),
+    ({'METRICS_DIR': 'olcum'}, True),
+    ({'METRICS_DIR': 'olcum', 'METRICS_ENABLED': '0'}, False),
+    ({'METRICS_ENABLED': '0'}, False),
+])
+def test_metrics_are_opt_in(monkeypatch, env, expected):
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    assert enabled() is expected
+
+
+def test_nothing_is_recorded_by_default(tmp_path):
+    assert start_run('run', device='fake-1') is None
+    with span('launch') as current:
+        count('rpc')
+    assert current is None
+    assert finish_run(True, device='fake-1') is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_run_is_written_to_metrics_dir(monkeypatch, tmp_path):
+    directory = tmp_path / 'olcum'
+    monkeypatch.setenv('METRICS_DIR', str(directory))
+
+    start_run('run', device='fake-1')
+    with span('launch'):
+        count('rpc', 3)
+    record = finish_run(True, device='fake-1')
+
+    assert record['spans'][0]['counters']['rpc'] == 3
+    with open(directory / 'runs.jsonl', encoding='utf-8') as f:
+        assert json.loads(f.readline())['run_id'] == record['run_id']
+    prom = (directory / 'sahibinden_bot_fake-1.prom').read_text(encoding='utf-8')
+    assert 'sahibinden_phase_rpc{device="fake-1",phase="launch"} 3' in prom
+
+
+def test_enabled_without_dir_uses_default_dir(monkeypatch, tmp_path):
+    monkeypatch.setenv('METRICS_ENABLED', '1')
+    start_run('run', device='fake-1')
+    finish_run(True, device='fake-1')
+    assert (tmp_path / instrumentation.DEFAULT_METRICS_DIR / 'runs.jsonl').exists()
@@ -0,0 +1,162 @@
+"""
+Uygulama açılışı ölçüm testleri - açılış bilgisi çalışma kaydına (runs.jsonl) ve .prom dosyasına yazılır
+"""
+
+import json
+
+import pytest
+
+import adb_transport
+import app
+import instrumentation
+import timing
+from fake_device import FakeDevice, ListScreen, otomobil_screen
+from instrumentation import finish_run, start_run
+from timing import PROFILES, SLEEPS, TimingPolicy, VirtualClock
+
+
+DEVICE = 'fake-1'
+
+AM_START_OUTPUT = """Starting: Intent { act=android.intent.action.MAIN cmp=com.sahibinden/.SplashActivity }
+Status: ok
+LaunchState: COLD
+Activity: com.sahibinden/.MainActivity
+TotalTime: 1234
+WaitTime: 1240
+Complete
+"""
+
+
+@pytest.fixture(autouse=True)
+def metrics(monkeypatch, tmp_path):
+    monkeypatch.setenv('METRICS_ENABLED', '1')
+    monkeypatch.setenv('METRICS_DIR', str(tmp_path))
+    monkeypatch.setattr(instrumentation, '_last_phases', {})
+    monkeypatch.setattr(instrumentation, '_last_launch', None)
+    monkeypatch.setattr(app, '_launch_activity_cache', {})
+    monkeypatch.setattr(app, 'is_app_installed', lambda device_id, use_cache=False: True)
+    return tmp_path
+
+
+def _fake_shell(d, commands):
+    def shell(device_id, cmd, timeout=None):
+        commands.append(cmd)
+        if 'resolve-activity' in cmd:
+            return "priority=0 preferredOrder=0\ncom.sahibinden/.SplashActivity\n"
+        if cmd.startswith('am start -W'):
+            d.screens.append(otomobil_screen())
+            return AM_START_OUTPUT
+        if cmd.startswith('monkey'):
+            return "Events injected: 1\n"
+        return ''
+    return shell
+
+
+def _prom(directory):
+    with open(directory / f'sahibinden_bot_{DEVICE}.prom', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_bot_defaults_to_cold_launch(monkeypatch):
+    from bot import SahibindenBot
+
+    monkeypatch.delenv('LAUNCH_MODE', raising=False)
+    assert SahibindenBot().launch_mode == 'cold'
+    monkeypatch.setenv('LAUNCH_MODE', 'warm')
+    assert SahibindenBot().launch_mode == 'warm'
+
+
+def test_warm_launch_is_recorded(monkeypatch, metrics):
+    clock = VirtualClock()
+    d = FakeDevice(ListScreen('Profil', ['Ayarlar']), clock=clock)
+    commands = []
+    monkeypatch.setattr(app, 'shell', _fake_shell(d, commands))
+
+    start_run('prepare', device=DEVICE)
+    assert app.warm_launch_app(DEVICE, d, timing=TimingPolicy(clock=clock)) == 'otomobil'
+    record = finish_run(True, device=DEVICE)
+
+    assert any(cmd.startswith('am start -W') for cmd in commands)
+    launch = record['launch']
+    assert launch['mode'] == 'warm'
+    assert launch['launch_state'] == 'COLD'
+    assert launch['total_time_ms'] == 1234
+    assert launch['ready_time_ms'] is not None
+    assert launch['screen'] == 'otomobil'
+
+    with open(metrics / 'runs.jsonl', encoding='utf-8') as f:
+        assert json.loads(f.readline())['launch'] == launch
+    prom = _prom(metrics)
+    assert f'sahibinden_launch_total_time_seconds{{device="{DEVICE}",mode="warm",launch_state="COLD"}} 1.234' in prom
+    assert f'sahibinden_launch_ready_seconds{{device="{DEVICE}",mode="warm",launch_state="COLD"}}' in prom
+
+
+def test_resumed_launch_skips_am_start(monkeypatch):
+    clock = VirtualClock()
+    d = FakeDevice(otomobil_screen(), clock=clock)
+    commands = []
+    monkeypatch.setattr(app, 'shell', _fake_shell(d, commands))
+
+    start_run('prepare', device=DEVICE)
+    assert app.warm_launch_app(DEVICE, d, timing=TimingPolicy(clock=clock)) == 'otomobil'
+    record = finish_run(True, device=DEVICE)
+
+    assert commands == []
+    assert record['launch']['mode'] == 'resumed'
+    assert record['launch']['total_time_ms'] is None
+
+
+def test_cold_launch_is_recorded(monkeypatch, metrics):
+    clock = VirtualClock()
+    monkeypatch.setattr(app, 'shell', _fake_shell(FakeDevice(otomobil_screen(), clock=clock), []))
+
+    start_run('prepare', device=DEVICE)
+    assert app.launch_app(DEVICE, timing=TimingPolicy(clock=clock))
+    record = finish_run(True, device=DEVICE)
+
+    assert record['launch']['mode'] == 'cold'
+    assert record['launch']['ready_time_ms'] > 0
+    prom = _prom(metrics)
+    assert 'sahibinden_launch_ready_seconds{device="fake-1",mode="cold",launch_state=""}' in prom
+    assert 'sahibinden_launch_total_time_seconds' not in prom
+
+
+def test_launch_stays_in_later_prometheus_files(metrics):
+    start_run('prepare', device=DEVICE)
+    instrumentation.record_launch('warm', launch_state='HOT', total_time_ms=300, ready_time_ms=450, screen='home')
+    finish_run(True, device=DEVICE)
+
+    # Daemon'un kategori turları açılış yapmaz; son açılış .prom dosyasında kalır
+    record = (start_run('category', device=DEVICE), finish_run(True, device=DEVICE))[1]
+    assert 'launch' not in record
+    assert 'sahibinden_launch_ready_seconds{device="fake-1",mode="warm",launch_state="HOT"} 0.45' in _prom(metrics)
+
+
+def test_record_launch_without_a_run_does_nothing():
+    instrumentation.record_launch('cold', ready_time_ms=10)
+    assert instrumentation._recorder is None
+
+
+def test_cold_launch_uses_the_device_profile(monkeypatch):
+    import bot
+
+    monkeypatch.setenv('TIMING_PROFILE_BY_MODEL', 'SM-A515F=slow')
+    monkeypatch.delenv('TIMING_PROFILE', raising=False)
+    monkeypatch.setattr(timing, '_policies', {})
+    monkeypatch.setattr(timing, '_device_models', {})
+    monkeypatch.setattr(timing, 'RealClock', VirtualClock)
+    monkeypatch.setattr(adb_transport, 'shell', lambda device_id, cmd, timeout=None:
+                        'SM-A515F\n' if cmd == 'getprop ro.product.model' else '')
+    monkeypatch.setattr(app, 'shell', _fake_shell(FakeDevice(otomobil_screen()), []))
+    monkeypatch.setattr(bot, 'connect_device', lambda device_id: device_id)
+
+    # Soğuk açılış UI bağlantısından önce yapılır; profil ADB'den okunan modele göre seçilir
+    sahibinden = bot.SahibindenBot(device_id=DEVICE)
+    assert sahibinden.connect_device()
+    assert sahibinden.launch_app()
+
+    assert sahibinden.timing.profile == 'slow'
+    assert sahibinden.timing.clock.slept == pytest.approx(
+        (SLEEPS['app_stop_confirm'] + SLEEPS['app_start']) * PROFILES['slow'])
+    # Bot dışından yapılan açılış da aynı cihazın politikasını kullanır
+    assert timing.get_timing_policy(device_id=DEVICE) is sahibinden.timing
@@ -0,0 +1,173 @@
+"""
+orchestrator testleri - cihaz listesi sahte bir sırayla verilir, worker'lar gerçek süreçtir (fork)
+ama SahibindenBot yerine FakeBot çalıştırır
+"""
+
+import json
+import multiprocessing
+import os
+import signal
+import time
+
+import pytest
+
+import bot
+import database
+import orchestrator
+from orchestrator import DeviceOrchestrator
+
+
+class FakeBot:
+    """SahibindenBot yerine: 'ok-' başarılı, 'fail-' başarısız biter, 'hang-' durdurulana kadar bekler"""
+
+    def __init__(self, device_id=None, device_token=None):
+        self.device_id = device_id
+        self.device_token = device_token
+
+    def _work(self, daemon):
+        with open(os.environ['ORCHESTRATOR_TEST_LOG'], 'a', encoding='utf-8') as f:
+            f.write(json.dumps({
+                'serial': self.device_id,
+                'token': self.device_token,
+                'daemon': daemon,
+                # Orkestratörün havuzu fork'tan önce kapatılmış olmalı
+                'pool_inherited': database._pool is not None,
+            }) + '\n')
+        if self.device_id.startswith('hang-'):
+            time.sleep(60)
+        return not self.device_id.startswith('fail-')
+
+    def run(self):
+        return self._work(daemon=False)
+
+    def run_daemon(self):
+        return self._work(daemon=True)
+
+
+class FakePool:
+    def __init__(self):
+        self.closed = False
+
+    def closeall(self):
+        self.closed = True
+
+
+@pytest.fixture
+def log(monkeypatch, tmp_path):
+    path = tmp_path / 'workers.jsonl'
+    monkeypatch.setenv('ORCHESTRATOR_TEST_LOG', str(path))
+    monkeypatch.delenv('DEVICE_TOKENS', raising=False)
+    monkeypatch.delenv('DEVICE_TOKEN_PREFIX', raising=False)
+    # Worker süreci gerçek run_worker'ı çalıştırır, bot yerine FakeBot kullanılır
+    monkeypatch.setattr(bot, 'SahibindenBot', FakeBot)
+    # Varsayılan başlatma yöntemi değişse de worker'lar fork ile başlar
+    monkeypatch.setattr(orchestrator, 'multiprocessing', multiprocessing.get_context('fork'))
+    monkeypatch.setattr(orchestrator, 'check_adb', lambda: True)
+    monkeypatch.setattr(orchestrator, 'run_migration', lambda: True)
+    handlers = {signum: signal.getsignal(signum) for signum in (signal.SIGTERM, signal.SIGINT)}
+    yield lambda: [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()] \
+        if path.exists() else []
+    for signum, handler in handlers.items():
+        signal.signal(signum, handler)
+
+
+def _run(monkeypatch, polls, **kwargs):
+    """Orkestratörü sırayla verilen cihaz listeleriyle çalıştırır.
+
+    Sıra bitince son liste verilmeye devam eder; watch modunda orkestratör
+    sıra bittiğinde durdurulur. Her kontrolde çalışan worker'ların pid'leri kaydedilir.
+    """
+    kwargs.setdefault('poll_interval', 0.05)
+    runner = DeviceOrchestrator(**kwargs)
+    polls = list(polls)
+    seen = []
+
+    def get_connected_devices(verbose=True):
+        seen.append({serial: process.pid for serial, process in runner.workers.items()})
+        if len(seen) > len(polls) and runner.watch:
+            runner.stop()
+        return polls[min(len(seen), len(polls)) - 1]
+
+    monkeypatch.setattr(orchestrator, 'get_connected_devices', get_connected_devices)
+    return runner, runner.run(), seen
+
+
+def test_workers_get_tokens_from_the_mapping(monkeypatch, log):
+    monkeypatch.setenv('DEVICE_TOKENS', 'ok-1=token-a, ok-3 = token-c,bozuk')
+    monkeypatch.setenv('DEVICE_TOKEN_PREFIX', 'cihaz-')
+
+    runner, success, _ = _run(monkeypatch, [['ok-1', 'ok-2', 'ok-3']], daemon=True)
+
+    assert success
+    assert runner.results == {'ok-1': 0, 'ok-2': 0, 'ok-3': 0}
+    tokens = {row['serial']: row['token'] for row in log()}
+    assert tokens == {'ok-1': 'token-a', 'ok-2': 'cihaz-ok-2', 'ok-3': 'token-c'}
+    assert all(row['daemon'] for row in log())
+
+
+def test_default_token_prefix(monkeypatch, log):
+    _run(monkeypatch, [['ok-1']])
+    assert [row['token'] for row in log()] == ['device-ok-1']
+
+
+@pytest.mark.parametrize("devices, expected", [
+    (['ok-1', 'ok-2'], True),
+    (['ok-1', 'fail-1'], False),
+    (['fail-1'], False),
+    ([], False),
+])
+def test_exit_status_combines_every_worker(monkeypatch, log, devices, expected):
+    runner, success, _ = _run(monkeypatch, [devices])
+
+    assert success is expected
+    assert runner.results == {serial: 1 if serial.startswith('fail-') else 0 for serial in devices}
+
+
+def test_plugged_device_gets_a_worker(monkeypatch, log):
+    runner, success, seen = _run(monkeypatch, [[], [], ['ok-1']] + [['ok-1']] * 5, watch=True)
+
+    assert success
+    assert [row['serial'] for row in log()] == ['ok-1']
+    assert seen[1] == {}
+
+
+def test_finished_device_restarts_only_after_replug(monkeypatch, log):
+    polls = [['ok-1']] * 10 + [[]] + [['ok-1']] * 10
+    runner, success, _ = _run(monkeypatch, polls, watch=True)
+
+    assert success
+    assert [row['serial'] for row in log()] == ['ok-1', 'ok-1']
+
+
+def test_unplugged_device_worker_is_stopped_after_grace(monkeypatch, log):
+    polls = [['hang-1', 'ok-1'], ['ok-1'], ['ok-1'], ['ok-1']]
+    runner, success, seen = _run(monkeypatch, polls, lost_grace=2, watch=True)
+
+    pid = seen[1]['hang-1']
+    # İlk kayıpta worker bekler, ikinci ardışık kayıpta durdurulur
+    assert seen[2]['hang-1'] == pid
+    assert 'hang-1' not in seen[3]
+    assert runner.results['hang-1'] == -signal.SIGTERM
+    assert runner.results['ok-1'] == 0
+    assert not success
+
+
+def test_device_back_within_grace_keeps_its_worker(monkeypatch, log):
+    polls = [['hang-1'], [], ['hang-1'], [], ['hang-1']]
+    runner, _, seen = _run(monkeypatch, polls, lost_grace=2, watch=True)
+
+    assert len({snapshot['hang-1'] for snapshot in seen[1:]}) == 1
+    assert [row['serial'] for row in log()] == ['hang-1']
+    # Worker sadece orkestratör durdurulunca sonlanır
+    assert runner.results == {'hang-1': -signal.SIGTERM}
+
+
+def test_pool_is_closed_before_workers_fork(monkeypatch, log):
+    pool = FakePool()
+    monkeypatch.setattr(database, '_pool', pool)
+
+    _, success, _ = _run(monkeypatch, [['ok-1', 'ok-2']])
+
+    assert success
+    assert pool.closed
+    assert [row['pool_inherited'] for row in log()] == [False, False]
@@ -0,0 +1,96 @@
+"""
+CategoryPrefetcher testleri - veritabanı hatası "kategori kalmadı" sayılmaz, tekrar denenir
+"""
+
+import time
+from contextlib import contextmanager
+
+import pytest
+
+import database
+from database import CategoryClaimError, CategoryPrefetcher
+
+
+def _category(category_id):
+    return {"id": category_id, "parentCategory": "Otomobil", "subCategory": f"Marka {category_id}",
+            "page": None, "deviceId": "device-a", "isCompleted": False, "order": 0}
+
+
+@pytest.fixture
+def claims(monkeypatch):
+    """claim_category sırayla verilen sonuçları döndürür; Exception olanlar fırlatılır"""
+    outcomes = []
+    calls = []
+
+    def claim(device_token, lease_seconds=None, exclude_ids=None):
+        calls.append(set(exclude_ids or []))
+        outcome = outcomes.pop(0) if outcomes else None
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(database, 'claim_category', claim)
+    monkeypatch.setattr(database, 'release_category_lease', lambda device_token, category_id: True)
+    return outcomes, calls
+
+
+@pytest.mark.parametrize("depth", [0, 1])
+def test_claim_failing_once_is_retried(claims, depth):
+    outcomes, calls = claims
+    outcomes += [CategoryClaimError("bağlantı koptu"), _category(1)]
+    prefetcher = CategoryPrefetcher('device-a', depth=depth, retry_delay=0).start()
+    try:
+        assert prefetcher.get() == _category(1)
+        prefetcher.done(1)
+        assert prefetcher.get() is None
+    finally:
+        prefetcher.stop()
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize("depth", [0, 1])
+def test_claim_failing_past_retries_raises(claims, depth):
+    outcomes, calls = claims
+    outcomes += [CategoryClaimError("bağlantı koptu")] * 3 + [_category(1)]
+    prefetcher = CategoryPrefetcher('device-a', depth=depth, retries=2, retry_delay=0).start()
+    try:
+        with pytest.raises(CategoryClaimError):
+            prefetcher.get()
+        if depth:
+            # Önceden alma durdu; tekrar çağrı beklemek yerine aynı hatayı verir
+            with pytest.raises(CategoryClaimError):
+                prefetcher.get()
+    finally:
+        prefetcher.stop()
+    assert len(calls) == 3
+
+
+def test_retry_delay_doubles_up_to_the_limit(claims, monkeypatch):
+    outcomes, _ = claims
+    outcomes += [CategoryClaimError("bağlantı koptu")] * 4 + [_category(1)]
+    prefetcher = CategoryPrefetcher('device-a', depth=0, retries=4, retry_delay=10)
+    waits = []
+    monkeypatch.setattr(prefetcher._stop_event, 'wait', lambda delay: waits.append(delay) or False)
+
+    assert prefetcher.get() == _category(1)
+    assert waits == [10, 20, CategoryPrefetcher.MAX_RETRY_DELAY, CategoryPrefetcher.MAX_RETRY_DELAY]
+
+
+def test_stop_interrupts_the_retry_wait(claims):
+    outcomes, calls = claims
+    outcomes += [CategoryClaimError("bağlantı koptu")] * 2
+    prefetcher = CategoryPrefetcher('device-a', depth=1, retry_delay=60).start()
+    while not calls:
+        time.sleep(0.01)
+    prefetcher.stop()  # 60 sn beklemeden döner
+    assert len(calls) == 1
+
+
+def test_assign_category_to_device_keeps_returning_none_on_error(monkeypatch, capsys):
+    @contextmanager
+    def no_connection():
+        yield None
+
+    monkeypatch.setattr(database, 'db_connection', no_connection)
+    assert database.assign_category_to_device('device-a') is None
+    assert "Kategori seçimi sırasında hata" in capsys.readouterr().out
@@ -0,0 +1,118 @@
+"""
+ui_actions testleri - sunucu tarafı arama (scroll.to) FakeDevice üzerinde
+"""
+
+import pytest
+
+import category_positions
+from fake_device import FakeDevice, FakeScroll, otomobil_screen
+from timing import TimingPolicy, VirtualClock
+from ui_actions import AGENT_MAX_SEARCH_SWIPES, click_category, click_tum_button, server_scroll_to
+
+
+# Agent'ın tek scrollTo çağrısının ulaşamayacağı kadar uzun liste
+LONG_LIST = [f"Marka {index:03d}" for index in range(400)]
+
+
+@pytest.fixture(autouse=True)
+def server_strategy(monkeypatch, tmp_path):
+    monkeypatch.setenv('CATEGORY_POSITION_CACHE', str(tmp_path / 'positions.json'))
+    monkeypatch.setenv('UI_SEARCH_STRATEGY', 'server')
+    monkeypatch.delenv('UI_SEARCH_STRATEGY_BY_MODEL', raising=False)
+    monkeypatch.delenv('UI_SERVER_SCROLL_MAX_SWIPES', raising=False)
+    category_positions.reset_position_cache()
+    yield
+    category_positions.reset_position_cache()
+
+
+@pytest.fixture
+def scroll_to_calls(monkeypatch):
+    """Agent'a yapılan scroll.to çağrıları: (hedef, sonuç)"""
+    calls = []
+    original = FakeScroll.to
+
+    def to(self, **target):
+        result = original(self, **target)
+        calls.append((target, result))
+        return result
+
+    monkeypatch.setattr(FakeScroll, 'to', to)
+    return calls
+
+
+def _device(brands=None):
+    clock = VirtualClock()
+    return FakeDevice(otomobil_screen(brands), clock=clock), TimingPolicy(clock=clock)
+
+
+def _local_swipes(d):
+    return d.calls['swipe'] + d.calls['swipe_points']
+
+
+def test_server_search_finds_category_with_one_scroll_to(scroll_to_calls):
+    d, timing = _device()
+
+    assert click_category(d, 'Tesla', timing=timing)
+    assert d.clicked == ['Tesla']
+    assert [result for _, result in scroll_to_calls] == [True]
+    # Ekran ekran arama (swipe + dump) hiç çalışmadı
+    assert _local_swipes(d) == 0
+
+
+def test_server_search_miss_falls_back_to_local_loop(scroll_to_calls):
+    d, timing = _device(LONG_LIST)
+
+    assert click_category(d, 'Marka 390', timing=timing)
+    assert d.clicked == ['Marka 390']
+    assert [result for _, result in scroll_to_calls] == [False]
+    assert _local_swipes(d) > 0
+
+
+def test_click_tum_button_with_server_search(scroll_to_calls):
+    d, timing = _device()
+    assert click_category(d, 'Tesla', timing=timing)
+
+    assert click_tum_button(d, 'Tesla', timing=timing)
+    assert d.clicked == ['Tesla', 'Tüm "Tesla" İlanları']
+    assert [result for _, result in scroll_to_calls] == [True, True]
+
+
+def test_max_swipes_setting_is_enforced(monkeypatch, scroll_to_calls):
+    monkeypatch.setenv('UI_SERVER_SCROLL_MAX_SWIPES', '2')
+    d, timing = _device()
+
+    # Tesla iki swipe'tan daha aşağıda: sunucu tarafı arama sınırda durur, yerel arama bulur
+    assert click_category(d, 'Tesla', timing=timing)
+    assert d.clicked == ['Tesla']
+    # Sınır agent'ınkinden küçük olduğu için scrollTo hiç çağrılmadı
+    assert scroll_to_calls == []
+    assert d.calls['scroll'] >= 2
+    assert _local_swipes(d) > 0
+
+
+@pytest.mark.parametrize("max_swipes", [0, 1, 3])
+def test_server_scroll_to_never_exceeds_the_cap(max_swipes, scroll_to_calls):
+    d, timing = _device()
+
+    assert not server_scroll_to(d, {'text': 'Tesla'}, timing=timing, max_swipes=max_swipes)
+    assert d.swipes == max_swipes
+    assert scroll_to_calls == []
+
+
+def test_server_scroll_to_below_the_agent_cap_finds_near_target(scroll_to_calls):
+    d, timing = _device()
+
+    assert server_scroll_to(d, {'text': 'Tesla'}, timing=timing, max_swipes=10)
+    assert 0 < d.swipes <= 10
+    assert scroll_to_calls == []
+
+
+def test_server_scroll_to_continues_past_the_agent_cap(scroll_to_calls):
+    d, timing = _device(LONG_LIST)
+    assert not server_scroll_to(d, {'text': 'Marka 390'}, timing=timing, max_swipes=AGENT_MAX_SEARCH_SWIPES)
+    assert d.swipes == AGENT_MAX_SEARCH_SWIPES
+
+    d, timing = _device(LONG_LIST)
+    assert server_scroll_to(d, {'text': 'Marka 390'}, timing=timing, max_swipes=60)
+    assert AGENT_MAX_SEARCH_SWIPES < d.swipes <= 60
+    assert [result for _, result in scroll_to_calls] == [False, False]
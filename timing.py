@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Zamanlama modülü - bot'un tüm beklemelerini isimli ve cihaz modeline göre ayarlanabilir değerlerle yönetir
+"""
+
+import os
+import threading
+import time
+
+from instrumentation import count
+
+
+# Ekran sakinleşme beklemeleri: isim -> (en az bekleme, en fazla bekleme) saniye
+SETTLE_WAITS = {
+    'page_load': (0.5, 4.0),     # Yeni sayfa açıldıktan sonra (kategori/buton aramadan önce)
+    'list_load': (0.5, 3.0),     # Kategori listesi okunmadan önce
+    'list_ready': (0.3, 2.0),    # Liste en üste kaydırıldıktan / sunucu tarafı aramadan sonra
+    'post_swipe': (0.3, 3.0),    # Swipe sonrası liste durana kadar
+    'post_click': (0.5, 4.0),    # Kategori/butona tıklandıktan sonra
+    'post_back': (0.3, 3.0),     # Geri tuşundan sonra
+    'screen_check': (0.0, 2.0),  # Mevcut ekranı tanımadan önce
+    'dialog': (1.0, 3.0),        # Çerez dialogunun açılması
+    'dialog_close': (0.3, 2.0),  # Dialog butonuna tıklandıktan sonra
+}
+
+# Sabit beklemeler (saniye)
+SLEEPS = {
+    'app_stop': 1.0,          # Çalışan uygulama kapatıldıktan sonra
+    'app_stop_confirm': 0.5,  # Açılıştan önceki ikinci force-stop sonrası
+    'app_start': 2.0,         # Soğuk açılışta monkey sonrası
+}
+
+# Zaman aşımları (saniye)
+TIMEOUTS = {
+    'app_ready': 15.0,         # Uygulama açıldıktan sonra tanınan ekranın görünmesi
+    'element_timeout': 2.0,    # Selector exists() beklemesi
+    'container_timeout': 1.0,  # Scroll edilebilir container exists() beklemesi
+}
+
+# Yoklama aralıkları (saniye)
+POLLS = {
+    'idle_poll': 0.2,    # UI sakinleşmesi için dump aralığı
+    'screen_poll': 0.3,  # Ekran tanıma denemeleri arası
+}
+
+# Hazır profiller: isim -> bekleme çarpanı. En az beklemeler ve sabit beklemeler
+# çarpanla ölçeklenir; çarpan 1'den büyükse en fazla beklemeler ve zaman aşımları da uzar.
+PROFILES = {
+    'default': 1.0,
+    'fast': 0.6,
+    'slow': 1.5,
+}
+
+
+class RealClock:
+    """Gerçek saat: sleep gerçekten bekler"""
+
+    def __init__(self):
+        self.slept = 0.0  # sleep ile beklenen toplam süre
+        self._lock = threading.Lock()
+        self._started = self.now()
+
+    def now(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        if seconds <= 0:
+            return
+        with self._lock:
+            self.slept += seconds
+        count('sleep_seconds', seconds)
+        time.sleep(seconds)
+
+    def advance(self, seconds):
+        """Dışarıda geçen süre (ör. cihaz gecikmesi) - bekleme olarak sayılmaz"""
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def elapsed(self):
+        """Saat oluşturulduğundan beri geçen süre"""
+        return self.now() - self._started
+
+
+class VirtualClock(RealClock):
+    """Sanal saat: sleep beklemez, saati ileri alır.
+
+    now() gerçek geçen süreye atlanan beklemeler ve advance() ile eklenen
+    süreler eklenerek hesaplanır. Böylece kayıttan oynatılan bir çalışma
+    milisaniyeler içinde biter, elapsed() ise gerçek cihazda süreceği
+    zamanı verir.
+    """
+
+    def __init__(self):
+        self._offset = 0.0
+        super().__init__()
+
+    def now(self):
+        return time.monotonic() + self._offset
+
+    def sleep(self, seconds):
+        if seconds <= 0:
+            return
+        with self._lock:
+            self._offset += seconds
+            self.slept += seconds
+        count('sleep_seconds', seconds)
+
+    def advance(self, seconds):
+        if seconds <= 0:
+            return
+        with self._lock:
+            self._offset += seconds
+
+
+class TimingPolicy:
+    """Bot'taki tüm beklemelerin sahibi.
+
+    Beklemeler isimle istenir (post_swipe, post_click, page_load, app_start,
+    ...) ve değerler profilden gelir. Saat politikayla birlikte taşındığı
+    için aynı kod gerçek cihazda bekler, sanal saatle hiç beklemez.
+    """
+
+    def __init__(self, profile='default', overrides=None, clock=None):
+        factor = PROFILES.get(profile)
+        if factor is None:
+            print(f"  ⚠️  Bilinmeyen zamanlama profili '{profile}', varsayılan kullanılıyor")
+            profile, factor = 'default', 1.0
+        self.profile = profile
+        self.clock = clock or RealClock()
+        stretch = max(factor, 1.0)
+        self.values = {}
+        for name, (min_wait, max_wait) in SETTLE_WAITS.items():
+            self.values[name] = (min_wait * factor, max_wait * stretch)
+        for name, seconds in SLEEPS.items():
+            self.values[name] = seconds * factor
+        for name, seconds in TIMEOUTS.items():
+            self.values[name] = seconds * stretch
+        self.values.update(POLLS)
+        for name, value in (overrides or {}).items():
+            if name not in self.values:
+                print(f"  ⚠️  Bilinmeyen bekleme '{name}' yok sayıldı")
+            elif isinstance(self.values[name], tuple) != isinstance(value, tuple):
+                print(f"  ⚠️  '{name}' beklemesi için geçersiz değer yok sayıldı")
+            else:
+                self.values[name] = value
+
+    def with_clock(self, clock):
+        """Aynı değerlerle başka saat kullanan politika döndürür"""
+        policy = TimingPolicy.__new__(TimingPolicy)
+        policy.profile = self.profile
+        policy.values = dict(self.values)
+        policy.clock = clock
+        return policy
+
+    def settle_bounds(self, name):
+        """Sakinleşme beklemesinin (en az, en fazla) değerini döndürür"""
+        return self.values[name]
+
+    def seconds(self, name):
+        """Sabit bekleme, zaman aşımı veya yoklama aralığını döndürür"""
+        return self.values[name]
+
+    def now(self):
+        return self.clock.now()
+
+    def sleep(self, name):
+        """İsimli sabit beklemeyi yapar"""
+        self.clock.sleep(self.values[name])
+
+    def wait_for_idle(self, d, name):
+        """İsimli sakinleşme beklemesiyle UI sakinleşene kadar bekler; son XML'i döndürür"""
+        from screen_snapshot import wait_for_idle
+
+        min_wait, max_wait = self.values[name]
+        return wait_for_idle(d, min_wait=min_wait, max_wait=max_wait,
+                             interval=self.values['idle_poll'], clock=self.clock)
+
+
+_device_models = {}  # cihaz -> model (oturum boyunca bir kez sorulur)
+_policies = {}  # cihaz -> TimingPolicy
+_policies_lock = threading.Lock()
+
+
+def _device_key(d=None, device_id=None):
+    """Önbellek anahtarı: UI bağlantısının seri numarası, yoksa ADB seri numarası"""
+    if d is not None:
+        return getattr(d, 'serial', None) or id(d)
+    return device_id
+
+
+def device_model(d=None, device_id=None):
+    """Cihazın modelini döndürür (cihaz başına bir kez sorulur; alınamazsa None).
+
+    UI bağlantısı (d) yoksa model ADB üzerinden (getprop) okunur; böylece
+    uiautomator2 hazırlanmadan önceki beklemeler de cihazın profilini kullanır.
+    """
+    device_key = _device_key(d, device_id)
+    if device_key not in _device_models:
+        try:
+            if d is not None:
+                _device_models[device_key] = d.device_info.get('model')
+            else:
+                from adb_transport import shell
+                _device_models[device_key] = shell(device_id, "getprop ro.product.model", timeout=5).strip() or None
+        except Exception:
+            _device_models[device_key] = None
+    return _device_models[device_key]
+
+
+def parse_model_map(value):
+    """"model=değer,model2=değer2" biçimindeki eşlemeyi sözlüğe çevirir"""
+    mapping = {}
+    for pair in (value or "").split(","):
+        if "=" in pair:
+            model, item = pair.split("=", 1)
+            mapping[model.strip()] = item.strip()
+    return mapping
+
+
+def parse_overrides(value):
+    """TIMING_OVERRIDES değerini çözer: "post_swipe=0.2/2.5,app_start=3" """
+    overrides = {}
+    for name, item in parse_model_map(value).items():
+        try:
+            if "/" in item:
+                min_wait, max_wait = item.split("/", 1)
+                overrides[name] = (float(min_wait), float(max_wait))
+            else:
+                overrides[name] = float(item)
+        except ValueError:
+            print(f"  ⚠️  TIMING_OVERRIDES içindeki '{name}={item}' yok sayıldı")
+    return overrides
+
+
+def timing_profile(d=None, device_id=None):
+    """Cihaz için zamanlama profilinin adını döndürür.
+
+    TIMING_PROFILE_BY_MODEL ("model=profil,...") cihazın modeli için bir
+    profil tanımlıyorsa o, yoksa TIMING_PROFILE (varsayılan 'default') kullanılır.
+    """
+    by_model = parse_model_map(os.environ.get("TIMING_PROFILE_BY_MODEL"))
+    if by_model and (d is not None or device_id):
+        model = device_model(d, device_id)
+        if model in by_model:
+            return by_model[model]
+    return os.environ.get("TIMING_PROFILE", "default")
+
+
+def get_timing_policy(d=None, device_id=None):
+    """Cihazın zamanlama politikasını döndürür (cihaz başına bir kez oluşturulur).
+
+    Cihaz UI bağlantısı (d) ya da ADB seri numarası (device_id) ile verilebilir;
+    ikisi aynı cihaz için aynı politikayı döndürür.
+    """
+    device_key = _device_key(d, device_id)
+    with _policies_lock:
+        if device_key not in _policies:
+            _policies[device_key] = TimingPolicy(
+                profile=timing_profile(d, device_id),
+                overrides=parse_overrides(os.environ.get("TIMING_OVERRIDES")),
+            )
+        return _policies[device_key]
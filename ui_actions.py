@@ -3,15 +3,23 @@
 UI otomasyon aksiyonları modülü
 """
 
-import time
+import os
+
 import uiautomator2 as u2
 
+from category_positions import get_category_position, save_category_positions
+from device_proxy import wrap_device
+from instrumentation import instrument_device
+from screen_snapshot import ScreenSnapshot
+from scroll_planner import ListEndDetector, ScrollPlanner
+from timing import device_model, get_timing_policy, parse_model_map
+
 
 def init_ui_automator(device_id):
     """UIAutomator2 bağlantısını başlatır"""
     try:
         print("\n--- UI Otomasyon Hazırlanıyor ---")
-        d = u2.connect(device_id)
+        d = wrap_device(instrument_device(u2.connect(device_id)))
         print(f"✓ UI otomasyon bağlantısı kuruldu")
         return d
     except Exception as e:
@@ -19,9 +27,84 @@ def init_ui_automator(device_id):
         return None
 
 
-def close_cookie_dialog(d):
+# Tanınan ekranlar (detect_screen dönüş değerleri)
+SCREEN_HOME = 'home'          # Ana sayfa (Emlak, Vasıta, ...)
+SCREEN_VASITA = 'vasita'      # Vasıta alt kategorileri (Otomobil, Arazi, SUV, ...)
+SCREEN_OTOMOBIL = 'otomobil'  # Otomobil marka listesi
+
+
+def detect_screen(snapshot, package=None):
+    """Snapshot'taki ekranı tanır; tanınmayan ekranda None döner.
+
+    package verilirse ekranın o uygulamaya ait olması gerekir (uygulama ön
+    planda değilse None).
+    """
+    nodes = snapshot.nodes()
+    if not nodes:
+        return None
+    if package and not any(node.package == package for node in nodes):
+        return None
+    index = snapshot.index
+    # "Tüm 'Otomobil' İlanları" butonu sadece marka listesinde bulunur
+    if index.select(textContainsFold=('tüm', 'otomobil')):
+        return SCREEN_OTOMOBIL
+    if index.select(textContainsFold=('tüm', 'vasıta')) or index.select(textContainsFold=('tüm', 'vasita')):
+        return SCREEN_VASITA
+    has_vasita = bool(index.select(textFold='vasıta'))
+    if index.select(textFold='otomobil') and not has_vasita:
+        return SCREEN_VASITA
+    if has_vasita:
+        return SCREEN_HOME
+    return None
+
+
+def wait_for_screen(d, package=None, timeout=None, interval=None, timing=None):
+    """Tanınan bir ekran görünene kadar bekler; ekranı döndürür (zaman aşımında None).
+
+    timeout ve interval verilmezse zamanlama politikasının app_ready ve
+    screen_poll değerleri kullanılır.
+    """
+    timing = timing or get_timing_policy(d)
+    timeout = timing.seconds('app_ready') if timeout is None else timeout
+    interval = timing.seconds('screen_poll') if interval is None else interval
+    snapshot = ScreenSnapshot(d, timing=timing)
+    deadline = timing.now() + timeout
+    while True:
+        screen = detect_screen(snapshot, package=package)
+        if screen:
+            return screen
+        if timing.now() >= deadline:
+            return None
+        timing.clock.sleep(interval)
+        snapshot.invalidate()
+
+
+def navigate_back_to(d, target_screen, package=None, max_presses=4, timing=None):
+    """Geri tuşuna basarak hedef ekrana döner; ulaşılırsa True döner.
+
+    Hedefin gerisindeki bir ekrana (ana sayfa, Vasıta) düşülürse daha fazla
+    geri basılmaz ve False döner.
+    """
+    navigation_order = [SCREEN_HOME, SCREEN_VASITA, SCREEN_OTOMOBIL]
+    snapshot = ScreenSnapshot(d, timing=timing).settle('screen_check')
+    for presses in range(max_presses + 1):
+        if presses:
+            d.press("back")
+            snapshot.settle('post_back')
+        screen = detect_screen(snapshot, package=package)
+        if screen == target_screen:
+            return True
+        if screen in navigation_order and target_screen in navigation_order \
+                and navigation_order.index(screen) < navigation_order.index(target_screen):
+            return False
+    return False
+
+
+def close_cookie_dialog(d, timing=None):
     """Çerez tercih dialogunu kapatır"""
     print("\n--- Çerez Dialogunu Kapatıyor ---")
+    timing = timing or get_timing_policy(d)
+    element_timeout = timing.seconds('element_timeout')
     try:
         # Çeşitli olası buton metinlerini dene
         possible_buttons = [
@@ -43,40 +126,32 @@ def close_cookie_dialog(d):
             "OK"
         ]
         
-        # 3 saniye bekle - dialog'un açılması için
-        time.sleep(3)
+        # Buton metinleri, textContains (kısmi eşleşme) ve resource ID sırasıyla denenir
+        strategies = [(f"'{button_text}' butonu", {'text': button_text}) for button_text in possible_buttons]
+        strategies += [
+            ("'Reddet' içeren buton", {'textContains': "Reddet"}),
+            ("Reddet butonu (ID ile)", {'resourceId': "com.sahibinden:id/rejectButton"}),
+            ("Kabul butonu (ID ile)", {'resourceId': "com.sahibinden:id/acceptButton"}),
+        ]
         
-        # Her bir buton metnini dene
-        for button_text in possible_buttons:
-            if d(text=button_text).exists(timeout=2):
-                print(f"✓ '{button_text}' butonu bulundu, tıklanıyor...")
-                d(text=button_text).click()
-                time.sleep(1)
+        # Dialog'un açılması için UI sakinleşene kadar bekle
+        snapshot = ScreenSnapshot(d, timing=timing).settle('dialog')
+        # Tüm stratejiler tek dump üzerinde yerel indeksle denenir; dialog geç açılabileceği için
+        # element_timeout boyunca ekran yeniden okunur
+        deadline = timing.now() + element_timeout
+        while True:
+            match = snapshot.find(strategies)
+            if match:
+                label, node = match
+                print(f"✓ {label} bulundu, tıklanıyor...")
+                snapshot.click_node(node)
+                timing.wait_for_idle(d, 'dialog_close')
                 print(f"✓ Çerez dialogu kapatıldı")
                 return True
-        
-        # textContains ile dene (kısmi eşleşme)
-        if d(textContains="Reddet").exists(timeout=2):
-            print(f"✓ 'Reddet' içeren buton bulundu, tıklanıyor...")
-            d(textContains="Reddet").click()
-            time.sleep(1)
-            print(f"✓ Çerez dialogu kapatıldı")
-            return True
-        
-        # Resource ID ile de dene
-        if d(resourceId="com.sahibinden:id/rejectButton").exists(timeout=2):
-            print(f"✓ Reddet butonu (ID ile) bulundu, tıklanıyor...")
-            d(resourceId="com.sahibinden:id/rejectButton").click()
-            time.sleep(1)
-            print(f"✓ Çerez dialogu kapatıldı")
-            return True
-        
-        if d(resourceId="com.sahibinden:id/acceptButton").exists(timeout=2):
-            print(f"✓ Kabul butonu (ID ile) bulundu, tıklanıyor...")
-            d(resourceId="com.sahibinden:id/acceptButton").click()
-            time.sleep(1)
-            print(f"✓ Çerez dialogu kapatıldı")
-            return True
+            if timing.now() >= deadline:
+                break
+            timing.clock.sleep(timing.seconds('screen_poll'))
+            snapshot.invalidate()
         
         print("⚠️  Çerez dialogu bulunamadı (zaten kapalı olabilir)")
         return True
@@ -97,14 +172,107 @@ def scroll_to_top(d):
         print(f"  ⚠️ Hata: {e}")
         return True
 
-def click_category(d, name):
-    """{name} kategorisine tıklar - önce en üste scroll yapar, sonra aşağı kaydırarak arar"""
+# Kaydırarak arama stratejileri
+SEARCH_STRATEGY_LOCAL = 'local'    # Ekran ekran swipe + dump + yerel eşleştirme
+SEARCH_STRATEGY_SERVER = 'server'  # Agent'a tek RPC ile hedefe kadar kaydırtma (scroll.to)
+
+# Agent'ın scrollTo'sunun yaptığı en fazla swipe (UiScrollable varsayılanı). jsonrpc scrollTo
+# bu sınırı parametre olarak almaz ve setMaxSearchSwipes RPC ile açılmamıştır
+AGENT_MAX_SEARCH_SWIPES = 30
+
+def search_strategy(d):
+    """Cihaz için arama stratejisini döndürür.
+
+    UI_SEARCH_STRATEGY_BY_MODEL ("model=strateji,...") cihazın modeli için
+    bir strateji tanımlıyorsa o, yoksa UI_SEARCH_STRATEGY (varsayılan local)
+    kullanılır.
+    """
+    by_model = parse_model_map(os.environ.get("UI_SEARCH_STRATEGY_BY_MODEL"))
+    if by_model:
+        model = device_model(d)
+        if model in by_model:
+            return by_model[model]
+    return os.environ.get("UI_SEARCH_STRATEGY", SEARCH_STRATEGY_LOCAL)
+
+
+def _java_quote(text):
+    """Metni Java regex'inde (UiSelector textMatches) birebir eşleşecek şekilde alıntılar"""
+    return '\\Q' + text.replace('\\E', '\\E\\\\E\\Q') + '\\E'
+
+
+def server_scroll_max_swipes():
+    """Sunucu tarafı aramanın en fazla swipe sayısı (UI_SERVER_SCROLL_MAX_SWIPES, varsayılan 30)"""
+    try:
+        return max(0, int(os.environ.get("UI_SERVER_SCROLL_MAX_SWIPES", AGENT_MAX_SEARCH_SWIPES)))
+    except ValueError:
+        return AGENT_MAX_SEARCH_SWIPES
+
+
+def server_scroll_to(d, target, timing=None, max_swipes=None):
+    """Hedef selector görünene kadar kaydırmayı uiautomator2 agent'ına yaptırır.
+
+    Agent'ın scrollTo'su (UiScrollable.scrollIntoView) listenin başına dönüp
+    en fazla AGENT_MAX_SEARCH_SWIPES swipe yapar; bu sınır RPC ile
+    değiştirilemez. Bu yüzden max_swipes (varsayılan
+    UI_SERVER_SCROLL_MAX_SWIPES) istemci tarafında uygulanır: sınır agent'ınkine
+    eşit veya büyükse tek scrollTo çağrısı yapılır, bulunamazsa kalan hak kadar
+    agent'ın scrollForward ve exists çağrılarıyla devam edilir. Sınır daha
+    küçükse scrollTo onu aşabileceği için doğrudan bu adımlarla aranır. Hedef
+    görünür olduysa True döner.
+    """
+    if max_swipes is None:
+        max_swipes = server_scroll_max_swipes()
+    try:
+        scrollable = d(scrollable=True)
+        timing = timing or get_timing_policy(d)
+        if not scrollable.exists(timeout=timing.seconds('container_timeout')):
+            return False
+        swipes = 0
+        if max_swipes >= AGENT_MAX_SEARCH_SWIPES:
+            if scrollable.scroll.vert.to(**target):
+                return True
+            swipes = AGENT_MAX_SEARCH_SWIPES
+        elif d(**target).exists():
+            return True
+        while swipes < max_swipes:
+            # Liste sonuna gelindiyse scrollForward False döner
+            if not scrollable.scroll.vert.forward():
+                return False
+            swipes += 1
+            if d(**target).exists():
+                return True
+        return False
+    except Exception as e:
+        print(f"  ⚠️  Sunucu tarafı kaydırma hatası: {e}")
+        return False
+
+
+def server_search(d, snapshot, target, strategies):
+    """Sunucu tarafı arama: agent hedefe kadar kaydırır, eşleşme snapshot üzerinde
+    yerel stratejilerle doğrulanır. (etiket, node) veya None döndürür."""
+    print("  → Sunucu tarafı arama (scroll.to)...")
+    if server_scroll_to(d, target, timing=snapshot.timing):
+        snapshot.settle('list_ready')
+        match = snapshot.find(strategies)
+        if match:
+            return match
+    print("  ⊙ Sunucu tarafı arama sonuç vermedi, ekran ekran aramaya dönülüyor...")
+    return None
+
+
+def click_category(d, name, timing=None):
+    """{name} kategorisine tıklar - önce en üste scroll yapar, sonra aşağı kaydırarak arar.
+
+    Kategorinin konumu haritada kayıtlıysa gereken swipe'lar tek seferde
+    yapılır; kategori orada değilse (harita eskimişse) normal aramaya dönülür.
+    """
     print(f"\n--- {name} Kategorisine Tıklanıyor ---")
-    time.sleep(4)
+    timing = timing or get_timing_policy(d)
+    # Sayfanın yüklenmesi için UI sakinleşene kadar bekle
+    timing.wait_for_idle(d, 'page_load')
     
     # Önce sayfayı en üste kaydır
     scroll_to_top(d)
-    time.sleep(1)
     
     try:
         # Scroll edilebilir container bul
@@ -114,59 +282,85 @@ def click_category(d, name):
         
         print(f"  → '{name}' kategorisi aranıyor (aşağı doğru scroll ile)...")
         
+        # Tek dump üzerinden tüm eşleşme stratejileri öncelik sırasıyla yerel olarak değerlendirilir
+        snapshot = ScreenSnapshot(d, timing=timing).settle('list_ready')
+        planner = ScrollPlanner(d)
+        strategies = [
+            ("text ile", {'text': name}),                   # 1. Text ile arama
+            ("büyük harf ile", {'text': name.upper()}),     # 2. Büyük harf ile
+            ("textContains ile", {'textContains': name}),   # 3. textContains ile
+            ("description ile", {'description': name}),     # 4. description ile
+        ]
+        
+        def click_match(match):
+            label, node = match
+            found_text = node.text or node.content_desc
+            print(f"✓ '{found_text}' kategorisi bulundu ({label})")
+            snapshot.click_node(node)
+            timing.wait_for_idle(d, 'post_click')
+            print(f"✓ '{found_text}' kategorisine tıklandı")
+            return True
+        
+        # Konum haritasında kayıtlıysa gereken swipe'lar ara kontrol yapmadan tek seferde yapılır
+        position = get_category_position(d, name)
+        if position and position.get('swipes'):
+            swipes = position['swipes']
+            print(f"  → Konum haritası: '{name}' {swipes} swipe aşağıda, doğrudan gidiliyor...")
+            try:
+                # Liste başındaki ekrana göre planlanan swipe, ara dump alınmadan tekrarlanır
+                planner.plan(snapshot)
+                planner.repeat(snapshot, count=swipes)
+                snapshot.settle('post_swipe')
+                match = snapshot.find(strategies)
+                if match:
+                    return click_match(match)
+            except Exception as e:
+                print(f"  ⚠️  Konum haritası ile gidilirken hata: {e}")
+            print("  ⚠️  Kategori kayıtlı konumda değil (harita eskimiş olabilir), baştan aranıyor...")
+            scroll_to_top(d)
+            snapshot.settle('list_ready')
+        
+        if search_strategy(d) == SEARCH_STRATEGY_SERVER:
+            target = {'textMatches': f"(?s).*({_java_quote(name)}|{_java_quote(name.upper())}).*"}
+            match = server_search(d, snapshot, target, strategies)
+            if match:
+                return click_match(match)
+            scroll_to_top(d)
+            snapshot.settle('list_ready')
+        
+        end_detector = ListEndDetector()
         while scroll_attempts < max_scrolls:
             # Önce mevcut ekranda kategoriyi ara
-            # 1. Text ile arama
-            if d(text=name).exists(timeout=1):
-                print(f"✓ '{name}' kategorisi bulundu (text ile)")
-                d(text=name).click()
-                time.sleep(2)
-                print(f"✓ '{name}' kategorisine tıklandı")
-                return True
-            
-            # 2. Büyük harf ile
-            if d(text=name.upper()).exists(timeout=1):
-                print(f"✓ '{name.upper()}' kategorisi bulundu")
-                d(text=name.upper()).click()
-                time.sleep(2)
-                print(f"✓ '{name.upper()}' kategorisine tıklandı")
-                return True
+            match = snapshot.find(strategies)
+            if match:
+                # Aramayla bulunan konum haritaya yazılır (eskimiş kayıt düzelir)
+                if scroll_attempts and (not position or position.get('swipes') != scroll_attempts):
+                    save_category_positions(d, {name: {
+                        'ordinal': position.get('ordinal') if position else None,
+                        'swipes': scroll_attempts,
+                    }})
+                return click_match(match)
             
-            # 3. textContains ile
-            if d(textContains=name).exists(timeout=1):
-                print(f"✓ '{name}' içeren kategori bulundu")
-                d(textContains=name).click()
-                time.sleep(2)
-                print(f"✓ '{name}' kategorisine tıklandı")
-                return True
-            
-            # 4. description ile
-            if d(description=name).exists(timeout=1):
-                print(f"✓ '{name}' kategorisi bulundu (description ile)")
-                d(description=name).click()
-                time.sleep(2)
-                print(f"✓ '{name}' kategorisine tıklandı")
-                return True
+            # Son swipe listeyi kaydırmadıysa liste sonundayız, aramaya devam etmenin anlamı yok
+            if end_detector.update(snapshot):
+                print("  → Liste sonuna gelindi")
+                break
             
             # Kategori bulunamadı, aşağı doğru scroll yap
             try:
-                # Ekran boyutlarını al
-                width, height = d.window_size()
-                center_x = width // 2
-                start_y = int(height * 0.6)  # Ekranın %60'ından başla
-                end_y = int(height * 0.3)    # Ekranın %30'una kadar swipe yap (aşağı kaydırma)
-                
-                # Smooth swipe (aşağı doğru)
-                d.swipe(center_x, start_y, center_x, end_y, duration=0.5)
+                # Satır atlamayan en uzun swipe - snapshot otomatik olarak geçersiz olur
+                planner.swipe(snapshot)
             except Exception as e:
                 # Swipe başarısız olursa fallback olarak scroll kullan
+                snapshot.invalidate()
                 try:
-                    if scrollable.exists(timeout=1):
+                    if scrollable.exists(timeout=timing.seconds('container_timeout')):
                         scrollable.scroll.vert.forward(steps=1)
                 except:
                     pass
             
-            time.sleep(1.5)  # Scroll sonrası bekleme süresi
+            # Scroll sonrası liste sakinleşene kadar bekle (son dump snapshot'a aktarılır)
+            snapshot.settle('post_swipe')
             scroll_attempts += 1
             
             # Her 10 scroll'da bir ilerleme göster
@@ -184,25 +378,26 @@ def click_category(d, name):
         print(f"✗ '{name}' kategorisine tıklanırken hata: {e}")
         return False
 
-def click_vasita_category(d):
+def click_vasita_category(d, timing=None):
     """Vasıta kategorisine tıklar"""
     print("\n--- Vasıta Kategorisine Tıklanıyor ---")
-    return click_category(d, "Vasıta")
+    return click_category(d, "Vasıta", timing=timing)
 
-def click_otomobil_category(d):
+def click_otomobil_category(d, timing=None):
     """Otomobil kategorisine tıklar"""
     print("\n--- Otomobil Kategorisine Tıklanıyor ---")
-    return click_category(d, "Otomobil")
+    return click_category(d, "Otomobil", timing=timing)
 
 
-def click_tum_button(d, category_name):
+def click_tum_button(d, category_name, timing=None):
     """'Tüm {category_name} İlanları' yazan butona tıklar"""
     print(f"\n--- 'Tüm {category_name} İlanları' Butonuna Tıklanıyor ---")
-    time.sleep(4)
+    timing = timing or get_timing_policy(d)
+    # Sayfanın yüklenmesi için UI sakinleşene kadar bekle
+    timing.wait_for_idle(d, 'page_load')
     try:
         # Önce sayfayı en üste kaydır
         scroll_to_top(d)
-        time.sleep(1)
         
         # Olası "Tüm {category_name} İlanları" buton metinleri
         possible_texts = [
@@ -222,65 +417,58 @@ def click_tum_button(d, category_name):
         
         print(f"  → 'Tüm {category_name} İlanları' butonu aranıyor (aşağı doğru scroll ile)...")
         
+        # Önce tam metin eşleşmeleri, sonra "Tüm", kategori ismi ve "ilan" içeren ilk clickable element
+        snapshot = ScreenSnapshot(d, timing=timing).settle('list_ready')
+        planner = ScrollPlanner(d)
+        strategies = [("text ile", {'text': text}) for text in possible_texts]
+        strategies.append((
+            "textContains ile",
+            {'clickable': True, 'textContainsFold': ('tüm', category_name, 'ilan')},
+        ))
+        
+        def click_match(match):
+            label, node = match
+            print(f"✓ '{node.text}' butonu bulundu ({label})")
+            snapshot.click_node(node)
+            timing.wait_for_idle(d, 'post_click')
+            print(f"✓ '{node.text}' butonuna tıklandı")
+            return True
+        
+        if search_strategy(d) == SEARCH_STRATEGY_SERVER:
+            target = {'textMatches': f"(?siu).*tüm.*{_java_quote(category_name)}.*ilan.*"}
+            match = server_search(d, snapshot, target, strategies)
+            if match:
+                return click_match(match)
+            scroll_to_top(d)
+            snapshot.settle('list_ready')
+        
+        end_detector = ListEndDetector()
         while scroll_attempts < max_scrolls:
-            # Önce mevcut ekranda butonu ara
-            for text in possible_texts:
-                if d(text=text).exists(timeout=1):
-                    print(f"✓ '{text}' butonu bulundu (text ile)")
-                    d(text=text).click()
-                    time.sleep(2)
-                    print(f"✓ '{text}' butonuna tıklandı")
-                    return True
+            # Önce mevcut ekranda butonu ara (tek dump, yerel eşleştirme)
+            match = snapshot.find(strategies)
+            if match:
+                return click_match(match)
             
-            # textContains ile kategori ismini içeren "Tüm" butonunu ara
-            if d(textContains="Tüm").exists(timeout=1) and d(textContains=category_name).exists(timeout=1):
-                # XML dump alarak tam eşleşmeyi bul
-                try:
-                    xml_content = d.dump_hierarchy()
-                    from lxml import etree
-                    
-                    try:
-                        root = etree.fromstring(xml_content.encode('utf-8'))
-                    except:
-                        root = etree.fromstring(xml_content)
-                    
-                    # Tüm elementleri gez ve "Tüm" ve kategori ismini içeren ilk clickable elementi bul
-                    for elem in root.iter():
-                        attrib = elem.attrib
-                        text = attrib.get('text', '').strip()
-                        clickable = attrib.get('clickable', 'false').lower() == 'true'
-                        
-                        if text and clickable:
-                            text_lower = text.lower()
-                            category_lower = category_name.lower()
-                            if 'tüm' in text_lower and category_lower in text_lower and 'ilan' in text_lower:
-                                print(f"✓ 'Tüm {category_name} İlanları' butonu bulundu: '{text}'")
-                                d(text=text).click()
-                                time.sleep(2)
-                                print(f"✓ '{text}' butonuna tıklandı")
-                                return True
-                except Exception as e:
-                    print(f"  ⚠️  XML parse sırasında hata: {e}")
+            # Son swipe listeyi kaydırmadıysa liste sonundayız, aramaya devam etmenin anlamı yok
+            if end_detector.update(snapshot):
+                print("  → Liste sonuna gelindi")
+                break
             
             # Buton bulunamadı, aşağı doğru scroll yap
             try:
-                # Ekran boyutlarını al
-                width, height = d.window_size()
-                center_x = width // 2
-                start_y = int(height * 0.6)  # Ekranın %60'ından başla
-                end_y = int(height * 0.3)    # Ekranın %30'una kadar swipe yap (aşağı kaydırma)
-                
-                # Smooth swipe (aşağı doğru)
-                d.swipe(center_x, start_y, center_x, end_y, duration=0.5)
+                # Satır atlamayan en uzun swipe - snapshot otomatik olarak geçersiz olur
+                planner.swipe(snapshot)
             except Exception as e:
                 # Swipe başarısız olursa fallback olarak scroll kullan
+                snapshot.invalidate()
                 try:
-                    if scrollable.exists(timeout=1):
+                    if scrollable.exists(timeout=timing.seconds('container_timeout')):
                         scrollable.scroll.vert.forward(steps=1)
                 except:
                     pass
             
-            time.sleep(1.5)  # Scroll sonrası bekleme süresi
+            # Scroll sonrası liste sakinleşene kadar bekle (son dump snapshot'a aktarılır)
+            snapshot.settle('post_swipe')
             scroll_attempts += 1
             
             # Her 5 scroll'da bir ilerleme göster